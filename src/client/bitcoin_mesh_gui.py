@@ -28,6 +28,7 @@ BTX_MSG_TX_CHUNK = 0x02
 BTX_MSG_TX_END   = 0x03
 BTX_MSG_TX_ACK   = 0x04
 BTX_MSG_TX_ERROR = 0x05
+BTX_MSG_TX_QUEUED = 0x06
 BTX_CHUNK_SIZE   = 180
 BTX_MAX_TX_SIZE  = 2048
 PRIVATE_APP_PORT = 256
@@ -278,6 +279,11 @@ class BitcoinMeshGUI:
                         err_msg = errors.get(err_code, f"Code {err_code}")
                         self.log(f"❌ Erreur TX #{tx_id}: {err_msg}", "error")
                         
+                    elif msg_type == BTX_MSG_TX_QUEUED:
+                        # Gateway hors ligne: TX gardée, l'ACK ou l'erreur suivra. Ne pas renvoyer.
+                        tx_id = payload[1] if len(payload) > 1 else 0
+                        self.log(f"📦 TX #{tx_id} gardée par la gateway (hors ligne), en attente d'ACK...", "warning")
+                        
                     elif msg_type == BTX_MSG_TX_START:
                         tx_id = payload[1] if len(payload) > 1 else 0
                         tx_size = struct.unpack("<H", payload[2:4])[0] if len(payload) >= 4 else 0
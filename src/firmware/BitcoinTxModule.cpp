@@ -55,6 +55,10 @@ ProcessMessage BitcoinTxModule::handleReceived(const meshtastic_MeshPacket &mp)
             LOG_WARN("BitcoinTx: Received ERROR from 0x%08X: %s", 
                      mp.from, (const char *)(payload + 5));
             break;
+        case BTX_MSG_TX_QUEUED:
+            // Gateway offline: TX kept, final ACK/ERROR comes after the flush. Do not resend.
+            LOG_INFO("BitcoinTx: TX queued by gateway 0x%08X, broadcast deferred", mp.from);
+            break;
         default:
             LOG_WARN("BitcoinTx: Unknown message type 0x%02X", msgType);
             break;
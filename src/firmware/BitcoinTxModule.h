@@ -34,6 +34,7 @@ enum BitcoinTxMsgType : uint8_t {
     BTX_MSG_TX_END = 0x03,      // End of transaction / request broadcast
     BTX_MSG_TX_ACK = 0x04,      // Acknowledgement
     BTX_MSG_TX_ERROR = 0x05,   // Error message
+    BTX_MSG_TX_QUEUED = 0x06,   // Gateway stored the TX, broadcast deferred (ACK/ERROR follows)
 };
 
 class BitcoinTxModule : public SinglePortModule
@@ -0,0 +1,194 @@
+"""
+Client HTTP/1.1 minimal sur asyncio (stdlib uniquement), avec support SOCKS5h pour Tor.
+
+Suffisant pour les appels de broadcast (POST /api/tx, JSON-RPC Bitcoin Core): une
+connexion par requête, "Connection: close", corps Content-Length ou chunked.
+Chaque requête en vol ne coûte qu'une coroutine, pas un thread.
+"""
+
+import asyncio
+import base64
+import json
+import socket
+import ssl
+from urllib.parse import urlsplit
+
+USER_AGENT = "BitcoinMeshGateway"
+
+_ssl_context = None
+
+
+def _get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+class HttpResponse:
+    def __init__(self, status, headers, body):
+        self.status_code = status
+        self.headers = headers  # clés en minuscules
+        self.content = body
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+async def _recv_exact(loop, sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = await loop.sock_recv(sock, n - len(data))
+        if not chunk:
+            raise ConnectionError("Proxy SOCKS: connexion fermée")
+        data += chunk
+    return data
+
+
+async def _socks5_connect(proxy, host, port):
+    """Ouvre un socket vers host:port via un proxy SOCKS5 (résolution DNS côté proxy)"""
+    loop = asyncio.get_running_loop()
+    proxy_host, proxy_port = proxy
+    infos = await loop.getaddrinfo(proxy_host, proxy_port, type=socket.SOCK_STREAM)
+    family, sock_type, proto, _, addr = infos[0]
+
+    sock = socket.socket(family, sock_type, proto)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, addr)
+
+        # Négociation: pas d'authentification
+        await loop.sock_sendall(sock, b"\x05\x01\x00")
+        if await _recv_exact(loop, sock, 2) != b"\x05\x00":
+            raise ConnectionError("Proxy SOCKS: méthode refusée")
+
+        # CONNECT par nom de domaine (ATYP 3) -> le proxy résout, y compris les .onion
+        host_bytes = host.encode("idna")
+        await loop.sock_sendall(sock, b"\x05\x01\x00\x03" + bytes([len(host_bytes)]) + host_bytes
+                                + port.to_bytes(2, "big"))
+        reply = await _recv_exact(loop, sock, 4)
+        if reply[1] != 0x00:
+            raise ConnectionError(f"Proxy SOCKS: erreur {reply[1]} vers {host}:{port}")
+
+        # Adresse liée renvoyée par le proxy (ignorée) + port
+        atyp = reply[3]
+        if atyp == 0x01:
+            await _recv_exact(loop, sock, 4 + 2)
+        elif atyp == 0x04:
+            await _recv_exact(loop, sock, 16 + 2)
+        else:
+            length = (await _recv_exact(loop, sock, 1))[0]
+            await _recv_exact(loop, sock, length + 2)
+        return sock
+
+    except BaseException:
+        sock.close()
+        raise
+
+
+async def _read_body(reader, headers):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers éventuels jusqu'à la ligne vide
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return body
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)  # CRLF
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return await reader.read()
+
+
+async def _request(method, url, body, headers, proxy):
+    parts = urlsplit(url)
+    use_tls = parts.scheme == "https"
+    host = parts.hostname
+    port = parts.port or (443 if use_tls else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    if proxy:
+        sock = await _socks5_connect(proxy, host, port)
+        reader, writer = await asyncio.open_connection(
+            sock=sock, ssl=_get_ssl_context() if use_tls else None,
+            server_hostname=host if use_tls else None)
+    else:
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=_get_ssl_context() if use_tls else None)
+
+    try:
+        all_headers = {
+            "Host": parts.netloc.rsplit("@", 1)[-1],
+            "User-Agent": USER_AGENT,
+            "Accept": "*/*",
+            "Connection": "close",
+            "Content-Length": str(len(body)),
+        }
+        all_headers.update(headers)
+        head = f"{method} {path} HTTP/1.1\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in all_headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        fields = status_line.decode("latin-1").split(" ", 2)
+        if len(fields) < 2 or not fields[0].startswith("HTTP/"):
+            raise ConnectionError(f"Réponse HTTP invalide: {status_line[:50]!r}")
+        status = int(fields[1])
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        return HttpResponse(status, response_headers, await _read_body(reader, response_headers))
+
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, ssl.SSLError):
+            pass
+
+
+async def request(method, url, data=None, json_body=None, headers=None, auth=None,
+                  proxy=None, timeout=30):
+    """
+    Effectue une requête HTTP(S) et retourne un HttpResponse.
+
+    Args:
+        data: Corps str/bytes
+        json_body: Objet sérialisé en JSON (remplace data)
+        auth: Tuple (user, password) pour l'authentification Basic
+        proxy: Tuple (host, port) d'un proxy SOCKS5 (Tor), ou None
+        timeout: Délai total en secondes (connexion + réponse)
+    """
+    headers = dict(headers or {})
+    if json_body is not None:
+        body = json.dumps(json_body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    elif isinstance(data, str):
+        body = data.encode("utf-8")
+    else:
+        body = data or b""
+    if auth:
+        token = base64.b64encode(f"{auth[0]}:{auth[1]}".encode("utf-8")).decode("ascii")
+        headers["Authorization"] = f"Basic {token}"
+
+    try:
+        return await asyncio.wait_for(_request(method, url, body, headers, proxy), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Pas de réponse de {urlsplit(url).hostname} après {timeout:g}s") from None
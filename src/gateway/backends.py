@@ -0,0 +1,514 @@
+"""
+Backends de broadcast (Esplora: Mempool.space/Blockstream, Bitcoin Core RPC) et
+stratégies multi-backends.
+
+Modes de broadcast:
+    single  - un seul backend (config.api), comportement historique
+    race    - tous les backends de config.backends en parallèle, le premier succès gagne
+    hedged  - un backend à la fois; le suivant n'est lancé que si le précédent n'a pas
+              répondu dans son p95 de latence observé (ou a échoué)
+
+Chaque backend a un BackendHealth (latence récente, taux d'erreur, disjoncteur). Le
+BackendRegistry écarte les backends dont le disjoncteur est ouvert, classe les autres
+par latence récente et les re-sonde en tâche de fond (/blocks/tip/height,
+getblockchaininfo).
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+
+import async_http
+from bitcoin_tx import calculate_txid
+from btx_protocol import BITCOIN_APIS
+
+BROADCAST_MODES = ("single", "race", "hedged")
+
+# Échantillons minimum avant de faire confiance au p95 observé
+MIN_LATENCY_SAMPLES = 5
+
+# États du disjoncteur
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+
+# Codes RPC Bitcoin Core qui signifient "TX refusée" (et non "nœud en panne")
+RPC_REJECT_CODES = (
+    -22,  # RPC_DESERIALIZATION_ERROR
+    -25,  # RPC_VERIFY_ERROR
+    -26,  # RPC_VERIFY_REJECTED
+)
+
+# TX déjà confirmée: traitée comme un succès, comme les doublons Esplora
+RPC_VERIFY_ALREADY_IN_CHAIN = -27
+
+# Erreurs RPC transitoires (nœud pas encore prêt); les autres sont définitives
+RPC_TRANSIENT_CODES = (
+    -9,   # RPC_CLIENT_NOT_CONNECTED
+    -10,  # RPC_CLIENT_IN_INITIAL_DOWNLOAD
+    -28,  # RPC_IN_WARMUP
+)
+
+# Statuts 4xx qui méritent un nouvel essai; les autres 4xx sont définitifs
+HTTP_TRANSIENT_4XX = (408, 429)
+
+
+class BackendRefused(Exception):
+    """Erreur définitive (authentification, URL, méthode, requête): un nouvel essai échouerait pareil"""
+
+
+class TxRejected(BackendRefused):
+    """Le backend a répondu mais refuse la transaction (erreur définitive, backend sain)"""
+
+
+def _http_error(status, detail):
+    """Exception d'un statut HTTP d'échec: définitive pour un 4xx hors 408/429"""
+    if 400 <= status < 500 and status not in HTTP_TRANSIENT_4XX:
+        return BackendRefused(f"HTTP {status}: {detail}")
+    return Exception(f"HTTP {status}: {detail}")
+
+
+class BroadcastResult:
+    """Résultat d'un broadcast réussi"""
+    def __init__(self, txid, backend, latency, mode="single", backend_latency=None):
+        self.txid = txid
+        self.backend = backend      # Nom du backend gagnant
+        self.latency = latency      # Secondes depuis le début du broadcast (délai de couverture compris)
+        self.mode = mode
+        # Durée de l'appel du backend gagnant seul (mesurée par timed_broadcast)
+        self.backend_latency = latency if backend_latency is None else backend_latency
+
+
+class LatencyTracker:
+    """Fenêtre glissante des latences de succès d'un backend"""
+    def __init__(self, window=100):
+        self.samples = deque(maxlen=window)
+
+    def record(self, latency):
+        self.samples.append(latency)
+
+    def percentile(self, p):
+        """Percentile p (0-100) des échantillons, None si pas assez de données"""
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class BackendHealth:
+    """
+    Santé d'un backend: fenêtre glissante des résultats, latence récente (EWMA)
+    et disjoncteur ouvert après `failure_threshold` échecs consécutifs.
+    """
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, failure_threshold=3, cooldown=60.0, window=50):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)  # True = succès
+        self.recent_latency = None
+        self.consecutive_failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = None
+        self.last_checked = None
+        self.last_error = ""
+
+    @property
+    def available(self):
+        return self.state == CIRCUIT_CLOSED
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def due_for_probe(self, now, interval):
+        """Disjoncteur ouvert depuis cooldown, ou pas de nouvelles depuis interval"""
+        if self.state == CIRCUIT_OPEN:
+            return now - self.opened_at >= self.cooldown
+        return self.last_checked is None or now - self.last_checked >= interval
+
+    def record_success(self, latency):
+        """Retourne True si le disjoncteur vient de se refermer"""
+        self.outcomes.append(True)
+        self.last_checked = time.monotonic()
+        if self.recent_latency is None:
+            self.recent_latency = latency
+        else:
+            self.recent_latency += self.EWMA_ALPHA * (latency - self.recent_latency)
+        self.consecutive_failures = 0
+        if self.state == CIRCUIT_OPEN:
+            self.state = CIRCUIT_CLOSED
+            self.opened_at = None
+            return True
+        return False
+
+    def record_failure(self, error):
+        """Retourne True si le disjoncteur vient de s'ouvrir"""
+        self.outcomes.append(False)
+        self.last_checked = time.monotonic()
+        self.last_error = str(error)[:100]
+        self.consecutive_failures += 1
+        if self.state == CIRCUIT_OPEN:
+            # Sonde en échec: on repart pour un cooldown complet
+            self.opened_at = self.last_checked
+            return False
+        if self.consecutive_failures >= self.failure_threshold:
+            self.state = CIRCUIT_OPEN
+            self.opened_at = self.last_checked
+            return True
+        return False
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "recent_latency": self.recent_latency,
+            "error_rate": self.error_rate,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class Backend:
+    """Backend de broadcast. Lit la configuration au moment de l'appel (Tor, réseau, RPC)."""
+    def __init__(self, name, api_config, config, log=None):
+        self.name = name
+        self.api_config = api_config
+        self.config = config
+        self.log = log or (lambda message, tag="info": None)
+        self.latency = LatencyTracker()
+        self.health = BackendHealth(config.breaker_failures, config.breaker_cooldown)
+
+    def _proxy(self):
+        """Proxy SOCKS5 (host, port) si Tor est actif"""
+        if self.config.tor:
+            return (self.config.tor_host, self.config.tor_port)
+        return None
+
+    async def broadcast(self, tx_hex):
+        """Retourne le TXID; lève une exception en cas d'échec"""
+        raise NotImplementedError
+
+    async def probe(self):
+        """Appel de santé peu coûteux; retourne une description (bloc, chaîne)"""
+        raise NotImplementedError
+
+    def _record_success(self, latency):
+        if self.health.record_success(latency):
+            self.log(f"✅ {self.name} de nouveau disponible (disjoncteur refermé)", "success")
+
+    def _record_failure(self, error):
+        if self.health.record_failure(error):
+            self.log(f"⛔ {self.name} écarté: {self.health.consecutive_failures} échecs consécutifs "
+                     f"(disjoncteur ouvert {self.health.cooldown:g}s)", "warning")
+
+    async def timed_broadcast(self, tx_hex):
+        """broadcast() + mesure de latence et de santé; retourne (txid, latence)"""
+        start = time.monotonic()
+        try:
+            txid = await self.broadcast(tx_hex)
+        except TxRejected:
+            # Le backend a répondu: il est vivant, c'est la TX qui pose problème
+            self._record_success(time.monotonic() - start)
+            raise
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        latency = time.monotonic() - start
+        self.latency.record(latency)
+        self._record_success(latency)
+        return txid, latency
+
+    async def timed_probe(self):
+        start = time.monotonic()
+        try:
+            detail = await self.probe()
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success(time.monotonic() - start)
+        return detail
+
+
+class EsploraBackend(Backend):
+    """API publique compatible Esplora (Mempool.space, Blockstream)"""
+
+    def url(self):
+        """URL selon Tor et le réseau configurés"""
+        if self.config.tor and "onion" in self.api_config:
+            return self.api_config["onion"]
+        if self.config.network == "testnet" and "testnet" in self.api_config:
+            return self.api_config["testnet"]
+        return self.api_config["clearnet"]
+
+    async def broadcast(self, tx_hex):
+        url = self.url()
+
+        self.log(f"📡 Broadcast vers {url}...", "info")
+
+        r = await async_http.request("POST", url, data=tx_hex, proxy=self._proxy(),
+                                     timeout=self.config.broadcast_timeout,
+                                     headers={"Content-Type": "text/plain"})
+
+        if r.status_code == 200:
+            return r.text.strip()  # Le TXID
+        else:
+            error_text = r.text.strip()
+
+            # Si la TX est déjà dans le mempool/blockchain, calculer le TXID
+            if "already" in error_text.lower() or "exist" in error_text.lower() or "duplicate" in error_text.lower():
+                # Calculer le TXID à partir du hex
+                txid = calculate_txid(tx_hex)
+                self.log(f"ℹ️ TX déjà dans le mempool/blockchain ({self.name})", "warning")
+                return txid  # Retourner quand même le TXID calculé
+
+            if r.status_code == 400:
+                raise TxRejected(f"HTTP 400: {error_text[:100]}")
+            raise _http_error(r.status_code, error_text[:100])
+
+    async def probe(self):
+        # Test avec le dernier bloc
+        base_url = self.url().replace("/tx", "")
+        r = await async_http.request("GET", f"{base_url}/blocks/tip/height", proxy=self._proxy(),
+                                     timeout=min(15, self.config.broadcast_timeout))
+        if r.status_code != 200:
+            raise Exception(f"HTTP {r.status_code}")
+        return f"bloc actuel: {r.text.strip()}"
+
+
+class CoreRpcBackend(Backend):
+    """Bitcoin Core local (JSON-RPC)"""
+
+    async def broadcast(self, tx_hex):
+        url = self.api_config["clearnet"]
+        auth = (self.config.rpc_user, self.config.rpc_pass)
+
+        data = {
+            "jsonrpc": "1.0",
+            "method": "sendrawtransaction",
+            "params": [tx_hex]
+        }
+
+        r = await async_http.request("POST", url, json_body=data, auth=auth,
+                                     timeout=self.config.broadcast_timeout)
+        try:
+            result = r.json()
+        except ValueError:
+            # Pas de réponse JSON-RPC: 401 (identifiants), 404, 5xx d'un proxy...
+            raise _http_error(r.status_code, "réponse RPC invalide") from None
+
+        if "result" in result and result["result"]:
+            return result["result"]  # Le TXID
+        elif "error" in result:
+            error = result["error"] or {}
+            if error.get("code") == RPC_VERIFY_ALREADY_IN_CHAIN:
+                txid = calculate_txid(tx_hex)
+                self.log(f"ℹ️ TX déjà dans le mempool/blockchain ({self.name})", "warning")
+                return txid
+            if error.get("code") in RPC_REJECT_CODES:
+                raise TxRejected(error.get("message", "RPC Error"))
+            if error.get("code") in RPC_TRANSIENT_CODES or not error:
+                raise Exception(error.get("message", "RPC Error"))
+            # Méthode inconnue, paramètres invalides, droits insuffisants...
+            raise BackendRefused(f"RPC {error.get('code')}: {error.get('message', 'RPC Error')}")
+        else:
+            raise Exception("Réponse RPC invalide")
+
+    async def probe(self):
+        url = self.api_config["clearnet"]
+        auth = (self.config.rpc_user, self.config.rpc_pass)
+        data = {"jsonrpc": "1.0", "method": "getblockchaininfo", "params": []}
+        r = await async_http.request("POST", url, json_body=data, auth=auth, timeout=10)
+        result = r.json()
+        if not result.get("result"):
+            raise Exception(result.get("error") or "Erreur inconnue")
+        return f"{result['result']['chain']}, bloc {result['result']['blocks']}"
+
+
+def create_backends(config, log=None):
+    """Un backend par entrée de BITCOIN_APIS, indexés par nom"""
+    backends = {}
+    for name, api_config in BITCOIN_APIS.items():
+        cls = CoreRpcBackend if api_config.get("rpc") else EsploraBackend
+        backends[name] = cls(name, api_config, config, log)
+    return backends
+
+
+class BackendRegistry:
+    """Backends configurés + routage selon leur santé"""
+    def __init__(self, config, log=None):
+        self.config = config
+        self.log = log or (lambda message, tag="info": None)
+        self.backends = create_backends(config, self.log)
+
+    def __getitem__(self, name):
+        return self.backends[name]
+
+    def in_use(self):
+        """Backends utilisés par le mode courant, dans l'ordre de la configuration"""
+        if self.config.broadcast_mode == "single":
+            return [self.backends[self.config.api]]
+        return [self.backends[name] for name in self.config.backend_names()]
+
+    def ranked(self):
+        """
+        Backends utilisables (disjoncteur fermé), du plus rapide au plus lent.
+        Sans mesure, un backend garde sa place de la configuration après ceux mesurés.
+        """
+        candidates = self.in_use()
+        order = {backend.name: i for i, backend in enumerate(candidates)}
+        available = [b for b in candidates if b.health.available]
+        if not available:
+            details = "; ".join(f"{b.name}: {b.health.last_error}" for b in candidates)
+            raise Exception(f"Aucun backend disponible, disjoncteurs ouverts ({details})")
+        return sorted(available, key=lambda b: (
+            b.health.recent_latency if b.health.recent_latency is not None else float("inf"),
+            order[b.name]))
+
+    def online(self):
+        """Au moins un backend du mode courant a son disjoncteur fermé"""
+        return any(backend.health.available for backend in self.in_use())
+
+    async def probe(self, backend):
+        """Sonde un backend; retourne (ok, description)"""
+        try:
+            return True, await backend.timed_probe()
+        except Exception as e:
+            return False, str(e)
+
+    async def probe_loop(self, interval, tick=5.0):
+        """Tâche de fond: re-sonde les backends en panne (après cooldown) ou silencieux"""
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            due = [b for b in self.in_use() if b.health.due_for_probe(now, interval)]
+            if due:
+                await asyncio.gather(*(self.probe(b) for b in due))
+
+    def snapshot(self):
+        """État de santé de tous les backends, par nom"""
+        return {name: backend.health.snapshot() for name, backend in self.backends.items()}
+
+
+def is_transient(error):
+    """Échec qui mérite un nouvel essai (timeout, 5xx, 408/429, Tor, nœud en démarrage, backend indisponible)"""
+    return not isinstance(error, BackendRefused)
+
+
+def failure_kind(error):
+    """Nature d'un échec: "transient", "rejected" (TX refusée) ou "refused" (backend mal configuré...)"""
+    if isinstance(error, TxRejected):
+        return "rejected"
+    return "refused" if isinstance(error, BackendRefused) else "transient"
+
+
+def backoff_delay(attempt, base, cap):
+    """
+    Délai avant le nouvel essai n° attempt (1, 2, ...): exponentiel, plafonné à cap,
+    avec une gigue sur la moitié haute pour désynchroniser les réessais.
+    """
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _combined_error(errors):
+    details = "; ".join(f"{name}: {e}" for name, e in errors)
+    if errors and all(isinstance(e, TxRejected) for _, e in errors):
+        return TxRejected(f"TX refusée par tous les backends ({details})")
+    if errors and all(isinstance(e, BackendRefused) for _, e in errors):
+        return BackendRefused(f"Tous les backends ont refusé ({details})")
+    return Exception(f"Tous les backends ont échoué ({details})")
+
+
+async def broadcast_single(backend, tx_hex):
+    start = time.monotonic()
+    txid, latency = await backend.timed_broadcast(tx_hex)
+    return BroadcastResult(txid, backend.name, time.monotonic() - start, "single", latency)
+
+
+def _cancel_losers(tasks):
+    """
+    Annule les essais encore en cours. Leur échec éventuel est lu (sinon asyncio le
+    signale): un essai terminé en même temps que le gagnant, ou dont l'annulation a
+    été absorbée par asyncio.wait_for, se termine quand même en erreur.
+    """
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        task.add_done_callback(_consume_outcome)
+
+
+def _consume_outcome(task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def broadcast_race(backends, tx_hex):
+    """Lance tous les backends en parallèle; le premier succès gagne, les autres sont annulés"""
+    start = time.monotonic()
+    tasks = {asyncio.ensure_future(b.timed_broadcast(tx_hex)): b for b in backends}
+    errors = []
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                backend = tasks[task]
+                if task.exception() is None:
+                    txid, latency = task.result()
+                    return BroadcastResult(txid, backend.name, time.monotonic() - start, "race", latency)
+                errors.append((backend.name, task.exception()))
+        raise _combined_error(errors)
+    finally:
+        _cancel_losers(tasks)
+
+
+async def broadcast_hedged(backends, tx_hex, default_delay):
+    """
+    Lance les backends un par un, dans l'ordre donné. Le suivant part quand le
+    dernier lancé échoue ou dépasse son p95 observé (default_delay sans historique).
+    """
+    start = time.monotonic()
+    tasks = {}
+    errors = []
+    remaining = list(backends)
+    pending = set()
+    last = None
+
+    def launch():
+        nonlocal last
+        last = remaining.pop(0)
+        task = asyncio.ensure_future(last.timed_broadcast(tx_hex))
+        tasks[task] = last
+        pending.add(task)
+
+    try:
+        launch()
+        while pending:
+            delay = None
+            if remaining:
+                delay = last.latency.percentile(95) or default_delay
+            done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Pas de réponse dans le p95: couvrir avec le backend suivant
+                launch()
+                continue
+
+            for task in done:
+                pending.discard(task)
+                backend = tasks[task]
+                if task.exception() is None:
+                    txid, latency = task.result()
+                    return BroadcastResult(txid, backend.name, time.monotonic() - start, "hedged", latency)
+                errors.append((backend.name, task.exception()))
+
+            # Échec: inutile d'attendre le p95, on passe au suivant
+            if remaining:
+                launch()
+
+        raise _combined_error(errors)
+    finally:
+        _cancel_losers(tasks)
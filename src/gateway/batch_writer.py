@@ -0,0 +1,46 @@
+"""
+Écriture par lots dans un thread dédié, commune au journal des broadcasts, à
+l'historique, au journal d'événements et à la capture des paquets.
+
+Les producteurs déposent dans une file; le thread d'écriture prend tout ce qui
+attend et l'écrit en une fois (un commit SQLite, un write). L'arrêt passe par
+une sentinelle: ce qui est en file avant elle est encore écrit.
+"""
+
+import queue
+
+# Lot maximal par écriture
+MAX_BATCH = 512
+
+_STOP = None
+
+
+def drain_batches(items, commit, max_batch=MAX_BATCH):
+    """
+    Boucle du thread d'écriture: attend un élément, y ajoute ce qui est déjà en
+    file (max_batch au plus) et appelle commit(lot). Retourne après le lot qui
+    contient la sentinelle d'arrêt. Une exception de commit remonte à l'appelant.
+    """
+    while True:
+        batch = [items.get()]
+        while len(batch) < max_batch:
+            try:
+                batch.append(items.get_nowait())
+            except queue.Empty:
+                break
+        stopping = any(item is _STOP for item in batch)
+        if stopping:
+            batch = [item for item in batch if item is not _STOP]
+        if batch:
+            commit(batch)
+        if stopping:
+            return
+
+
+def stop_writer(items, thread, timeout=5):
+    """Dépose la sentinelle d'arrêt puis attend la fin du thread d'écriture"""
+    try:
+        items.put(_STOP, timeout=timeout)
+    except queue.Full:
+        pass  # Thread arrêté sur erreur: plus personne ne vide la file
+    thread.join(timeout)
@@ -11,118 +11,66 @@ Architecture:
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
-import struct
 import time
-import json
-import hashlib
 
 try:
-    import meshtastic
-    import meshtastic.serial_interface
-    from pubsub import pub
-    import requests
     import serial.tools.list_ports
 except ImportError:
     import subprocess
     subprocess.check_call(["pip", "install", "meshtastic", "pypubsub", "requests", "pyserial", "pysocks"])
-    import meshtastic
-    import meshtastic.serial_interface
-    from pubsub import pub
-    import requests
     import serial.tools.list_ports
 
-# Essayer d'importer le support SOCKS pour Tor
-try:
-    import socks
-    import socket
-    TOR_AVAILABLE = True
-except ImportError:
-    TOR_AVAILABLE = False
-
-# Constantes protocole BitcoinTxModule
-BTX_MSG_TX_START = 0x01
-BTX_MSG_TX_CHUNK = 0x02
-BTX_MSG_TX_END   = 0x03
-BTX_MSG_TX_ACK   = 0x04
-BTX_MSG_TX_ERROR = 0x05
-BTX_CHUNK_SIZE   = 180
-BTX_MAX_TX_SIZE  = 2048
-PRIVATE_APP_PORT = 256
-
-# Erreurs
-BTX_ERR_TOO_LARGE = 1
-BTX_ERR_TIMEOUT   = 2
-BTX_ERR_INVALID   = 3
-BTX_ERR_BROADCAST_FAIL = 4
-
-# APIs Bitcoin (clearnet et onion)
-BITCOIN_APIS = {
-    "Mempool.space": {
-        "clearnet": "https://mempool.space/api/tx",
-        "onion": "http://mempoolhqx4isw62xs7abwphsq7ldayuidyx2v2oethdhhj6mlo2r6ad.onion/api/tx",
-        "testnet": "https://mempool.space/testnet/api/tx"
-    },
-    "Blockstream": {
-        "clearnet": "https://blockstream.info/api/tx",
-        "onion": "http://explorerzydxu5ecjrkwceayqybizmpjjznk5izmitf2modhcusuqlid.onion/api/tx",
-        "testnet": "https://blockstream.info/testnet/api/tx"
-    },
-    "Bitcoin Core (local)": {
-        "clearnet": "http://127.0.0.1:8332",
-        "rpc": True
-    }
+from btx_protocol import BITCOIN_APIS
+from backends import BROADCAST_MODES
+from gateway_config import GatewayConfig
+from log_buffer import LogRing
+from gateway_engine import (
+    GatewayEngine, GatewayObserver, TOR_AVAILABLE,
+    TX_STATUS_PENDING, TX_STATUS_BROADCAST, TX_STATUS_FAILED, TX_STATUS_QUEUED,
+)
+
+# Libellés de statut dans l'historique
+TX_STATUS_LABELS = {
+    TX_STATUS_PENDING: "⏳ Broadcast...",
+    TX_STATUS_BROADCAST: "✅ Broadcastée",
+    TX_STATUS_FAILED: "❌ Échec",
+    TX_STATUS_QUEUED: "📦 En attente réseau",
 }
 
+# Historique: une page à la fois dans le Treeview, le reste est lu à la demande
+HISTORY_PAGE_SIZE = 100
 
-class PendingTransaction:
-    """Transaction en cours de réception"""
-    def __init__(self, tx_id, total_size, sender):
-        self.tx_id = tx_id
-        self.total_size = total_size
-        self.sender = sender
-        self.chunks = {}
-        self.start_time = time.time()
-        self.expected_chunks = (total_size + BTX_CHUNK_SIZE - 1) // BTX_CHUNK_SIZE
-        
-    def add_chunk(self, index, data):
-        self.chunks[index] = data
-        
-    def is_complete(self):
-        return len(self.chunks) == self.expected_chunks
-        
-    def get_data(self):
-        result = b""
-        for i in range(self.expected_chunks):
-            if i in self.chunks:
-                result += self.chunks[i]
-        return result[:self.total_size]
-        
-    def is_expired(self, timeout=30):
-        return time.time() - self.start_time > timeout
+# Journal à l'écran: vidé par lots à 10 images/s, 1000 lignes au plus
+LOG_FLUSH_MS = 100
+LOG_MAX_LINES = 1000
 
 
-class BitcoinMeshGateway:
-    def __init__(self, root):
+class BitcoinMeshGateway(GatewayObserver):
+    """Fenêtre Tk: observateur optionnel du GatewayEngine"""
+    def __init__(self, root, config=None):
         self.root = root
         self.root.title("₿ Bitcoin Mesh Gateway")
         self.root.geometry("800x700")
         self.root.configure(bg="#1a1a2e")
         
-        self.interface = None
-        self.connected = False
-        self.pending_txs = {}  # tx_id -> PendingTransaction
-        self.text_buffers = {}  # sender -> {"parts": [], "last_time": timestamp}
-        self.tx_history = []
-        self.tx_count = 0
-        self.tor_enabled = False
-        self.session = requests.Session()
+        self.engine = GatewayEngine(config or GatewayConfig())
+        self.history_offset = 0   # Première entrée affichée (0 = les plus récentes)
+        self.history_search = ""  # Filtre courant (TXID, !nœud ou #ID mesh)
+        self.history_total = 0    # Entrées du filtre courant: recomptées au rafraîchissement seulement
+        self.log_ring = LogRing(LOG_MAX_LINES)
+        self._log_dropped = 0
+        self._stats_scheduled = False
         
         self.setup_styles()
         self.create_widgets()
         self.refresh_ports()
+        self.load_config_into_widgets()
         
-        # Timer pour nettoyer les TX expirées
-        self.cleanup_timer()
+        self.engine.add_observer(self)
+        # Nettoyage des TX expirées dans le thread du moteur
+        self.engine.start()
+        self._log_job = self.root.after(LOG_FLUSH_MS, self.flush_log)
+        self.refresh_history()
         
     def setup_styles(self):
         style = ttk.Style()
@@ -208,6 +156,11 @@ class BitcoinMeshGateway:
         ttk.Radiobutton(api_row, text="Mainnet", variable=self.network_var, value="mainnet").pack(side=tk.LEFT, padx=(0, 10))
         ttk.Radiobutton(api_row, text="Testnet", variable=self.network_var, value="testnet").pack(side=tk.LEFT)
         
+        ttk.Label(api_row, text="Mode:").pack(side=tk.LEFT, padx=(15, 5))
+        self.mode_var = tk.StringVar(value="single")
+        ttk.Combobox(api_row, textvariable=self.mode_var, values=list(BROADCAST_MODES),
+                     width=8, state="readonly").pack(side=tk.LEFT)
+        
         # Tor
         tor_row = ttk.Frame(btc_frame)
         tor_row.pack(fill=tk.X, pady=(5, 0))
@@ -264,10 +217,30 @@ class BitcoinMeshGateway:
         self.stat_pending = ttk.Label(stats_row, text="En attente: 0", foreground="#f7931a")
         self.stat_pending.pack(side=tk.LEFT)
         
+        self.stat_backends = ttk.Label(stats_frame, text="", foreground="#888888")
+        self.stat_backends.pack(fill=tk.X, pady=(5, 0))
+        
         # Transactions reçues
         tx_frame = ttk.LabelFrame(main_frame, text="📜 Transactions reçues du Mesh", padding=10)
         tx_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
+        # Recherche et pagination
+        history_row = ttk.Frame(tx_frame)
+        history_row.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(history_row, text="🔍").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(history_row, width=30)
+        self.search_entry.pack(side=tk.LEFT, padx=(5, 5))
+        self.search_entry.bind("<Return>", lambda _: self.search_history())
+        ttk.Button(history_row, text="Chercher", command=self.search_history).pack(side=tk.LEFT)
+        
+        self.next_page_btn = ttk.Button(history_row, text="▶", width=3, command=lambda: self.change_page(1))
+        self.next_page_btn.pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(history_row, text="")
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+        self.prev_page_btn = ttk.Button(history_row, text="◀", width=3, command=lambda: self.change_page(-1))
+        self.prev_page_btn.pack(side=tk.RIGHT)
+
         # Treeview pour les transactions
         columns = ("time", "txid", "size", "status", "btc_txid")
         self.tx_tree = ttk.Treeview(tx_frame, columns=columns, show="headings", height=6)
@@ -303,6 +276,47 @@ class BitcoinMeshGateway:
         self.log_text.tag_configure("error", foreground="#ff6b6b")
         self.log_text.tag_configure("warning", foreground="#f7931a")
         self.log_text.tag_configure("btc", foreground="#f7931a")
+        self.log_text.tag_configure("debug", foreground="#666666")
+        
+    def load_config_into_widgets(self):
+        """Reflète la configuration du moteur dans les widgets"""
+        config = self.engine.config
+        if config.port:
+            self.port_var.set(config.port)
+        self.api_var.set(config.api)
+        self.network_var.set(config.network)
+        self.mode_var.set(config.broadcast_mode)
+        for entry, value in ((self.tor_host, config.tor_host), (self.tor_port, str(config.tor_port)),
+                             (self.rpc_user, config.rpc_user), (self.rpc_pass, config.rpc_pass)):
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        if config.tor:
+            # La session Tor n'existe qu'après un test réussi
+            config.tor = False
+            self.tor_var.set(True)
+            self.root.after(100, self.setup_tor)
+        
+        # Le moteur ne lit jamais les widgets: on lui pousse chaque modification
+        self.api_var.trace_add("write", lambda *_: self.sync_config())
+        self.network_var.trace_add("write", lambda *_: self.sync_config())
+        self.mode_var.trace_add("write", lambda *_: self.sync_config())
+        for entry in (self.tor_host, self.tor_port, self.rpc_user, self.rpc_pass):
+            entry.bind("<KeyRelease>", lambda e: self.sync_config())
+            
+    def sync_config(self):
+        """Copie les widgets dans engine.config (thread Tk uniquement)"""
+        config = self.engine.config
+        config.port = self.port_var.get()
+        config.api = self.api_var.get()
+        config.network = self.network_var.get()
+        config.broadcast_mode = self.mode_var.get()
+        config.tor_host = self.tor_host.get()
+        try:
+            config.tor_port = int(self.tor_port.get())
+        except ValueError:
+            pass
+        config.rpc_user = self.rpc_user.get()
+        config.rpc_pass = self.rpc_pass.get()
         
     def refresh_ports(self):
         ports = [p.device for p in serial.tools.list_ports.comports()]
@@ -311,8 +325,8 @@ class BitcoinMeshGateway:
             self.port_combo.current(0)
             
     def toggle_mesh_connection(self):
-        if self.connected:
-            self.disconnect_mesh()
+        if self.engine.connected:
+            self.engine.disconnect_mesh()
         else:
             self.connect_mesh()
             
@@ -322,701 +336,202 @@ class BitcoinMeshGateway:
             messagebox.showerror("Erreur", "Sélectionnez un port")
             return
             
+        self.sync_config()
         try:
-            self.log(f"Connexion au mesh via {port}...", "info")
-            self.interface = meshtastic.serial_interface.SerialInterface(port)
-            pub.subscribe(self.on_mesh_receive, "meshtastic.receive")
-            
-            self.connected = True
-            self.mesh_status.configure(text="📡 Mesh: Connecté ✓", foreground="#00ff88")
-            self.connect_btn.configure(text="Déconnecter")
-            
-            node_info = self.interface.getMyNodeInfo()
-            name = node_info.get('user', {}).get('shortName', 'N/A')
-            self.log(f"✅ Connecté au nœud gateway: {name}", "success")
-            self.log("🎧 En écoute des transactions Bitcoin sur le mesh...", "info")
-            
+            self.engine.connect_mesh(port)
         except Exception as e:
             self.log(f"❌ Erreur connexion mesh: {e}", "error")
             messagebox.showerror("Erreur", str(e))
             
-    def disconnect_mesh(self):
-        try:
-            if self.interface:
-                pub.unsubscribe(self.on_mesh_receive, "meshtastic.receive")
-                self.interface.close()
-                self.interface = None
-        except:
-            pass
-            
-        self.connected = False
-        self.mesh_status.configure(text="📡 Mesh: Déconnecté", foreground="#ff6b6b")
-        self.connect_btn.configure(text="Connecter")
-        self.log("Déconnecté du mesh", "info")
-        
     def toggle_tor(self):
+        self.sync_config()
         if self.tor_var.get():
             self.setup_tor()
         else:
-            self.session = requests.Session()
-            self.btc_status.configure(text="₿ Bitcoin: Clearnet", foreground="#00aaff")
-            self.log("🌐 Mode clearnet activé", "info")
+            self.engine.use_clearnet()
             
     def setup_tor(self):
-        if not TOR_AVAILABLE:
-            messagebox.showerror("Erreur", "PySocks non installé: pip install pysocks")
-            self.tor_var.set(False)
-            return
-            
         try:
-            tor_host = self.tor_host.get()
-            tor_port = int(self.tor_port.get())
-            
-            self.session = requests.Session()
-            self.session.proxies = {
-                'http': f'socks5h://{tor_host}:{tor_port}',
-                'https': f'socks5h://{tor_host}:{tor_port}'
-            }
-            
-            # Test connexion Tor
-            self.log("🧅 Test connexion Tor...", "info")
-            r = self.session.get("https://check.torproject.org/api/ip", timeout=30)
-            data = r.json()
-            if data.get("IsTor"):
-                self.btc_status.configure(text="₿ Bitcoin: via Tor 🧅", foreground="#00ff88")
-                self.log(f"✅ Connecté via Tor (IP: {data.get('IP', 'N/A')})", "success")
-            else:
-                raise Exception("Pas connecté via Tor")
-                
+            self.engine.setup_tor()
         except Exception as e:
-            self.log(f"❌ Erreur Tor: {e}", "error")
             self.tor_var.set(False)
-            self.session = requests.Session()
-            messagebox.showerror("Erreur Tor", f"Impossible de se connecter via Tor:\n{e}\n\nVérifiez que Tor est lancé.")
+            if not TOR_AVAILABLE:
+                messagebox.showerror("Erreur", str(e))
+            else:
+                messagebox.showerror("Erreur Tor", f"Impossible de se connecter via Tor:\n{e}\n\nVérifiez que Tor est lancé.")
             
     def test_bitcoin_connection(self):
         """Teste la connexion à l'API Bitcoin"""
-        threading.Thread(target=self._test_bitcoin_thread, daemon=True).start()
+        self.sync_config()
+        threading.Thread(target=self.engine.test_bitcoin_connection, daemon=True).start()
         
-    def _test_bitcoin_thread(self):
-        try:
-            api_name = self.api_var.get()
-            api_config = BITCOIN_APIS.get(api_name, {})
-            
-            if api_config.get("rpc"):
-                # Test Bitcoin Core RPC
-                url = api_config["clearnet"]
-                auth = (self.rpc_user.get(), self.rpc_pass.get())
-                data = {"jsonrpc": "1.0", "method": "getblockchaininfo", "params": []}
-                r = self.session.post(url, json=data, auth=auth, timeout=10)
-                result = r.json()
-                if "result" in result:
-                    chain = result["result"]["chain"]
-                    blocks = result["result"]["blocks"]
-                    self.log(f"✅ Bitcoin Core connecté: {chain}, bloc {blocks}", "success")
-                    self.btc_status.configure(text=f"₿ Bitcoin Core: {chain}", foreground="#00ff88")
-                else:
-                    raise Exception(result.get("error", "Erreur inconnue"))
+    # ------------------------------------------------------------------
+    # GatewayObserver - appelé depuis les threads du moteur
+    # ------------------------------------------------------------------
+    
+    def on_log(self, message, tag):
+        self.log(message, tag)
+        
+    def on_mesh_status(self, connected, detail):
+        def _update():
+            if connected:
+                self.mesh_status.configure(text="📡 Mesh: Connecté ✓", foreground="#00ff88")
+                self.connect_btn.configure(text="Déconnecter")
             else:
-                # Test API publique
-                if self.tor_var.get() and "onion" in api_config:
-                    test_url = api_config["onion"].replace("/tx", "")
-                else:
-                    network = self.network_var.get()
-                    if network == "testnet" and "testnet" in api_config:
-                        test_url = api_config["testnet"].replace("/tx", "")
-                    else:
-                        test_url = api_config["clearnet"].replace("/tx", "")
-                
-                # Test avec le dernier bloc
-                r = self.session.get(f"{test_url}/blocks/tip/height", timeout=15)
-                if r.status_code == 200:
-                    height = r.text
-                    self.log(f"✅ {api_name} connecté, bloc actuel: {height}", "success")
-                    mode = "🧅 Tor" if self.tor_var.get() else "🌐 Clearnet"
-                    self.btc_status.configure(text=f"₿ {api_name}: {mode}", foreground="#00ff88")
-                else:
-                    raise Exception(f"HTTP {r.status_code}")
-                    
-        except Exception as e:
-            self.log(f"❌ Test échoué: {e}", "error")
-            self.btc_status.configure(text="₿ Bitcoin: Erreur", foreground="#ff6b6b")
-            
-    def on_mesh_receive(self, packet, interface):
-        """Callback pour les messages reçus du mesh"""
-        try:
-            decoded = packet.get("decoded", {})
-            portnum = decoded.get("portnum")
-            sender = packet.get("fromId", "unknown")
-            
-            # DEBUG - voir tous les paquets
-            self.log(f"RECV portnum={portnum} from={sender}", "info")
-            if decoded:
-                txt = decoded.get('text', '')
-                pld = decoded.get('payload', None)
-                if txt:
-                    self.log(f"  -> TEXT: {txt[:80]}...", "warning")
-                if pld:
-                    if isinstance(pld, bytes):
-                        try:
-                            decoded_str = pld.decode('utf-8')
-                            self.log(f"  -> PAYLOAD(bytes decoded): {decoded_str[:80]}...", "warning")
-                        except:
-                            self.log(f"  -> PAYLOAD(raw bytes): {len(pld)} bytes", "warning")
-                    else:
-                        self.log(f"  -> PAYLOAD: {str(pld)[:80]}", "warning")
-
-            # Mode PRIVATE_APP - protocole chunké BitcoinTx
-            if portnum == "PRIVATE_APP":
-                payload = decoded.get("payload", b"")
-                
-                if len(payload) > 0:
-                    msg_type = payload[0]
-                    
-                    if msg_type == BTX_MSG_TX_START:
-                        self.handle_tx_start(payload, sender)
-                    elif msg_type == BTX_MSG_TX_CHUNK:
-                        self.handle_tx_chunk(payload, sender)
-                    elif msg_type == BTX_MSG_TX_END:
-                        self.handle_tx_end(payload, sender)
-            
-            # Mode TEXT_MESSAGE - accepter aussi les messages texte (pour app smartphone)
-            elif portnum == "TEXT_MESSAGE_APP":
-                text = decoded.get("text", "")
-                if text:
-                    self.handle_text_message(text, sender)
-                        
-        except Exception as e:
-            self.log(f"Erreur parsing mesh: {e}", "error")
+                self.mesh_status.configure(text="📡 Mesh: Déconnecté", foreground="#ff6b6b")
+                self.connect_btn.configure(text="Connecter")
+        self.root.after(0, _update)
+        
+    def on_btc_status(self, text, ok):
+        color = "#00ff88" if ok else "#ff6b6b"
+        self.root.after(0, lambda: self.btc_status.configure(text=text, foreground=color))
+        
+    @staticmethod
+    def _record_item(record):
+        """Identifiant de la ligne du Treeview: celui de l'historique persistant s'il existe"""
+        return f"h{record.history_id}" if record.history_id is not None else f"k{record.key}"
     
-    def handle_text_message(self, text, sender):
-        """Traite un message texte - supporte format BTX:n/total:data et hex brut"""
-        text = text.strip()
-
-        # Ignorer les messages vides
-        if len(text) < 5:
-            return
-
-        # ============================================
-        # FORMAT BTX:n/total:data (app Android)
-        # ============================================
-        if text.startswith("BTX:"):
-            self.handle_btx_chunk(text, sender)
-            return
-
-        # ============================================
-        # FORMAT HEX BRUT (legacy)
-        # ============================================
-        # Nettoyer le texte (enlever espaces, 0x, etc.)
-        clean_hex = text.replace(" ", "").replace("0x", "").replace("\n", "").replace("\r", "")
-
-        # Commande spéciale: "RESET" pour vider le buffer
-        if text.upper() == "RESET":
-            if sender in self.text_buffers:
-                del self.text_buffers[sender]
-                self.log(f"🗑️ Buffer vidé pour {sender}", "warning")
-            return
-
-        # Vérifier que c'est bien du hex
-        if not all(c in '0123456789abcdefABCDEF' for c in clean_hex):
-            self.log(f"📨 Message texte de {sender}: {text[:50]}...", "info")
-            return
-
-        # C'est du hex! Vérifier le timeout du buffer existant (60 secondes)
-        if sender in self.text_buffers:
-            buffer = self.text_buffers[sender]
-            if time.time() - buffer["last_time"] > 60:
-                self.log(f"⏰ Buffer expiré pour {sender}, réinitialisation", "warning")
-                del self.text_buffers[sender]
-
-        # Créer ou récupérer le buffer
-        if sender not in self.text_buffers:
-            self.text_buffers[sender] = {"parts": [], "last_time": time.time(), "tx_start": clean_hex[:8]}
-
-        buffer = self.text_buffers[sender]
-
-        # Vérifier si c'est une nouvelle TX (commence différemment)
-        if len(buffer["parts"]) > 0 and (clean_hex.startswith('01000000') or clean_hex.startswith('02000000')):
-            self.log(f"🔄 Nouvelle TX détectée pour {sender}, réinitialisation du buffer", "warning")
-            buffer["parts"] = []
-            buffer["tx_start"] = clean_hex[:8]
-
-        buffer["parts"].append(clean_hex)
-        buffer["last_time"] = time.time()
-
-        # Assembler toutes les parties
-        full_hex = "".join(buffer["parts"])
-
-        self.log(f"📦 Partie {len(buffer['parts'])} reçue de {sender} ({len(clean_hex)} chars)", "info")
-        self.log(f"   Total accumulé: {len(full_hex)} chars ({len(full_hex)//2} octets)", "info")
-
-        # Vérifier si c'est une transaction Bitcoin complète
-        if len(full_hex) >= 120 and len(full_hex) % 2 == 0:
-            if full_hex.startswith('01') or full_hex.startswith('02'):
-                if self.looks_like_complete_tx(full_hex):
-                    self.log(f"✅ TX Bitcoin complète détectée! ({len(buffer['parts'])} parties)", "success")
-
-                    # Vider le buffer
-                    del self.text_buffers[sender]
-
-                    # Broadcaster
-                    self.broadcast_text_transaction(full_hex, sender)
-                else:
-                    self.log(f"   ⏳ En attente de plus de données...", "warning")
-
-    def handle_btx_chunk(self, text, sender):
-        """Traite un message au format BTX:n/total:data"""
-        try:
-            # Parser BTX:n/total:data
-            parts = text.split(":", 3)
-            if len(parts) < 4:
-                self.log(f"❌ Format BTX invalide: {text[:30]}...", "error")
-                return
-
-            chunk_info = parts[1].split("/")
-            if len(chunk_info) != 2:
-                self.log(f"❌ Format chunk invalide: {parts[1]}", "error")
-                return
-
-            chunk_num = int(chunk_info[0])
-            total_chunks = int(chunk_info[1])
-            chunk_data = parts[2] + (":" + parts[3] if len(parts) > 3 else "")
-
-            self.log(f"📦 BTX chunk {chunk_num}/{total_chunks} de {sender} ({len(chunk_data)} chars)", "info")
-
-            # Créer un buffer spécifique pour les chunks BTX
-            btx_key = f"btx_{sender}"
-            
-            if btx_key not in self.text_buffers:
-                self.text_buffers[btx_key] = {
-                    "chunks": {},
-                    "total": total_chunks,
-                    "last_time": time.time()
-                }
-            
-            buffer = self.text_buffers[btx_key]
-            
-            # Reset si nouveau total (nouvelle TX)
-            if buffer["total"] != total_chunks:
-                self.log(f"🔄 Nouvelle TX BTX détectée, reset buffer", "warning")
-                buffer = {"chunks": {}, "total": total_chunks, "last_time": time.time()}
-                self.text_buffers[btx_key] = buffer
-
-            buffer["chunks"][chunk_num] = chunk_data
-            buffer["last_time"] = time.time()
-
-            received = len(buffer["chunks"])
-            self.log(f"   📊 Reçu: {received}/{total_chunks} chunks", "info")
-
-            # Vérifier si on a tous les chunks
-            if received == total_chunks:
-                # Assembler dans l'ordre
-                full_hex = ""
-                for i in range(1, total_chunks + 1):
-                    if i in buffer["chunks"]:
-                        full_hex += buffer["chunks"][i]
-                    else:
-                        self.log(f"❌ Chunk {i} manquant!", "error")
-                        return
-
-                self.log(f"✅ TX BTX complète! {len(full_hex)} chars ({len(full_hex)//2} bytes)", "success")
-
-                # Nettoyer
-                del self.text_buffers[btx_key]
-
-                # Broadcaster
-                self.broadcast_text_transaction(full_hex, sender)
-
-        except Exception as e:
-            self.log(f"❌ Erreur parsing BTX: {e}", "error")
-
-    def looks_like_complete_tx(self, tx_hex):
-        """Vérifie basiquement si la TX semble complète"""
-        try:
-            tx_bytes = bytes.fromhex(tx_hex)
-            
-            # Une TX doit faire au moins 60 bytes
-            if len(tx_bytes) < 60:
-                return False
-            
-            # Version (4 bytes) - doit être 1 ou 2
-            version = int.from_bytes(tx_bytes[0:4], 'little')
-            if version not in [1, 2]:
-                return False
-            
-            # Vérifier le locktime à la fin (4 derniers bytes)
-            # Le locktime est généralement 0 ou une valeur de bloc/timestamp
-            locktime = int.from_bytes(tx_bytes[-4:], 'little')
-            
-            # Locktime 0 ou valeur raisonnable (< 2^31)
-            if locktime > 2147483647:
-                return False
-            
-            # Semble valide!
-            return True
-            
-        except Exception:
-            return False
+    @staticmethod
+    def _row_values(timestamp, mesh_id, size, status, detail):
+        return (
+            time.strftime("%H:%M:%S", time.localtime(timestamp)),
+            mesh_id,
+            f"{size} B",
+            TX_STATUS_LABELS.get(status, status),
+            detail or ""
+        )
     
-    def broadcast_text_transaction(self, tx_hex, sender):
-        """Broadcast une transaction reçue par message texte"""
-        self.tx_count += 1
-        
-        # Ajouter à l'historique
-        tree_id = self.tx_tree.insert("", 0, values=(
-            time.strftime("%H:%M:%S"),
-            f"TXT ({sender[:6]})",
-            f"{len(tx_hex)//2}B",
-            "⏳ Broadcast...",
-            ""
-        ))
-        
-        # Broadcast en arrière-plan
-        def do_broadcast():
-            try:
-                api_name = self.api_var.get()
-                api_config = BITCOIN_APIS.get(api_name, {})
-                
-                if api_config.get("rpc"):
-                    btc_txid = self._broadcast_rpc(tx_hex, api_config)
-                else:
-                    btc_txid = self._broadcast_api(tx_hex, api_config)
-                
-                self.log(f"🚀 TX broadcastée! TXID: {btc_txid}", "success")
-                self.root.after(0, lambda tid=tree_id, txid=btc_txid: (
-                    self.tx_tree.set(tid, "status", "✅ Broadcastée"),
-                    self.tx_tree.set(tid, "btc_txid", txid)
-                ))
-                
-            except Exception as e:
-                self.log(f"❌ Échec broadcast: {e}", "error")
-                self.root.after(0, lambda tid=tree_id, err=str(e): (
-                    self.tx_tree.set(tid, "status", "❌ Échec"),
-                    self.tx_tree.set(tid, "btc_txid", err[:40])
-                ))
-            
-            self.update_stats()
-        
-        threading.Thread(target=do_broadcast, daemon=True).start()
-            
-    def handle_tx_start(self, payload, sender):
-        """Reçoit TX_START"""
-        if len(payload) >= 4:
-            tx_id = payload[1]
-            tx_size = struct.unpack("<H", payload[2:4])[0]
-            
-            self.log(f"📥 TX_START reçu: ID={tx_id}, taille={tx_size} octets, de {sender}", "warning")
-            
-            if tx_size > BTX_MAX_TX_SIZE:
-                self.send_error(tx_id, BTX_ERR_TOO_LARGE, sender)
-                return
-                
-            self.pending_txs[tx_id] = PendingTransaction(tx_id, tx_size, sender)
-            self.update_stats()
-            
-    def handle_tx_chunk(self, payload, sender):
-        """Reçoit TX_CHUNK"""
-        if len(payload) >= 3:
-            tx_id = payload[1]
-            chunk_idx = payload[2]
-            chunk_data = payload[3:]
-            
-            if tx_id in self.pending_txs:
-                self.pending_txs[tx_id].add_chunk(chunk_idx, chunk_data)
-                self.log(f"  📦 Chunk {chunk_idx + 1}: {len(chunk_data)} octets", "info")
-                
-    def handle_tx_end(self, payload, sender):
-        """Reçoit TX_END - transaction complète, la broadcaster"""
-        if len(payload) >= 2:
-            tx_id = payload[1]
-            
-            if tx_id not in self.pending_txs:
-                self.log(f"❌ TX_END pour TX inconnue #{tx_id}", "error")
-                return
-                
-            pending = self.pending_txs[tx_id]
-            
-            if not pending.is_complete():
-                self.log(f"❌ TX #{tx_id} incomplète ({len(pending.chunks)}/{pending.expected_chunks} chunks)", "error")
-                self.send_error(tx_id, BTX_ERR_INVALID, sender)
-                del self.pending_txs[tx_id]
+    def on_tx_added(self, record):
+        item = self._record_item(record)
+        values = self._row_values(record.time, record.mesh_id, record.size, record.status, record.btc_txid)
+        def _insert():
+            # Le filtre n'est pas évalué ici: total et page à jour au prochain rafraîchissement
+            if self.history_search:
                 return
-                
-            # Récupérer la transaction
-            tx_bytes = pending.get_data()
-            tx_hex = tx_bytes.hex()
-            
-            self.log(f"✅ TX #{tx_id} complète: {len(tx_bytes)} octets", "success")
-            
-            # Ajouter à l'historique
-            self.tx_count += 1
-            tree_id = self.tx_tree.insert("", 0, values=(
-                time.strftime("%H:%M:%S"),
-                f"#{tx_id}",
-                f"{len(tx_bytes)} B",
-                "⏳ Broadcast...",
-                ""
-            ))
-            
-            # Broadcaster sur Bitcoin
-            threading.Thread(target=self._broadcast_tx, args=(tx_id, tx_hex, sender, tree_id), daemon=True).start()
-            
-            del self.pending_txs[tx_id]
-            self.update_stats()
-            
-    def _broadcast_tx(self, tx_id, tx_hex, sender, tree_id):
-        """Broadcast la transaction sur le réseau Bitcoin"""
-        try:
-            api_name = self.api_var.get()
-            api_config = BITCOIN_APIS.get(api_name, {})
-            
-            if api_config.get("rpc"):
-                # Bitcoin Core RPC
-                btc_txid = self._broadcast_rpc(tx_hex, api_config)
-            else:
-                # API publique
-                btc_txid = self._broadcast_api(tx_hex, api_config)
-                
-            # Succès !
-            self.log(f"🎉 TX #{tx_id} broadcastée! TXID: {btc_txid}", "btc")
-            self.send_ack(tx_id, sender)
-            
-            # Mettre à jour l'affichage
-            self.root.after(0, lambda: self.tx_tree.item(tree_id, values=(
-                time.strftime("%H:%M:%S"),
-                f"#{tx_id}",
-                f"",
-                "✅ Broadcastée",
-                btc_txid
-            )))
-            
-            self.update_stats()
-            
-        except Exception as e:
-            self.log(f"❌ Échec broadcast TX #{tx_id}: {e}", "error")
-            self.send_error(tx_id, BTX_ERR_BROADCAST_FAIL, sender)
-            
-            self.root.after(0, lambda: self.tx_tree.item(tree_id, values=(
-                time.strftime("%H:%M:%S"),
-                f"#{tx_id}",
-                f"",
-                f"❌ Erreur",
-                str(e)[:50]
-            )))
-            
-    def _broadcast_api(self, tx_hex, api_config):
-        """Broadcast via API publique (Mempool, Blockstream)"""
-        if self.tor_var.get() and "onion" in api_config:
-            url = api_config["onion"]
-        else:
-            network = self.network_var.get()
-            if network == "testnet" and "testnet" in api_config:
-                url = api_config["testnet"]
-            else:
-                url = api_config["clearnet"]
-                
-        self.log(f"📡 Broadcast vers {url}...", "info")
-        
-        r = self.session.post(url, data=tx_hex, timeout=30,
-                              headers={"Content-Type": "text/plain"})
-        
-        if r.status_code == 200:
-            return r.text.strip()  # Le TXID
-        else:
-            error_text = r.text.strip()
-            
-            # Si la TX est déjà dans le mempool/blockchain, calculer le TXID
-            if "already" in error_text.lower() or "exist" in error_text.lower() or "duplicate" in error_text.lower():
-                # Calculer le TXID à partir du hex
-                txid = self._calculate_txid(tx_hex)
-                self.log(f"ℹ️ TX déjà dans le mempool/blockchain", "warning")
-                return txid  # Retourner quand même le TXID calculé
-            
-            raise Exception(f"HTTP {r.status_code}: {error_text[:100]}")
+            # Nouvelle ligne visible seulement sur la première page
+            if not self.history_offset:
+                if self.tx_tree.exists(item):
+                    return  # Déjà lue (et comptée) sur disque par refresh_history
+                self.tx_tree.insert("", 0, iid=item, values=values)
+                children = self.tx_tree.get_children()
+                if len(children) > HISTORY_PAGE_SIZE:
+                    self.tx_tree.delete(*children[HISTORY_PAGE_SIZE:])
+            self.history_total += 1
+            self.update_page_label()
+        self.root.after(0, _insert)
     
-    def _calculate_txid(self, tx_hex):
-        """Calcule le TXID à partir du hex de la transaction (supporte SegWit)"""
-        import hashlib
-        tx_bytes = bytes.fromhex(tx_hex)
-        
-        # Vérifier si c'est une transaction SegWit (marker 0x00, flag 0x01 après version)
-        if len(tx_bytes) > 6 and tx_bytes[4] == 0x00 and tx_bytes[5] == 0x01:
-            # C'est une SegWit transaction - il faut sérialiser sans witness pour le TXID
-            try:
-                tx_for_txid = self._strip_witness(tx_bytes)
-            except:
-                tx_for_txid = tx_bytes  # Fallback
-        else:
-            # Transaction legacy
-            tx_for_txid = tx_bytes
-        
-        # Double SHA256
-        hash1 = hashlib.sha256(tx_for_txid).digest()
-        hash2 = hashlib.sha256(hash1).digest()
-        # Inverser (little-endian -> big-endian pour affichage)
-        txid = hash2[::-1].hex()
-        return txid
+    def on_tx_updated(self, record):
+        item = self._record_item(record)
+        status = TX_STATUS_LABELS[record.status]
+        btc_txid = record.btc_txid
+        def _update():
+            if self.tx_tree.exists(item):
+                self.tx_tree.set(item, "status", status)
+                self.tx_tree.set(item, "btc_txid", btc_txid)
+        self.root.after(0, _update)
     
-    def _strip_witness(self, tx_bytes):
-        """Enlève les données witness d'une transaction SegWit pour calculer le TXID"""
-        import struct
-        
-        # Version (4 bytes)
-        version = tx_bytes[0:4]
-        
-        # Skip marker (0x00) et flag (0x01)
-        pos = 6
-        
-        # Lire le nombre d'inputs (varint)
-        input_count, varint_size = self._read_varint(tx_bytes, pos)
-        pos += varint_size
-        
-        inputs = []
-        for _ in range(input_count):
-            # txid (32) + vout (4) + script_len (varint) + script + sequence (4)
-            input_start = pos
-            pos += 36  # txid + vout
-            script_len, vs = self._read_varint(tx_bytes, pos)
-            pos += vs + script_len + 4  # script + sequence
-            inputs.append(tx_bytes[input_start:pos])
-        
-        # Lire le nombre d'outputs (varint)
-        output_count, varint_size = self._read_varint(tx_bytes, pos)
-        pos += varint_size
-        
-        outputs = []
-        for _ in range(output_count):
-            output_start = pos
-            pos += 8  # amount
-            script_len, vs = self._read_varint(tx_bytes, pos)
-            pos += vs + script_len
-            outputs.append(tx_bytes[output_start:pos])
-        
-        # Skip witness data - on va directement au locktime (4 derniers bytes)
-        locktime = tx_bytes[-4:]
-        
-        # Reconstruire la TX sans witness
-        result = version
-        result += self._encode_varint(input_count)
-        for inp in inputs:
-            result += inp
-        result += self._encode_varint(output_count)
-        for out in outputs:
-            result += out
-        result += locktime
-        
-        return result
+    # ------------------------------------------------------------------
+    # Historique (thread Tk)
+    # ------------------------------------------------------------------
     
-    def _read_varint(self, data, pos):
-        """Lit un varint Bitcoin et retourne (valeur, taille)"""
-        first = data[pos]
-        if first < 0xfd:
-            return first, 1
-        elif first == 0xfd:
-            return int.from_bytes(data[pos+1:pos+3], 'little'), 3
-        elif first == 0xfe:
-            return int.from_bytes(data[pos+1:pos+5], 'little'), 5
-        else:
-            return int.from_bytes(data[pos+1:pos+9], 'little'), 9
+    def refresh_history(self):
+        """Recharge la page courante depuis l'historique persistant (et recompte le filtre)"""
+        history = self.engine.history
+        if history is not None:
+            self.history_total = history.count(self.history_search)
+            rows = history.page(self.history_offset, HISTORY_PAGE_SIZE, self.history_search)
+            self.tx_tree.delete(*self.tx_tree.get_children())
+            for row in rows:
+                self.tx_tree.insert("", tk.END, iid=f"h{row['id']}", values=self._row_values(
+                    row["time"], row["mesh_id"], row["size"], row["status"], row["detail"]))
+        self.update_page_label()
     
-    def _encode_varint(self, n):
-        """Encode un entier en varint Bitcoin"""
-        if n < 0xfd:
-            return bytes([n])
-        elif n <= 0xffff:
-            return bytes([0xfd]) + n.to_bytes(2, 'little')
-        elif n <= 0xffffffff:
-            return bytes([0xfe]) + n.to_bytes(4, 'little')
-        else:
-            return bytes([0xff]) + n.to_bytes(8, 'little')
-            
-    def _broadcast_rpc(self, tx_hex, api_config):
-        """Broadcast via Bitcoin Core RPC"""
-        url = api_config["clearnet"]
-        auth = (self.rpc_user.get(), self.rpc_pass.get())
-        
-        data = {
-            "jsonrpc": "1.0",
-            "method": "sendrawtransaction",
-            "params": [tx_hex]
-        }
-        
-        r = self.session.post(url, json=data, auth=auth, timeout=30)
-        result = r.json()
-        
-        if "result" in result and result["result"]:
-            return result["result"]  # Le TXID
-        elif "error" in result:
-            raise Exception(result["error"].get("message", "RPC Error"))
-        else:
-            raise Exception("Réponse RPC invalide")
-            
-    def send_ack(self, tx_id, dest):
-        """Envoie ACK au sender"""
-        if self.interface:
-            msg = struct.pack("<BB", BTX_MSG_TX_ACK, tx_id)
-            try:
-                self.interface.sendData(msg, portNum=PRIVATE_APP_PORT, destId=dest)
-                self.log(f"  → ACK envoyé pour TX #{tx_id}", "info")
-            except:
-                pass
-                
-    def send_error(self, tx_id, error_code, dest):
-        """Envoie ERROR au sender"""
-        if self.interface:
-            msg = struct.pack("<BBB", BTX_MSG_TX_ERROR, tx_id, error_code)
-            try:
-                self.interface.sendData(msg, portNum=PRIVATE_APP_PORT, destId=dest)
-                self.log(f"  → ERROR {error_code} envoyé pour TX #{tx_id}", "error")
-            except:
-                pass
-                
+    def update_page_label(self):
+        """Libellé et boutons de pagination d'après le total courant (sans requête)"""
+        history = self.engine.history
+        if history is None:
+            # Sans historique persistant: seules les dernières TX de la session
+            self.page_label.configure(text=f"{len(self.tx_tree.get_children())} dernières")
+            self.prev_page_btn.state(["disabled"])
+            self.next_page_btn.state(["disabled"])
+            return
+        total = self.history_total
+        pages = max(1, (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+        page = self.history_offset // HISTORY_PAGE_SIZE + 1
+        self.page_label.configure(text=f"Page {page}/{pages} ({total})")
+        self.prev_page_btn.state(["!disabled"] if self.history_offset else ["disabled"])
+        self.next_page_btn.state(["!disabled"] if page < pages else ["disabled"])
+    
+    def change_page(self, step):
+        self.history_offset = max(0, self.history_offset + step * HISTORY_PAGE_SIZE)
+        self.refresh_history()
+    
+    def search_history(self):
+        self.history_search = self.search_entry.get().strip()
+        self.history_offset = 0
+        self.refresh_history()
+        
+    def on_stats_changed(self):
+        # Une seule mise à jour planifiée à la fois, quel que soit le nombre d'événements
+        if not self._stats_scheduled:
+            self._stats_scheduled = True
+            self.root.after(0, self.update_stats)
+        
     def update_stats(self):
-        """Met à jour les statistiques"""
-        received = sum(1 for item in self.tx_tree.get_children())
-        broadcast = sum(1 for item in self.tx_tree.get_children() 
-                       if "✅" in self.tx_tree.item(item)["values"][3])
-        failed = sum(1 for item in self.tx_tree.get_children() 
-                    if "❌" in self.tx_tree.item(item)["values"][3])
-        pending = len(self.pending_txs)
-        
-        self.root.after(0, lambda: [
-            self.stat_received.configure(text=f"Reçues: {received}"),
-            self.stat_broadcast.configure(text=f"Broadcastées: {broadcast}"),
-            self.stat_failed.configure(text=f"Échouées: {failed}"),
-            self.stat_pending.configure(text=f"En attente: {pending}")
-        ])
-        
-    def cleanup_timer(self):
-        """Nettoie les transactions expirées"""
-        expired = [tx_id for tx_id, tx in self.pending_txs.items() if tx.is_expired()]
-        for tx_id in expired:
-            self.log(f"⏰ TX #{tx_id} expirée (timeout)", "warning")
-            self.send_error(tx_id, BTX_ERR_TIMEOUT, self.pending_txs[tx_id].sender)
-            del self.pending_txs[tx_id]
-            
-        if expired:
-            self.update_stats()
-            
-        self.root.after(5000, self.cleanup_timer)
+        """Met à jour les statistiques (thread Tk) à partir des compteurs du moteur"""
+        self._stats_scheduled = False
+        stats = self.engine.stats_snapshot()
+        
+        self.stat_received.configure(text=f"Reçues: {stats['received']}")
+        self.stat_broadcast.configure(text=f"Broadcastées: {stats['broadcast']}")
+        self.stat_failed.configure(text=f"Échouées: {stats['failed']}")
+        pending = f"En attente: {stats['reassembling']}"
+        if stats["queued"]:
+            pending += f" (+{stats['queued']} hors ligne)"
+        self.stat_pending.configure(text=pending)
+        backends = " · ".join(f"{name}: {count}" for name, count in sorted(stats["by_backend"].items()))
+        self.stat_backends.configure(
+            text=f"{stats['bytes_received']} octets reçus, {stats['bytes_broadcast']} broadcastés"
+                 + (f"  |  {backends}" if backends else ""))
         
     def log(self, message, tag="info"):
-        def _log():
+        """Depuis n'importe quel thread: le message attend le prochain flush_log"""
+        self.log_ring.append(message, tag)
+
+    def flush_log(self):
+        """Affiche les messages en attente en un seul lot (thread Tk, toutes les LOG_FLUSH_MS)"""
+        batch = self.log_ring.drain()
+        dropped = self.log_ring.dropped
+        if batch or dropped != self._log_dropped:
             self.log_text.configure(state=tk.NORMAL)
-            timestamp = time.strftime("%H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n", tag)
+            if dropped != self._log_dropped:
+                self.log_text.insert(tk.END, f"… {dropped - self._log_dropped} messages non affichés\n", "warning")
+                self._log_dropped = dropped
+            for timestamp, message, tag in batch:
+                self.log_text.insert(tk.END, f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] {message}\n", tag)
+            # Plafond de lignes: les plus anciennes disparaissent
+            lines = int(self.log_text.index("end-1c").split(".")[0])
+            if lines > LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
             self.log_text.see(tk.END)
             self.log_text.configure(state=tk.DISABLED)
-        self.root.after(0, _log)
+        self._log_job = self.root.after(LOG_FLUSH_MS, self.flush_log)
         
     def on_closing(self):
-        self.disconnect_mesh()
+        self.root.after_cancel(self._log_job)
+        self.engine.remove_observer(self)
+        self.engine.stop()
         self.root.destroy()
 
 
 if __name__ == "__main__":
+    import sys
+    from gateway_config import load_config
+    
+    # Optionnel: python bitcoin_mesh_gateway.py gateway.ini
+    config = load_config(sys.argv[1]) if len(sys.argv) > 1 else None
+    
     root = tk.Tk()
-    app = BitcoinMeshGateway(root)
+    app = BitcoinMeshGateway(root, config)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
-
@@ -0,0 +1,245 @@
+"""
+Outils de sérialisation Bitcoin utilisés par la gateway (varint, TXID, vsize)
+"""
+
+import hashlib
+
+
+def read_varint(data, pos):
+    """Lit un varint Bitcoin et retourne (valeur, taille)"""
+    first = data[pos]
+    if first < 0xfd:
+        return first, 1
+    elif first == 0xfd:
+        return int.from_bytes(data[pos+1:pos+3], 'little'), 3
+    elif first == 0xfe:
+        return int.from_bytes(data[pos+1:pos+5], 'little'), 5
+    else:
+        return int.from_bytes(data[pos+1:pos+9], 'little'), 9
+
+
+def encode_varint(n):
+    """Encode un entier en varint Bitcoin"""
+    if n < 0xfd:
+        return bytes([n])
+    elif n <= 0xffff:
+        return bytes([0xfd]) + n.to_bytes(2, 'little')
+    elif n <= 0xffffffff:
+        return bytes([0xfe]) + n.to_bytes(4, 'little')
+    else:
+        return bytes([0xff]) + n.to_bytes(8, 'little')
+
+
+def strip_witness(tx_bytes):
+    """Enlève les données witness d'une transaction SegWit pour calculer le TXID"""
+    # Version (4 bytes)
+    version = tx_bytes[0:4]
+
+    # Skip marker (0x00) et flag (0x01)
+    pos = 6
+
+    # Lire le nombre d'inputs (varint)
+    input_count, varint_size = read_varint(tx_bytes, pos)
+    pos += varint_size
+
+    inputs = []
+    for _ in range(input_count):
+        # txid (32) + vout (4) + script_len (varint) + script + sequence (4)
+        input_start = pos
+        pos += 36  # txid + vout
+        script_len, vs = read_varint(tx_bytes, pos)
+        pos += vs + script_len + 4  # script + sequence
+        inputs.append(tx_bytes[input_start:pos])
+
+    # Lire le nombre d'outputs (varint)
+    output_count, varint_size = read_varint(tx_bytes, pos)
+    pos += varint_size
+
+    outputs = []
+    for _ in range(output_count):
+        output_start = pos
+        pos += 8  # amount
+        script_len, vs = read_varint(tx_bytes, pos)
+        pos += vs + script_len
+        outputs.append(tx_bytes[output_start:pos])
+
+    # Skip witness data - on va directement au locktime (4 derniers bytes)
+    locktime = tx_bytes[-4:]
+
+    # Reconstruire la TX sans witness
+    result = version
+    result += encode_varint(input_count)
+    for inp in inputs:
+        result += inp
+    result += encode_varint(output_count)
+    for out in outputs:
+        result += out
+    result += locktime
+
+    return result
+
+
+def _walk_body(data, pos):
+    """Parcourt entrées et sorties depuis pos; retourne (nombre d'entrées, fin des sorties)"""
+    input_count = data[pos]
+    if input_count < 0xfd:
+        pos += 1
+    else:
+        input_count, vs = read_varint(data, pos)
+        pos += vs
+    for _ in range(input_count):
+        script_len = data[pos + 36]  # après txid + vout
+        if script_len < 0xfd:
+            pos += script_len + 41  # outpoint + varint + script + sequence
+        else:
+            script_len, vs = read_varint(data, pos + 36)
+            pos += 36 + vs + script_len + 4
+    output_count = data[pos]
+    if output_count < 0xfd:
+        pos += 1
+    else:
+        output_count, vs = read_varint(data, pos)
+        pos += vs
+    for _ in range(output_count):
+        script_len = data[pos + 8]  # après le montant
+        if script_len < 0xfd:
+            pos += script_len + 9
+        else:
+            script_len, vs = read_varint(data, pos + 8)
+            pos += 8 + vs + script_len
+    return input_count, pos
+
+
+def _is_segwit(data):
+    return len(data) > 6 and data[4] == 0x00 and data[5] == 0x01
+
+
+def tx_layout(data):
+    """
+    Vérifie toute la structure en un seul parcours (memoryview, sans copie).
+
+    Returns:
+        (segwit, body_end): body_end = fin des sorties, début du witness
+    Raises:
+        ValueError: transaction tronquée ou octets en trop
+    """
+    segwit = _is_segwit(data)
+    try:
+        input_count, pos = _walk_body(data, 6 if segwit else 4)
+        body_end = pos
+        if segwit:
+            for _ in range(input_count):
+                item_count, vs = read_varint(data, pos)
+                pos += vs
+                for _ in range(item_count):
+                    item_len = data[pos]
+                    if item_len < 0xfd:
+                        pos += item_len + 1
+                    else:
+                        item_len, vs = read_varint(data, pos)
+                        pos += vs + item_len
+    except IndexError:
+        raise ValueError("transaction tronquée") from None
+    if pos + 4 != len(data):
+        raise ValueError(f"longueur incohérente ({len(data)} octets, structure: {pos + 4})")
+    return segwit, body_end
+
+
+def _body_end(data):
+    """Fin des sorties d'une TX SegWit (le witness n'est pas parcouru)"""
+    try:
+        body_end = _walk_body(data, 6)[1]
+    except IndexError:
+        raise ValueError("transaction tronquée") from None
+    if body_end + 4 > len(data):
+        raise ValueError("transaction tronquée")
+    return body_end
+
+
+def _sha256d_full_hex(data):
+    """SHA256d d'un seul buffer (TX entière), affiché en big-endian"""
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()[::-1].hex()
+
+
+def _segwit_txid(view, body_end):
+    """TXID SegWit: version, entrées/sorties et locktime hachés depuis le memoryview"""
+    h = hashlib.sha256(view[:4])
+    h.update(view[6:body_end])
+    h.update(view[-4:])
+    return hashlib.sha256(h.digest()).digest()[::-1].hex()
+
+
+def vsize_from_layout(size, segwit, body_end):
+    """Taille virtuelle d'après tx_layout: ceil((3 * taille sans witness + taille) / 4)"""
+    if segwit:
+        base_size = body_end - 6 + 8  # version + entrées/sorties + locktime
+        return (base_size * 3 + size + 3) // 4
+    return size
+
+
+def txid_from_layout(view, segwit, body_end):
+    """TXID d'après tx_layout: les tranches sans witness sont hachées directement"""
+    if segwit:
+        return _segwit_txid(view, body_end)
+    return _sha256d_full_hex(view)
+
+
+def tx_hashes(tx):
+    """
+    (txid, wtxid) d'une transaction hex ou bytes-like.
+
+    Une TX legacy est hachée une seule fois (txid == wtxid), sans parcours; une TX
+    SegWit n'est parcourue que jusqu'à la fin des sorties. La structure complète
+    n'est pas vérifiée: passer par tx_layout pour cela.
+
+    Raises:
+        ValueError: hex invalide ou TX SegWit tronquée
+    """
+    data = bytes.fromhex(tx) if isinstance(tx, str) else tx
+    view = memoryview(data)
+    wtxid = _sha256d_full_hex(view)
+    if _is_segwit(data):
+        return _segwit_txid(view, _body_end(data)), wtxid
+    return wtxid, wtxid
+
+
+def hash_transactions(txs):
+    """
+    Hache un lot de transactions (import d'historique, déduplication).
+
+    Yields:
+        (txid, wtxid) pour chaque transaction, ou None si elle est illisible
+    """
+    for tx in txs:
+        try:
+            yield tx_hashes(tx)
+        except ValueError:
+            yield None
+
+
+def calculate_txid(tx_hex):
+    """Calcule le TXID à partir du hex de la transaction (supporte SegWit)"""
+    return txid_and_vsize(bytes.fromhex(tx_hex))[0]
+
+
+def txid_and_vsize(data):
+    """
+    (txid, vsize) en un seul parcours, pour ne pas redécoder la TX à chaque étape.
+
+    Une TX SegWit tronquée est hachée entière (comme avant), sa vsize est sa taille.
+    """
+    view = memoryview(data)
+    if _is_segwit(data):
+        try:
+            body_end = _body_end(data)
+        except ValueError:
+            pass  # Fallback: TX entière
+        else:
+            return _segwit_txid(view, body_end), vsize_from_layout(len(data), True, body_end)
+    return _sha256d_full_hex(view), len(data)
+
+
+def tx_vsize(tx_bytes):
+    """Taille virtuelle en vbytes: ceil(poids / 4), poids = 3 * taille sans witness + taille totale"""
+    segwit = _is_segwit(tx_bytes)
+    return vsize_from_layout(len(tx_bytes), segwit, _body_end(tx_bytes) if segwit else None)
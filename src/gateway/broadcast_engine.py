@@ -0,0 +1,159 @@
+"""
+Cœur de broadcast asyncio: une seule boucle d'événements, dans son propre thread,
+porte toutes les requêtes de broadcast en vol.
+
+Les transactions complètes passent par une BroadcastQueue bornée et prioritaire,
+vidée par un nombre fixe de workers (max_concurrency). submit() permet en plus de
+planifier une coroutine quelconque; un sémaphore borne le total des appels en vol.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from broadcast_queue import BroadcastQueue
+
+
+class BroadcastEngine:
+    def __init__(self, max_concurrency=16, queue_size=64):
+        self.max_concurrency = max_concurrency
+        self.queue = BroadcastQueue(queue_size, on_available=self._wake_worker)
+        self.loop = None
+        self._thread = None
+        self._semaphore = None
+        self._available = None  # Nombre de jobs prêts dans la file
+        self._handler = None
+        self._ready = threading.Event()
+        self._in_flight = 0
+        self._waiting = 0
+        # Un seul thread pour écrire sur la radio: le port série n'est pas partagé
+        self._radio_executor = None
+
+    @property
+    def running(self):
+        return self.loop is not None and self.loop.is_running()
+
+    @property
+    def in_flight(self):
+        """Broadcasts en cours d'exécution (bornés par max_concurrency)"""
+        return self._in_flight
+
+    @property
+    def waiting(self):
+        """Broadcasts soumis en attente d'une place"""
+        return self._waiting
+
+    def start(self, handler=None):
+        """
+        Démarre la boucle et ses workers.
+
+        Args:
+            handler: Coroutine appelée pour chaque BroadcastJob retiré de la file
+        """
+        if self.running:
+            return
+        self._handler = handler
+        self._ready.clear()
+        self._radio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="btx-radio")
+        self._thread = threading.Thread(target=self._run, name="btx-broadcast", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Jobs restés en file lors d'un arrêt précédent
+        self._available = asyncio.Semaphore(len(self.queue))
+        if self._handler is not None:
+            for _ in range(self.max_concurrency):
+                self.loop.create_task(self._worker())
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+            self.loop = None
+
+    def stop(self, timeout=5):
+        """Arrête la boucle; les broadcasts encore en vol sont annulés"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._radio_executor is not None:
+            self._radio_executor.shutdown(wait=False)
+            self._radio_executor = None
+
+    def submit(self, coro):
+        """
+        Planifie une coroutine de broadcast depuis n'importe quel thread.
+
+        Returns:
+            concurrent.futures.Future du résultat
+        """
+        if not self.running:
+            coro.close()
+            raise RuntimeError("Moteur de broadcast non démarré")
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+    def spawn(self, coro):
+        """Planifie une tâche de fond, hors limite de concurrence"""
+        if not self.running:
+            coro.close()
+            raise RuntimeError("Moteur de broadcast non démarré")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def enqueue(self, job):
+        """
+        Place un BroadcastJob dans la file (depuis n'importe quel thread).
+
+        Returns:
+            Le job délesté si la file était pleine (le nouveau ou un job évincé), sinon None
+        """
+        if not self.running:
+            raise RuntimeError("Moteur de broadcast non démarré")
+        return self.queue.put(job)
+
+    def _wake_worker(self):
+        loop = self.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._available.release)
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self.queue.pop()
+            if job is None:
+                continue
+            try:
+                await self._limited(self._handler(job))
+            except Exception:
+                # Le handler journalise ses propres erreurs; un worker ne doit jamais mourir
+                pass
+
+    async def _limited(self, coro):
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            self._waiting -= 1
+            coro.close()
+            raise
+        self._waiting -= 1
+        self._in_flight += 1
+        try:
+            return await coro
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def run_radio(self, func, *args, **kwargs):
+        """Exécute un envoi radio bloquant (sendData) sans bloquer la boucle"""
+        return await self.loop.run_in_executor(self._radio_executor, lambda: func(*args, **kwargs))
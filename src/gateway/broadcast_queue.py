@@ -0,0 +1,122 @@
+"""
+File de broadcast bornée et prioritaire entre le réassemblage et les backends.
+
+Ordre de service: classe de protocole d'abord (BTX binaire, puis BTX texte, puis hex
+brut legacy), puis la plus petite vsize, puis l'ordre d'arrivée. Quand la file est
+pleine, le job le moins prioritaire est délesté: c'est soit le nouveau venu, soit
+le pire job déjà en file qu'il remplace.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from bitcoin_tx import txid_and_vsize
+
+# Classes de priorité (plus petit = servi en premier)
+PRIORITY_BTX_BINARY = 0   # PRIVATE_APP, protocole chunké binaire
+PRIORITY_BTX_TEXT = 1     # BTX:n/total:data (app Android)
+PRIORITY_RAW_HEX = 2      # Hex brut en messages texte (legacy)
+
+PRIORITY_NAMES = {
+    PRIORITY_BTX_BINARY: "BTX binaire",
+    PRIORITY_BTX_TEXT: "BTX texte",
+    PRIORITY_RAW_HEX: "hex brut",
+}
+
+_sequence = itertools.count()
+
+
+class BroadcastJob:
+    """Transaction complète en attente de broadcast"""
+    __slots__ = ("priority", "vsize", "seq", "tx_hex", "sender", "tx_id", "record", "txid", "enqueued_at",
+                 "journal_id", "journal_commit", "attempt", "corr")
+
+    def __init__(self, priority, tx_hex, sender, tx_id=None, record=None, txid=None, corr=None, vsize=None):
+        self.priority = priority
+        self.tx_hex = tx_hex
+        self.sender = sender
+        self.tx_id = tx_id          # ID mesh (protocole binaire) ou None (texte)
+        self.record = record
+        self.seq = next(_sequence)
+        self.enqueued_at = time.monotonic()
+        self.journal_id = None      # Entrée du journal durable (None si non journalisé)
+        self.journal_commit = None  # Future du commit de cette entrée
+        self.attempt = 0            # Nouveaux essais déjà faits après un échec transitoire
+        self.corr = corr            # Identifiant de corrélation (journal d'événements)
+        if txid is None or vsize is None:
+            # Un seul décodage si l'appelant ne les a pas déjà calculés
+            try:
+                computed_txid, vsize = txid_and_vsize(bytes.fromhex(tx_hex))
+                txid = txid or computed_txid
+            except ValueError:
+                vsize = len(tx_hex) // 2  # Hex invalide: le backend tranchera
+        self.txid = txid            # TXID Bitcoin (None si la TX est illisible)
+        self.vsize = vsize
+
+    @property
+    def sort_key(self):
+        return (self.priority, self.vsize, self.seq)
+
+    def __lt__(self, other):
+        return self.sort_key < other.sort_key
+
+
+class BroadcastQueue:
+    """
+    File prioritaire bornée, utilisable depuis n'importe quel thread.
+
+    Args:
+        maxsize: Nombre maximal de jobs en attente
+        on_available: Appelé (hors verrou) à chaque job ajouté sans délestage,
+            pour réveiller un worker
+    """
+    def __init__(self, maxsize=64, on_available=None):
+        self.maxsize = maxsize
+        self.on_available = on_available
+        self._heap = []
+        self._lock = threading.Lock()
+        self.shed_count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def put(self, job):
+        """
+        Ajoute un job. Retourne le job délesté (le nouveau ou un job évincé),
+        ou None si rien n'a été délesté.
+        """
+        with self._lock:
+            if len(self._heap) < self.maxsize:
+                heapq.heappush(self._heap, job)
+                shed = None
+            else:
+                # Pire job en file = plus grande clé (feuille du tas)
+                worst_index = max(range(len(self._heap)), key=lambda i: self._heap[i].sort_key)
+                worst = self._heap[worst_index]
+                if job.sort_key < worst.sort_key:
+                    self._heap[worst_index] = job
+                    heapq.heapify(self._heap)
+                    shed = worst
+                else:
+                    shed = job
+                self.shed_count += 1
+
+        if shed is None and self.on_available:
+            self.on_available()
+        return shed
+
+    def pop(self):
+        """Retire le job le plus prioritaire (None si vide)"""
+        with self._lock:
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)
+
+    def depth_by_priority(self):
+        with self._lock:
+            depth = {priority: 0 for priority in PRIORITY_NAMES}
+            for job in self._heap:
+                depth[job.priority] += 1
+            return depth
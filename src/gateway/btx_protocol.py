@@ -0,0 +1,86 @@
+"""
+Constantes et encodage du protocole BitcoinTxModule, partagés par le moteur
+headless et l'interface Tk.
+"""
+
+import struct
+
+# Constantes protocole BitcoinTxModule
+BTX_MSG_TX_START = 0x01
+BTX_MSG_TX_CHUNK = 0x02
+BTX_MSG_TX_END   = 0x03
+BTX_MSG_TX_ACK   = 0x04
+BTX_MSG_TX_ERROR = 0x05
+BTX_MSG_TX_QUEUED = 0x06  # Reçue et stockée: broadcast différé (gateway hors ligne)
+BTX_CHUNK_SIZE   = 180
+BTX_MAX_TX_SIZE  = 2048
+PRIVATE_APP_PORT = 256
+
+# Erreurs
+BTX_ERR_TOO_LARGE = 1
+BTX_ERR_TIMEOUT   = 2
+BTX_ERR_INVALID   = 3
+BTX_ERR_BROADCAST_FAIL = 4
+
+# APIs Bitcoin (clearnet et onion)
+BITCOIN_APIS = {
+    "Mempool.space": {
+        "clearnet": "https://mempool.space/api/tx",
+        "onion": "http://mempoolhqx4isw62xs7abwphsq7ldayuidyx2v2oethdhhj6mlo2r6ad.onion/api/tx",
+        "testnet": "https://mempool.space/testnet/api/tx"
+    },
+    "Blockstream": {
+        "clearnet": "https://blockstream.info/api/tx",
+        "onion": "http://explorerzydxu5ecjrkwceayqybizmpjjznk5izmitf2modhcusuqlid.onion/api/tx",
+        "testnet": "https://blockstream.info/testnet/api/tx"
+    },
+    "Bitcoin Core (local)": {
+        "clearnet": "http://127.0.0.1:8332",
+        "rpc": True
+    }
+}
+
+
+def encode_ack(tx_id):
+    """Message TX_ACK: type, tx_id"""
+    return struct.pack("<BB", BTX_MSG_TX_ACK, tx_id)
+
+
+def encode_error(tx_id, error_code):
+    """Message TX_ERROR: type, tx_id, code d'erreur"""
+    return struct.pack("<BBB", BTX_MSG_TX_ERROR, tx_id, error_code)
+
+
+def encode_queued(tx_id):
+    """Message TX_QUEUED: type, tx_id (l'ACK définitif suivra le broadcast)"""
+    return struct.pack("<BB", BTX_MSG_TX_QUEUED, tx_id)
+
+
+def is_hex_text(text):
+    """Vrai si text ne contient que des chiffres hexadécimaux (partie de TX en mode texte)"""
+    return all(c in '0123456789abcdefABCDEF' for c in text)
+
+
+# Numéros de nœud partagés par toutes les tables (un seul objet int par nœud)
+_nodes = {}
+
+
+def intern_node(node):
+    return _nodes.setdefault(node, node)
+
+
+def sender_node(packet):
+    """Numéro de nœud (int) de l'émetteur d'un paquet meshtastic, 0 si inconnu"""
+    node = packet.get("from")
+    if not isinstance(node, int):
+        from_id = packet.get("fromId") or ""
+        try:
+            node = int(from_id[1:], 16) if from_id.startswith("!") else 0
+        except ValueError:
+            node = 0
+    return intern_node(node)
+
+
+def node_label(node):
+    """Forme !xxxxxxxx d'un numéro de nœud, pour les journaux"""
+    return f"!{node:08x}"
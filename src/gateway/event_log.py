@@ -0,0 +1,96 @@
+"""
+Journal d'événements structuré (JSON lines), pour l'analyse après coup.
+
+Une ligne JSON par événement: paquet reçu, chunk stocké, réassemblage terminé,
+essai et résultat de broadcast, réponse envoyée... Chaque événement porte
+l'horodatage, le nœud émetteur et l'identifiant de corrélation ("corr") de la
+TX, attribué par le moteur à sa première trace et repris jusqu'à l'ACK.
+
+Les producteurs (thread lecteur meshtastic, boucle de broadcast) ne font que
+déposer un dict dans une file bornée: sérialisation et écriture se font par lots
+dans un thread dédié, avec rotation des fichiers par taille.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from batch_writer import drain_batches, stop_writer
+
+
+class EventLog:
+    """
+    Args:
+        path: Fichier JSON lines courant (les anciens deviennent path.1, path.2...)
+        max_bytes: Taille à partir de laquelle le fichier est tourné
+        backups: Nombre d'anciens fichiers conservés
+        queue_size: Événements en attente au maximum (au-delà, écartés et comptés)
+        log: Callback (message, tag) pour les erreurs d'écriture
+    """
+    def __init__(self, path, max_bytes=10_000_000, backups=5, queue_size=10000, log=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.log = log or (lambda message, tag="info": None)
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="btx-events", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=5):
+        """Écrit ce qui reste en file puis arrête le thread"""
+        if self._thread is not None:
+            stop_writer(self._queue, self._thread, timeout)
+            self._thread = None
+
+    def emit(self, event, **fields):
+        """Dépose un événement (jamais bloquant: file pleine = événement écarté)"""
+        try:
+            self._queue.put_nowait({"ts": time.time(), "event": event, **fields})
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stream = None
+
+        def write(batch):
+            nonlocal stream
+            stream = self._write(stream, batch)
+
+        try:
+            stream = open(self.path, "a", encoding="utf-8")
+            drain_batches(self._queue, write)
+        except OSError as e:
+            self.log(f"❌ Journal d'événements: écriture impossible ({e})", "error")
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def _write(self, stream, batch):
+        """Écrit un lot (un seul write), tourne le fichier si besoin; retourne le flux courant"""
+        data = "".join(json.dumps(event, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+                       for event in batch)
+        if stream.tell() and stream.tell() + len(data) > self.max_bytes:
+            stream.close()
+            self._rotate()
+            stream = open(self.path, "a", encoding="utf-8")
+        stream.write(data)
+        stream.flush()
+        return stream
+
+    def _rotate(self):
+        """path -> path.1 -> path.2 ... (le plus ancien au-delà de backups est supprimé)"""
+        if self.backups < 1:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
@@ -0,0 +1,77 @@
+"""
+Échéances des réceptions en cours (TX binaires, buffers texte), sur horloge monotone.
+
+Un tas binaire trié par échéance: seules les entrées échues sont visitées, quel que
+soit le nombre de sessions ouvertes. Replanifier une clé pousse simplement une
+nouvelle entrée; l'ancienne, périmée, est ignorée quand elle remonte en tête.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class ExpiryTimer:
+    def __init__(self):
+        self._heap = []        # (échéance, n°, clé)
+        self._deadlines = {}   # clé -> échéance en vigueur
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def schedule(self, key, delay):
+        """(Re)planifie l'expiration de key dans delay secondes"""
+        deadline = time.monotonic() + delay
+        with self._cond:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._seq), key))
+            # Trop d'entrées périmées (clés replanifiées à chaque message): reconstruire
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(d, next(self._seq), k) for k, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            if self._heap[0][0] == deadline:
+                # Nouvelle échéance la plus proche: réveiller le thread de nettoyage
+                self._cond.notify_all()
+
+    def cancel(self, key):
+        with self._cond:
+            self._deadlines.pop(key, None)
+
+    def pop_expired(self, now=None):
+        """Retire et retourne les clés échues, de la plus ancienne à la plus récente"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._cond:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                deadline, _, key = heapq.heappop(heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    expired.append(key)
+        return expired
+
+    def next_deadline(self):
+        """Échéance monotone la plus proche (None si rien n'est planifié)"""
+        with self._cond:
+            while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def wait(self, max_wait):
+        """Attend la prochaine échéance, une échéance plus proche, wake() ou max_wait secondes"""
+        with self._cond:
+            timeout = max_wait
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - time.monotonic())
+            if timeout > 0:
+                self._cond.wait(timeout)
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
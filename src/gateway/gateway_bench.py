@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks des chemins critiques du protocole et des transactions:
+réassemblage binaire, réception binaire/BTX/hex par le moteur, validation hex,
+détection de fin de TX (TxStreamParser, tx_layout), TXID et encodage des réponses,
+sur des tailles réalistes (P2WPKH 1 entrée 2 sorties jusqu'à BTX_MAX_TX_SIZE).
+
+    cd src/gateway
+    python -m gateway_bench                             # tableau
+    python -m gateway_bench --json baseline.json        # résultats en JSON
+    python -m gateway_bench --compare baseline.json     # régressions (code retour 1)
+    python -m gateway_bench -k receive                  # cas dont le nom contient "receive"
+    python -m gateway_bench --txid -n 20000             # TXID: anciennes méthodes contre les nouvelles
+"""
+
+import argparse
+import hashlib
+import json
+import platform
+import random
+import sys
+import time
+
+from bitcoin_tx import (
+    calculate_txid, hash_transactions, strip_witness, tx_hashes, tx_layout, tx_vsize, txid_and_vsize,
+)
+from btx_protocol import (
+    BTX_CHUNK_SIZE, BTX_ERR_BROADCAST_FAIL, BTX_MAX_TX_SIZE, encode_ack, encode_error, encode_queued, is_hex_text,
+)
+from reassembly import PendingTransaction
+from tx_stream import TxStreamParser
+from tx_generator import TxGenerator, build_transaction
+
+# Profils de taille: nom -> (segwit, entrées, sorties, taille visée ou None)
+SIZE_PROFILES = {
+    "p2wpkh_1in_2out": (True, 1, 2, None),       # ~222 octets, le cas courant
+    "p2pkh_1in_2out": (False, 1, 2, None),       # ~226 octets
+    "p2wpkh_3in_2out": (True, 3, 2, None),       # ~440 octets
+    "p2pkh_5in_3out": (False, 5, 3, None),       # ~850 octets
+    "max_size": (False, 13, 2, BTX_MAX_TX_SIZE), # complété par un OP_RETURN jusqu'à la limite
+}
+
+# Écart toléré avant de signaler une régression (µs par opération)
+DEFAULT_THRESHOLD = 0.10
+
+# Nœud émetteur fictif des cas passant par le moteur
+_BENCH_NODE = 0x42424242
+
+
+def sample_transactions(count, seed=0):
+    """TX synthétiques de structure valide (legacy et SegWit, 1-4 entrées, 1-3 sorties)"""
+    return list(TxGenerator(seed).stream_bytes(count))
+
+
+def legacy_txid(tx_hex):
+    """Ancienne implémentation de calculate_txid (référence)"""
+    tx_bytes = bytes.fromhex(tx_hex)
+    if len(tx_bytes) > 6 and tx_bytes[4] == 0x00 and tx_bytes[5] == 0x01:
+        tx_bytes = strip_witness(tx_bytes)
+    return hashlib.sha256(hashlib.sha256(tx_bytes).digest()).digest()[::-1].hex()
+
+
+def legacy_hashes(tx):
+    """(txid, wtxid) avec l'ancienne méthode: référence de tx_hashes (hex ou bytes)"""
+    tx_bytes = bytes.fromhex(tx) if isinstance(tx, str) else tx
+    wtxid = hashlib.sha256(hashlib.sha256(tx_bytes).digest()).digest()[::-1].hex()
+    if len(tx_bytes) > 6 and tx_bytes[4] == 0x00 and tx_bytes[5] == 0x01:
+        stripped = strip_witness(tx_bytes)
+        return hashlib.sha256(hashlib.sha256(stripped).digest()).digest()[::-1].hex(), wtxid
+    return wtxid, wtxid
+
+
+def two_pass_txid_vsize(tx_hex):
+    """Ancien chemin du moteur: vsize à la création du job, puis calculate_txid à la mise en file"""
+    vsize = tx_vsize(bytes.fromhex(tx_hex))
+    return calculate_txid(tx_hex), vsize
+
+
+# Cas --txid -> cas de référence (même travail, ancienne méthode)
+TXID_REFERENCES = {
+    "calculate_txid (hex)": "strip_witness (hex)",
+    "tx_hashes (hex)": "strip_witness + wtxid (hex)",
+    "hash_transactions (bytes)": "strip_witness + wtxid (bytes)",
+    "txid_and_vsize (hex)": "txid + vsize, 2 passes (hex)",
+}
+
+
+def _timed(func, items, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_txid(count=10000, repeat=3, seed=0):
+    """
+    Returns:
+        dict nom -> transactions/s (meilleur de repeat passes); TXID_REFERENCES
+        associe chaque cas à sa référence
+    """
+    txs = sample_transactions(count, seed)
+    hexes = [tx.hex() for tx in txs]
+    for tx_hex in hexes[:100]:
+        assert legacy_txid(tx_hex) == calculate_txid(tx_hex) == tx_hashes(tx_hex)[0], "TXID divergent"
+        assert legacy_hashes(tx_hex) == tx_hashes(tx_hex), "wTXID divergent"
+        assert two_pass_txid_vsize(tx_hex) == txid_and_vsize(bytes.fromhex(tx_hex)), "vsize divergente"
+
+    cases = {
+        "strip_witness (hex)": lambda items: [legacy_txid(h) for h in items],
+        "calculate_txid (hex)": lambda items: [calculate_txid(h) for h in items],
+        # txid + wtxid: deux SHA256d par TX SegWit, un seul par TX legacy
+        "strip_witness + wtxid (hex)": lambda items: [legacy_hashes(h) for h in items],
+        "tx_hashes (hex)": lambda items: [tx_hashes(h) for h in items],
+        "strip_witness + wtxid (bytes)": lambda items: [legacy_hashes(tx) for tx in items],
+        "hash_transactions (bytes)": lambda items: list(hash_transactions(items)),
+        "txid + vsize, 2 passes (hex)": lambda items: [two_pass_txid_vsize(h) for h in items],
+        "txid_and_vsize (hex)": lambda items: [txid_and_vsize(bytes.fromhex(h)) for h in items],
+    }
+    inputs = {"strip_witness + wtxid (bytes)": txs, "hash_transactions (bytes)": txs}
+    return {name: count / _timed(func, inputs.get(name, hexes), repeat) for name, func in cases.items()}
+
+
+def profile_transactions(profile, count, seed=0):
+    segwit, input_count, output_count, size = SIZE_PROFILES[profile]
+    rnd = random.Random(f"{seed}:{profile}")
+    return [build_transaction(rnd, segwit, input_count, output_count, size)[0] for _ in range(count)]
+
+
+# ----------------------------------------------------------------------
+# Cas de la suite: préparation (TX du profil) -> (fonction(items), items)
+# ----------------------------------------------------------------------
+
+def _chunks(tx):
+    return [tx[i:i + BTX_CHUNK_SIZE] for i in range(0, len(tx), BTX_CHUNK_SIZE)]
+
+
+def _case_reassembly(txs, engine):
+    def run(items):
+        for tx, chunks in items:
+            pending = PendingTransaction(0, len(tx), _BENCH_NODE)
+            for index, chunk in enumerate(chunks):
+                pending.add_chunk(index, chunk)
+            pending.get_data()
+    return run, [(tx, _chunks(tx)) for tx in txs]
+
+
+def _case_binary_receive(txs, engine):
+    """TX_START, TX_CHUNK..., TX_END par le moteur, jusqu'à la mise en file (exclue)"""
+    from mesh_sim import binary_payloads
+
+    def run(items):
+        for payloads in items:
+            engine.handle_tx_start(payloads[0], _BENCH_NODE)
+            for payload in payloads[1:-1]:
+                engine.handle_tx_chunk(payload, _BENCH_NODE)
+            engine.handle_tx_end(payloads[-1], _BENCH_NODE)
+    return run, [binary_payloads(tx, i % 256) for i, tx in enumerate(txs)]
+
+
+def _case_btx_receive(txs, engine):
+    """Messages "BTX:n/total:data" par handle_btx_chunk"""
+    from mesh_sim import btx_text_messages
+
+    def run(items):
+        for messages in items:
+            for message in messages:
+                engine.handle_btx_chunk(message, _BENCH_NODE)
+    return run, [btx_text_messages(tx) for tx in txs]
+
+
+def _case_hex_receive(txs, engine):
+    """Parties hex brut par handle_text_message (validation, TxStreamParser)"""
+    from mesh_sim import raw_hex_messages
+
+    def run(items):
+        for parts in items:
+            for part in parts:
+                engine.handle_text_message(part, _BENCH_NODE)
+    return run, [raw_hex_messages(tx) for tx in txs]
+
+
+def _case_hex_validation(txs, engine):
+    from mesh_sim import raw_hex_messages
+
+    def run(items):
+        for parts in items:
+            for part in parts:
+                is_hex_text(part)
+    return run, [raw_hex_messages(tx) for tx in txs]
+
+
+def _case_stream_parser(txs, engine):
+    """Détection de fin de TX en mode texte (remplace looks_like_complete_tx)"""
+    from mesh_sim import raw_hex_messages
+
+    def run(items):
+        for parts in items:
+            parser = TxStreamParser()
+            for part in parts:
+                parser.feed(part)
+    return run, [raw_hex_messages(tx) for tx in txs]
+
+
+def _case_tx_layout(txs, engine):
+    return (lambda items: [tx_layout(tx) for tx in items]), txs
+
+
+def _case_calculate_txid(txs, engine):
+    return (lambda items: [calculate_txid(h) for h in items]), [tx.hex() for tx in txs]
+
+
+def _case_tx_hashes(txs, engine):
+    return (lambda items: [tx_hashes(tx) for tx in items]), txs
+
+
+def _case_strip_witness(txs, engine):
+    return (lambda items: [strip_witness(tx) for tx in items]), [tx for tx in txs if tx[4] == 0]
+
+
+def _case_encode_replies(txs, engine):
+    """ACK + ERROR + QUEUED pour une TX"""
+    def run(items):
+        for tx_id in items:
+            encode_ack(tx_id)
+            encode_error(tx_id, BTX_ERR_BROADCAST_FAIL)
+            encode_queued(tx_id)
+    return run, [i % 256 for i in range(len(txs))]
+
+
+# nom -> (préparation, dépend de la taille de TX)
+BENCHMARKS = {
+    "reassembly": (_case_reassembly, True),
+    "binary_receive": (_case_binary_receive, True),
+    "btx_receive": (_case_btx_receive, True),
+    "hex_receive": (_case_hex_receive, True),
+    "hex_validation": (_case_hex_validation, True),
+    "stream_parser": (_case_stream_parser, True),
+    "tx_layout": (_case_tx_layout, True),
+    "calculate_txid": (_case_calculate_txid, True),
+    "tx_hashes": (_case_tx_hashes, True),
+    "strip_witness": (_case_strip_witness, True),
+    "encode_replies": (_case_encode_replies, False),
+}
+
+
+def _bench_engine():
+    """Moteur non démarré, mise en file neutralisée: seul le chemin de réception est mesuré"""
+    from gateway_config import GatewayConfig
+    from gateway_engine import GatewayEngine
+
+    engine = GatewayEngine(GatewayConfig(journal_path="", history_path="", event_log_path=""))
+    engine._enqueue = lambda job: None
+    return engine
+
+
+def run_suite(count=500, repeat=5, seed=0, pattern=""):
+    """
+    Returns:
+        dict: "meta" (environnement, paramètres) et "results": "cas/profil" ->
+        us_per_op (meilleur de repeat passes), ops_per_s, bytes (taille moyenne)
+    """
+    engine = _bench_engine()
+    profiles = {name: profile_transactions(name, count, seed) for name in SIZE_PROFILES}
+    results = {}
+    for bench, (prepare, sized) in BENCHMARKS.items():
+        for profile, txs in profiles.items() if sized else [("-", profiles["p2wpkh_1in_2out"])]:
+            name = f"{bench}/{profile}"
+            if pattern not in name:
+                continue
+            func, items = prepare(txs, engine)
+            if not items:
+                continue
+            seconds = _timed(func, items, repeat) / len(items)
+            results[name] = {
+                "us_per_op": seconds * 1e6,
+                "ops_per_s": 1 / seconds,
+                "bytes": sum(len(tx) for tx in txs) // len(txs) if sized else 0,
+            }
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "count": count,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns:
+        Liste de (cas, µs de référence, µs actuelles, rapport, régression), cas communs seulement
+    """
+    rows = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = result["us_per_op"] / reference["us_per_op"]
+        rows.append((name, reference["us_per_op"], result["us_per_op"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gateway_bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=500, help="Transactions par profil de taille")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Passes par cas (la meilleure est gardée)")
+    parser.add_argument("-k", "--filter", default="", help="Seulement les cas dont le nom contient ce texte")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="FICHIER", help="Écrit les résultats en JSON (- = sortie standard)")
+    parser.add_argument("--compare", metavar="REFERENCE", help="Compare à des résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Ralentissement toléré avant de signaler une régression (0.10 = 10 %%)")
+    parser.add_argument("--txid", action="store_true", help="Benchmark historique du calcul de TXID")
+    args = parser.parse_args(argv)
+
+    if args.txid:
+        results = bench_txid(args.count, args.repeat)
+        for name, rate in results.items():
+            reference = TXID_REFERENCES.get(name)
+            speedup = f"  x{rate / results[reference]:.2f} vs {reference}" if reference else ""
+            print(f"{name:<30} {rate:>12,.0f} tx/s{speedup}")
+        return 0
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Référence illisible: {e}", file=sys.stderr)
+            return 2
+
+    suite = run_suite(args.count, args.repeat, args.seed, args.filter)
+    if args.json == "-":
+        print(json.dumps(suite, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(suite, f, indent=2)
+        if baseline is None:
+            for name, result in suite["results"].items():
+                size = f"{result['bytes']:>5} o" if result["bytes"] else " " * 7
+                print(f"{name:<34} {size} {result['us_per_op']:>10.2f} µs {result['ops_per_s']:>12,.0f} /s")
+
+    if baseline is None:
+        return 0
+    rows = compare(suite, baseline, args.threshold)
+    regressions = [row for row in rows if row[4]]
+    output = sys.stderr if args.json == "-" else sys.stdout
+    for name, reference, current, ratio, regressed in rows:
+        flag = "  ⚠️ régression" if regressed else ""
+        print(f"{name:<34} {reference:>10.2f} -> {current:>10.2f} µs  x{ratio:.2f}{flag}", file=output)
+    print(f"{len(regressions)} régression(s) sur {len(rows)} cas (seuil +{args.threshold:.0%})", file=output)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
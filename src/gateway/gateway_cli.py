@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Gateway headless (sans Tk) - pour Raspberry Pi et serveurs sans écran.
+
+    cd src/gateway
+    python -m gateway_cli --config gateway.ini
+    python -m gateway_cli --port /dev/ttyACM0 --api Blockstream --tor
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from btx_protocol import BITCOIN_APIS
+from backends import BROADCAST_MODES
+from gateway_config import GatewayConfig, load_config
+from log_buffer import LOG_LEVELS
+
+logger = logging.getLogger("gateway")
+
+# Correspondance tags du moteur -> niveaux logging
+_TAG_LEVELS = {
+    "error": logging.ERROR,
+    "warning": logging.WARNING,
+    "debug": logging.DEBUG,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m gateway_cli",
+        description="Bitcoin Mesh Gateway headless: LoRa -> Bitcoin (Web/Tor)")
+    parser.add_argument("-c", "--config", help="Fichier INI (section [gateway])")
+    parser.add_argument("--port", help="Port série du T-Beam gateway")
+    parser.add_argument("--api", choices=list(BITCOIN_APIS.keys()), help="API de broadcast")
+    parser.add_argument("--network", choices=["mainnet", "testnet"])
+    parser.add_argument("--mode", dest="broadcast_mode", choices=list(BROADCAST_MODES),
+                        help="single, race (premier succès) ou hedged (couverture au p95)")
+    parser.add_argument("--backends", help="Backends des modes race/hedged, séparés par des virgules")
+    parser.add_argument("--tor", action="store_true", default=None, help="Broadcast via Tor")
+    parser.add_argument("--tor-host")
+    parser.add_argument("--tor-port", type=int)
+    parser.add_argument("--rpc-user")
+    parser.add_argument("--rpc-pass")
+    parser.add_argument("--log-level", choices=list(LOG_LEVELS),
+                        help="Niveau des messages du moteur (debug: dump de chaque paquet)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Affiche aussi les messages info")
+    return parser
+
+
+def config_from_args(args):
+    """Fichier de configuration puis surcharges de la ligne de commande"""
+    config = load_config(args.config) if args.config else GatewayConfig()
+    for name in ("port", "api", "network", "broadcast_mode", "backends",
+                 "tor", "tor_host", "tor_port", "rpc_user", "rpc_pass", "log_level"):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(config, name, value)
+    config.validate()
+    return config
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="[%(asctime)s] %(message)s", datefmt="%H:%M:%S")
+
+    try:
+        config = config_from_args(args)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Configuration invalide: {e}", file=sys.stderr)
+        return 2
+    if config.log_level == "debug":
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    # Import tardif: le moteur installe/charge meshtastic et requests
+    from gateway_engine import GatewayEngine, GatewayObserver
+
+    class ConsoleObserver(GatewayObserver):
+        def on_log(self, message, tag):
+            logger.log(_TAG_LEVELS.get(tag, logging.INFO), message)
+
+    engine = GatewayEngine(config)
+    engine.add_observer(ConsoleObserver())
+
+    if not config.port:
+        import serial.tools.list_ports
+        ports = [p.device for p in serial.tools.list_ports.comports()]
+        if not ports:
+            print("Aucun port série détecté (utilisez --port)", file=sys.stderr)
+            return 1
+        config.port = ports[0]
+
+    if config.tor:
+        try:
+            engine.setup_tor()
+        except Exception:
+            # Ne jamais retomber silencieusement sur le clearnet
+            return 1
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    engine.start()
+    try:
+        engine.connect_mesh()
+    except Exception as e:
+        logger.error(f"❌ Erreur connexion mesh: {e}")
+        engine.stop()
+        return 1
+
+    stop.wait()
+    engine.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
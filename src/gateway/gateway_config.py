@@ -0,0 +1,149 @@
+"""
+Configuration de la gateway - fichier INI (section [gateway]) + valeurs par défaut
+"""
+
+import configparser
+import os
+from dataclasses import dataclass, fields
+
+from btx_protocol import BITCOIN_APIS
+from backends import BROADCAST_MODES
+from log_buffer import LOG_LEVELS
+
+
+# Chemins de fichiers: relatifs au dossier du fichier INI qui les déclare
+PATH_FIELDS = ("journal_path", "history_path", "event_log_path", "trace_path", "capture_path")
+
+# Journal des broadcasts d'un fichier INI qui ne dit rien de journal_path: à côté de lui
+DEFAULT_JOURNAL_FILE = "gateway_journal.db"
+
+
+@dataclass
+class GatewayConfig:
+    """Paramètres du moteur, indépendants de toute interface graphique"""
+    port: str = ""                      # Port série du T-Beam (vide = premier port détecté)
+    api: str = "Mempool.space"          # Clé de BITCOIN_APIS (mode single)
+    broadcast_mode: str = "single"      # single | race | hedged
+    backends: str = "Mempool.space,Blockstream"  # Backends des modes race/hedged, par ordre de préférence
+    hedge_delay: float = 2.0            # Délai avant couverture tant que le p95 est inconnu (s)
+    breaker_failures: int = 3           # Échecs consécutifs avant d'écarter un backend
+    breaker_cooldown: float = 60.0      # Délai avant de re-sonder un backend écarté (s)
+    probe_interval: float = 120.0       # Sonde de fond d'un backend sans trafic (s)
+    network: str = "mainnet"            # mainnet | testnet
+    tor: bool = False
+    tor_host: str = "127.0.0.1"
+    tor_port: int = 9050
+    rpc_user: str = ""
+    rpc_pass: str = ""
+    tx_timeout: float = 30.0            # Expiration d'une TX binaire incomplète (s)
+    text_buffer_timeout: float = 60.0   # Expiration d'un buffer texte/BTX (s)
+    cleanup_interval: float = 5.0       # Attente max. du thread d'expiration entre deux échéances (s)
+    broadcast_timeout: float = 30.0     # Délai max d'un appel API/RPC (s)
+    broadcast_retries: int = 4          # Nouveaux essais après un échec transitoire (0 = aucun)
+    retry_base_delay: float = 2.0       # Délai avant le 1er nouvel essai, doublé ensuite (s)
+    retry_max_delay: float = 60.0       # Plafond du délai entre deux essais (s)
+    store_forward: bool = True          # Hors ligne: garder les TX (TX_QUEUED) au lieu d'échouer
+    store_forward_max: int = 500        # TX gardées au maximum pendant une coupure
+    flush_rate: float = 1.0             # Débit de renvoi au retour de la connectivité (TX/s)
+    connectivity_check: float = 2.0     # Période de vérification de la connectivité (s)
+    max_concurrent_broadcasts: int = 16 # Requêtes de broadcast simultanées (= workers)
+    broadcast_queue_size: int = 64      # TX complètes en attente avant délestage
+    log_level: str = "info"             # debug | info | warning | error (debug: dump de chaque paquet)
+    journal_path: str = ""              # Journal SQLite des broadcasts (vide = désactivé; voir load_config)
+    seen_packets_size: int = 1024       # Paquets (from, id) récents mémorisés (copies relayées)
+    seen_cache_size: int = 4096         # TXID déjà broadcastés/refusés mémorisés (doublons)
+    seen_cache_ttl: float = 3600.0      # Durée de vie d'un TXID mémorisé (s)
+    history_path: str = ""              # Historique SQLite des TX (vide = en mémoire, page courante)
+    history_retention_days: float = 30.0  # Entrées plus anciennes purgées au démarrage (0 = jamais)
+    metrics_port: int = 0               # Port HTTP des métriques Prometheus (0 = désactivé)
+    metrics_host: str = "127.0.0.1"     # Adresse d'écoute des métriques
+    trace_recent: int = 200             # Traces de latence terminées gardées pour l'export
+    trace_path: str = ""                # Export JSON des traces à l'arrêt (vide = aucun)
+    event_log_path: str = ""            # Événements JSON lines (vide = désactivé)
+    event_log_max_bytes: int = 10_000_000  # Taille avant rotation du fichier d'événements
+    event_log_backups: int = 5          # Anciens fichiers d'événements conservés
+    capture_path: str = ""              # Capture binaire des paquets reçus, pour relecture (vide = désactivée)
+
+    def validate(self):
+        """Lève ValueError si la configuration est incohérente"""
+        if self.api not in BITCOIN_APIS:
+            raise ValueError(f"API inconnue: {self.api} (choix: {', '.join(BITCOIN_APIS)})")
+        if self.broadcast_mode not in BROADCAST_MODES:
+            raise ValueError(f"Mode de broadcast inconnu: {self.broadcast_mode} (choix: {', '.join(BROADCAST_MODES)})")
+        for name in self.backend_names():
+            if name not in BITCOIN_APIS:
+                raise ValueError(f"Backend inconnu: {name} (choix: {', '.join(BITCOIN_APIS)})")
+        if self.log_level not in LOG_LEVELS:
+            raise ValueError(f"Niveau de log inconnu: {self.log_level} (choix: {', '.join(LOG_LEVELS)})")
+        if self.network not in ("mainnet", "testnet"):
+            raise ValueError(f"Réseau inconnu: {self.network}")
+        if not 0 < self.tor_port < 65536:
+            raise ValueError(f"Port Tor invalide: {self.tor_port}")
+        if self.max_concurrent_broadcasts < 1:
+            raise ValueError("max_concurrent_broadcasts doit être >= 1")
+        if self.broadcast_queue_size < 1:
+            raise ValueError("broadcast_queue_size doit être >= 1")
+        if self.broadcast_retries < 0:
+            raise ValueError("broadcast_retries doit être >= 0")
+        if self.store_forward_max < 1:
+            raise ValueError("store_forward_max doit être >= 1")
+        if self.flush_rate <= 0:
+            raise ValueError("flush_rate doit être > 0")
+        if self.seen_packets_size < 1:
+            raise ValueError("seen_packets_size doit être >= 1")
+        if self.seen_cache_size < 1:
+            raise ValueError("seen_cache_size doit être >= 1")
+        if not 0 <= self.metrics_port < 65536:
+            raise ValueError(f"Port de métriques invalide: {self.metrics_port}")
+        if self.trace_recent < 1:
+            raise ValueError("trace_recent doit être >= 1")
+        if self.history_retention_days < 0:
+            raise ValueError("history_retention_days doit être >= 0")
+        if self.event_log_max_bytes < 1:
+            raise ValueError("event_log_max_bytes doit être >= 1")
+        if self.event_log_backups < 0:
+            raise ValueError("event_log_backups doit être >= 0")
+
+    def backend_names(self):
+        """Liste ordonnée des backends des modes race/hedged"""
+        return [name.strip() for name in self.backends.split(",") if name.strip()]
+
+
+def _coerce(section, name, default):
+    """Lit une option en respectant le type de la valeur par défaut"""
+    if isinstance(default, bool):
+        return section.getboolean(name)
+    if isinstance(default, int):
+        return section.getint(name)
+    if isinstance(default, float):
+        return section.getfloat(name)
+    return section.get(name)
+
+
+def load_config(path):
+    """
+    Charge un fichier INI et retourne un GatewayConfig validé.
+
+    Les chemins relatifs partent du dossier du fichier. Sans option journal_path, le
+    journal des broadcasts est DEFAULT_JOURNAL_FILE dans ce dossier ("journal_path ="
+    le désactive explicitement).
+    """
+    parser = configparser.ConfigParser()
+    if not parser.read(path, encoding="utf-8"):
+        raise FileNotFoundError(f"Fichier de configuration introuvable: {path}")
+
+    base = os.path.dirname(os.path.abspath(path))
+    config = GatewayConfig(journal_path=DEFAULT_JOURNAL_FILE)
+    if parser.has_section("gateway"):
+        section = parser["gateway"]
+        for field in fields(GatewayConfig):
+            if field.name in section:
+                value = _coerce(section, field.name, getattr(config, field.name))
+                setattr(config, field.name, value)
+    for name in PATH_FIELDS:
+        value = getattr(config, name)
+        if value:
+            setattr(config, name, os.path.join(base, os.path.expanduser(value)))
+
+    config.validate()
+    return config
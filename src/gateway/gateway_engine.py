@@ -0,0 +1,1200 @@
+#!/usr/bin/env python3
+"""
+Moteur de la gateway, sans interface graphique.
+
+Réassemble les transactions reçues du mesh, les broadcast sur Bitcoin et renvoie
+ACK/ERROR aux clients. L'interface Tk (bitcoin_mesh_gateway.py) et le mode headless
+(gateway_cli.py) ne sont que des observateurs de ce moteur.
+"""
+
+import asyncio
+import itertools
+import threading
+from collections import deque
+import struct
+import time
+
+try:
+    import meshtastic
+    import meshtastic.serial_interface
+    from pubsub import pub
+    import requests
+except ImportError:
+    import subprocess
+    subprocess.check_call(["pip", "install", "meshtastic", "pypubsub", "requests", "pyserial", "pysocks"])
+    import meshtastic
+    import meshtastic.serial_interface
+    from pubsub import pub
+    import requests
+
+# Essayer d'importer le support SOCKS pour Tor
+try:
+    import socks  # noqa: F401 - requis par requests pour socks5h://
+    TOR_AVAILABLE = True
+except ImportError:
+    TOR_AVAILABLE = False
+
+from btx_protocol import (
+    BTX_MSG_TX_START, BTX_MSG_TX_CHUNK, BTX_MSG_TX_END,
+    BTX_MAX_TX_SIZE, PRIVATE_APP_PORT,
+    BTX_ERR_TOO_LARGE, BTX_ERR_TIMEOUT, BTX_ERR_INVALID, BTX_ERR_BROADCAST_FAIL,
+    BITCOIN_APIS, encode_ack, encode_error, encode_queued, is_hex_text, sender_node, node_label, intern_node,
+)
+from gateway_config import GatewayConfig
+from reassembly import PendingTransaction, ReassemblyTable, CHUNK_DUPLICATE
+from expiry import ExpiryTimer
+from tx_stream import TxStreamParser
+from broadcast_engine import BroadcastEngine
+from broadcast_queue import (
+    BroadcastJob, PRIORITY_BTX_BINARY, PRIORITY_BTX_TEXT, PRIORITY_RAW_HEX, PRIORITY_NAMES,
+)
+from backends import (
+    BackendRegistry, TxRejected, backoff_delay, failure_kind, is_transient,
+    broadcast_single, broadcast_race, broadcast_hedged,
+)
+from bitcoin_tx import txid_and_vsize
+from journal import BroadcastJournal
+from event_log import EventLog
+from packet_capture import PacketRecorder
+from stats import GatewayStats
+from history import HistoryStore
+from metrics import MetricsServer
+from tracing import Tracer
+from log_buffer import LOG_DEBUG, LOG_INFO, LOG_LEVELS, tag_level
+from seen_cache import SeenPacketFilter, SeenTxCache, SEEN_BROADCAST, SEEN_REJECTED, SEEN_IN_FLIGHT
+
+# Statuts d'une transaction dans l'historique
+TX_STATUS_PENDING = "pending"
+TX_STATUS_BROADCAST = "broadcast"
+TX_STATUS_FAILED = "failed"
+TX_STATUS_QUEUED = "queued"      # Gardée localement (store-and-forward), broadcast différé
+
+# Lectures alternatives d'un buffer hex suivies au plus (parties en 01000000/02000000)
+MAX_TEXT_CANDIDATES = 3
+
+
+class TxRecord:
+    """Entrée de l'historique des transactions transmise aux observateurs"""
+    def __init__(self, key, mesh_id, size, sender=None, tx_id=None):
+        self.key = key              # Identifiant unique dans cette session
+        self.mesh_id = mesh_id      # "#12" (binaire) ou "TXT (!abcd)" (texte)
+        self.size = size            # Octets
+        self.sender = sender        # Nœud émetteur
+        self.tx_id = tx_id          # ID mesh (protocole binaire) ou None
+        self.txid = None            # TXID Bitcoin calculé (None si illisible)
+        self.history_id = None      # Entrée de l'historique persistant
+        self.time = time.time()
+        self.status = TX_STATUS_PENDING
+        self.btc_txid = ""          # TXID ou message d'erreur
+        self.backend = ""           # Backend qui a accepté la TX
+        self.latency = None         # Durée du broadcast (s)
+
+
+class GatewayObserver:
+    """
+    Observateur optionnel du moteur (GUI, console...).
+
+    Les méthodes sont appelées depuis les threads du moteur (lecteur meshtastic,
+    broadcast, nettoyage): une GUI doit re-planifier le travail sur son propre thread.
+    """
+    def on_log(self, message, tag):
+        pass
+
+    def on_mesh_status(self, connected, detail):
+        pass
+
+    def on_btc_status(self, text, ok):
+        pass
+
+    def on_tx_added(self, record):
+        pass
+
+    def on_tx_updated(self, record):
+        pass
+
+    def on_stats_changed(self):
+        pass
+
+
+class GatewayEngine:
+    def __init__(self, config=None):
+        self.config = config or GatewayConfig()
+
+        self.interface = None
+        self.connected = False
+        self.pending_txs = ReassemblyTable()  # (nœud, tx_id) -> PendingTransaction
+        self.text_buffers = {}  # nœud -> {"parser": TxStreamParser, "parts": n, "last_time": instant monotone}
+        self.btx_buffers = {}   # nœud -> {"chunks": {}, "total": n, "last_time": instant monotone}
+        self._buffers_lock = threading.Lock()  # buffers texte: thread meshtastic / expiration
+        # Échéances: ("tx", nœud, tx_id), ("text", nœud), ("btx", nœud)
+        self._expiry = ExpiryTimer()
+        self.tx_count = 0
+        self.stats = GatewayStats()
+        self.tracer = Tracer(self.config.trace_recent)
+        # Identifiants de corrélation: préfixe de session, uniques d'un redémarrage à l'autre
+        self._corr_session = format(int(time.time()), "x")
+        self._corr_ids = itertools.count(1)
+        self.registry = BackendRegistry(self.config, self.log)
+        self.broadcaster = BroadcastEngine(self.config.max_concurrent_broadcasts,
+                                           self.config.broadcast_queue_size)
+        self.journal = None
+        self._unreplayed = []  # Entrées du journal à rejouer dès que le mesh est connecté
+        self.history = None  # Historique persistant (None = en mémoire seulement)
+        self.metrics = None
+        self.events = None  # Journal d'événements JSON lines (None = désactivé)
+        self.capture = None  # Capture binaire des paquets reçus (None = désactivée)
+        # Store-and-forward: TX gardées pendant une coupure, renvoyées au retour du réseau
+        self.online = True
+        self._held = deque()
+        self._flush_task = None
+        self._connectivity_task = None
+        self.seen_packets = SeenPacketFilter(self.config.seen_packets_size)
+        self.seen_txs = SeenTxCache(self.config.seen_cache_size, self.config.seen_cache_ttl)
+
+        self._observers = []
+        self._stop_event = threading.Event()
+        self._cleanup_thread = None
+        self._probe_task = None
+
+    # ------------------------------------------------------------------
+    # Observateurs
+    # ------------------------------------------------------------------
+
+    def add_observer(self, observer):
+        self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def _notify(self, method, *args):
+        for observer in list(self._observers):
+            try:
+                getattr(observer, method)(*args)
+            except Exception:
+                pass
+
+    def log(self, message, tag="info"):
+        # Filtré ici, avant tout observateur (GUI, console)
+        if tag_level(tag) < LOG_LEVELS.get(self.config.log_level, LOG_INFO):
+            return
+        self._notify("on_log", message, tag)
+
+    @property
+    def debug_enabled(self):
+        return LOG_LEVELS.get(self.config.log_level, LOG_INFO) <= LOG_DEBUG
+
+    def _event(self, event, **fields):
+        """Événement structuré (voir event_log.py); sans effet si le journal est désactivé"""
+        if self.events is not None:
+            self.events.emit(event, **fields)
+
+    def _new_corr(self):
+        """Identifiant de corrélation d'une nouvelle TX (événements, traces)"""
+        return f"{self._corr_session}-{next(self._corr_ids)}"
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Démarre les tâches de fond (boucle de broadcast, nettoyage des TX expirées)"""
+        if self.config.event_log_path and self.events is None:
+            self.events = EventLog(self.config.event_log_path, self.config.event_log_max_bytes,
+                                   self.config.event_log_backups, log=self.log)
+            self.events.start()
+        if self.config.capture_path and self.capture is None:
+            self.capture = PacketRecorder(self.config.capture_path, log=self.log)
+            try:
+                self.capture.start()
+                self.log(f"⏺️ Capture des paquets dans {self.config.capture_path}", "info")
+            except (OSError, ValueError) as e:
+                self.capture = None
+                self.log(f"❌ Capture des paquets: {e}", "error")
+        if self.config.history_path and self.history is None:
+            self.history = HistoryStore(self.config.history_path, self.config.history_retention_days, self.log)
+            self.history.open()
+        if self.config.journal_path and self.journal is None:
+            self.journal = BroadcastJournal(self.config.journal_path, self.log)
+            self._unreplayed = self.journal.open()
+        elif self.journal is None:
+            self.log("⚠️ Journal des broadcasts désactivé (journal_path vide): les TX en cours "
+                     "seront perdues en cas d'arrêt brutal", "warning")
+        self.broadcaster.start(self._broadcast_job)
+        if self.interface is not None:
+            self._replay_journal()
+        elif self._unreplayed:
+            self.log(f"🔁 {len(self._unreplayed)} TX non terminée(s) dans le journal: "
+                     f"rejouée(s) à la connexion au mesh", "warning")
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = self.broadcaster.spawn(self.registry.probe_loop(self.config.probe_interval))
+        if self.config.store_forward and (self._connectivity_task is None or self._connectivity_task.done()):
+            self._connectivity_task = self.broadcaster.spawn(self._connectivity_loop())
+        if self.config.metrics_port and self.metrics is None:
+            self.metrics = MetricsServer(self, self.config.metrics_host, self.config.metrics_port)
+            try:
+                self.metrics.start()
+                self.log(f"📈 Métriques sur http://{self.config.metrics_host}:{self.config.metrics_port}/metrics", "info")
+            except OSError as e:
+                self.metrics = None
+                self.log(f"❌ Serveur de métriques: {e}", "error")
+        if self._cleanup_thread and self._cleanup_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, name="btx-cleanup", daemon=True)
+        self._cleanup_thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._expiry.wake()
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics = None
+        self.disconnect_mesh()
+        self.broadcaster.stop()
+        if self.journal is not None:
+            # Les broadcasts interrompus restent "pending": rejoués au prochain démarrage
+            self.journal.close()
+            self.journal = None
+        self._unreplayed = []
+        if self.config.trace_path:
+            try:
+                self.tracer.export_json(self.config.trace_path)
+            except OSError as e:
+                self.log(f"❌ Export des traces impossible: {e}", "error")
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+        if self.events is not None:
+            self.events.close()
+            self.events = None
+
+    # ------------------------------------------------------------------
+    # Connexion mesh
+    # ------------------------------------------------------------------
+
+    def connect_mesh(self, port=None, interface=None):
+        """
+        Se connecte au nœud gateway. Lève une exception en cas d'échec.
+
+        Args:
+            port: Port série (par défaut config.port)
+            interface: Interface meshtastic déjà ouverte (remplace le port série)
+        """
+        port = port or self.config.port
+        if interface is None:
+            if not port:
+                raise ValueError("Aucun port série configuré")
+            self.log(f"Connexion au mesh via {port}...", "info")
+            interface = meshtastic.serial_interface.SerialInterface(port)
+
+        self.interface = interface
+        pub.subscribe(self.on_mesh_receive, "meshtastic.receive")
+        self.connected = True
+
+        node_info = self.interface.getMyNodeInfo() or {}
+        name = node_info.get('user', {}).get('shortName', 'N/A')
+        self._notify("on_mesh_status", True, name)
+        self.log(f"✅ Connecté au nœud gateway: {name}", "success")
+        self.log("🎧 En écoute des transactions Bitcoin sur le mesh...", "info")
+        self._replay_journal()
+
+    def disconnect_mesh(self):
+        if not self.connected and not self.interface:
+            return
+        try:
+            if self.interface:
+                pub.unsubscribe(self.on_mesh_receive, "meshtastic.receive")
+                self.interface.close()
+        except Exception:
+            pass
+        self.interface = None
+
+        self.connected = False
+        self._notify("on_mesh_status", False, "")
+        self.log("Déconnecté du mesh", "info")
+
+    # ------------------------------------------------------------------
+    # Réseau Bitcoin
+    # ------------------------------------------------------------------
+
+    def use_clearnet(self):
+        self.config.tor = False
+        self._notify("on_btc_status", "₿ Bitcoin: Clearnet", True)
+        self.log("🌐 Mode clearnet activé", "info")
+
+    def setup_tor(self):
+        """Active le proxy Tor et vérifie qu'il fonctionne. Lève une exception en cas d'échec."""
+        if not TOR_AVAILABLE:
+            self.config.tor = False
+            raise RuntimeError("PySocks non installé: pip install pysocks")
+
+        try:
+            # Session locale, pour ce test seulement: les broadcasts passent par async_http
+            proxy = f'socks5h://{self.config.tor_host}:{self.config.tor_port}'
+            session = requests.Session()
+            session.proxies = {'http': proxy, 'https': proxy}
+
+            # Test connexion Tor
+            self.log("🧅 Test connexion Tor...", "info")
+            r = session.get("https://check.torproject.org/api/ip", timeout=30)
+            data = r.json()
+            if not data.get("IsTor"):
+                raise Exception("Pas connecté via Tor")
+
+            self.config.tor = True
+            self._notify("on_btc_status", "₿ Bitcoin: via Tor 🧅", True)
+            self.log(f"✅ Connecté via Tor (IP: {data.get('IP', 'N/A')})", "success")
+
+        except Exception as e:
+            self.log(f"❌ Erreur Tor: {e}", "error")
+            self.config.tor = False
+            raise
+
+    def test_bitcoin_connection(self):
+        """Sonde l'API Bitcoin configurée (bloquant). Retourne True si OK."""
+        api_name = self.config.api
+        ok, detail = self.broadcaster.submit(self.registry.probe(self.registry[api_name])).result()
+        if ok:
+            self.log(f"✅ {api_name} connecté, {detail}", "success")
+            mode = "🧅 Tor" if self.config.tor and "onion" in BITCOIN_APIS[api_name] else "🌐 Clearnet"
+            self._notify("on_btc_status", f"₿ {api_name}: {mode}", True)
+        else:
+            self.log(f"❌ Test échoué: {detail}", "error")
+            self._notify("on_btc_status", "₿ Bitcoin: Erreur", False)
+        return ok
+
+    # ------------------------------------------------------------------
+    # Réception mesh
+    # ------------------------------------------------------------------
+
+    def on_mesh_receive(self, packet, interface):
+        """Callback pour les messages reçus du mesh"""
+        try:
+            # Capture: tous les paquets, copies relayées comprises (relecture fidèle)
+            if self.capture is not None:
+                self.capture.record(packet)
+
+            # Copie relayée d'un paquet déjà traité: écartée avant tout décodage
+            sender = sender_node(packet)
+            if self.seen_packets.is_duplicate(sender, packet.get("id")):
+                self._event("packet_duplicate", sender=node_label(sender), packet_id=packet.get("id"))
+                return
+
+            decoded = packet.get("decoded", {})
+            portnum = decoded.get("portnum")
+            self.stats.incr("packets", portnum or "")
+            if self.events is not None:
+                self._event("packet_received", sender=node_label(sender), packet_id=packet.get("id"),
+                            portnum=portnum, bytes=len(decoded.get("payload") or b""),
+                            rx_snr=packet.get("rxSnr"), hops=packet.get("hopStart"))
+
+            # DEBUG - voir tous les paquets (log_level = debug uniquement)
+            if self.debug_enabled:
+                self._dump_packet(decoded, portnum, sender)
+
+            # Mode PRIVATE_APP - protocole chunké BitcoinTx
+            if portnum == "PRIVATE_APP":
+                payload = decoded.get("payload", b"")
+
+                if len(payload) > 0:
+                    msg_type = payload[0]
+
+                    if msg_type == BTX_MSG_TX_START:
+                        self.handle_tx_start(payload, sender)
+                    elif msg_type == BTX_MSG_TX_CHUNK:
+                        self.handle_tx_chunk(payload, sender)
+                    elif msg_type == BTX_MSG_TX_END:
+                        self.handle_tx_end(payload, sender)
+
+            # Mode TEXT_MESSAGE - accepter aussi les messages texte (pour app smartphone)
+            elif portnum == "TEXT_MESSAGE_APP":
+                text = decoded.get("text", "")
+                if text:
+                    self.handle_text_message(text, sender)
+
+        except Exception as e:
+            self.log(f"Erreur parsing mesh: {e}", "error")
+
+    def _dump_packet(self, decoded, portnum, sender):
+        self.log(f"RECV portnum={portnum} from={node_label(sender)}", "debug")
+        if decoded:
+            txt = decoded.get('text', '')
+            pld = decoded.get('payload', None)
+            if txt:
+                self.log(f"  -> TEXT: {txt[:80]}...", "debug")
+            if pld:
+                if isinstance(pld, bytes):
+                    try:
+                        decoded_str = pld.decode('utf-8')
+                        self.log(f"  -> PAYLOAD(bytes decoded): {decoded_str[:80]}...", "debug")
+                    except UnicodeDecodeError:
+                        self.log(f"  -> PAYLOAD(raw bytes): {len(pld)} bytes", "debug")
+                else:
+                    self.log(f"  -> PAYLOAD: {str(pld)[:80]}", "debug")
+
+    def handle_text_message(self, text, sender):
+        """Traite un message texte - supporte format BTX:n/total:data et hex brut"""
+        text = text.strip()
+
+        # Ignorer les messages vides
+        if len(text) < 5:
+            return
+
+        # ============================================
+        # FORMAT BTX:n/total:data (app Android)
+        # ============================================
+        if text.startswith("BTX:"):
+            self.handle_btx_chunk(text, sender)
+            return
+
+        # ============================================
+        # FORMAT HEX BRUT (legacy)
+        # ============================================
+        # Nettoyer le texte (enlever espaces, 0x, etc.)
+        clean_hex = text.replace(" ", "").replace("0x", "").replace("\n", "").replace("\r", "")
+
+        # Commande spéciale: "RESET" pour vider le buffer
+        if text.upper() == "RESET":
+            with self._buffers_lock:
+                buffer = self.text_buffers.pop(sender, None)
+                self._expiry.cancel(("text", sender))
+            if buffer is not None:
+                self.log(f"🗑️ Buffer vidé pour {node_label(sender)}", "warning")
+            return
+
+        # Vérifier que c'est bien du hex
+        if not is_hex_text(clean_hex):
+            self.log(f"📨 Message texte de {node_label(sender)}: {text[:50]}...", "info")
+            return
+
+        # C'est du hex! (les buffers abandonnés sont retirés par le thread d'expiration)
+        with self._buffers_lock:
+            buffer = self.text_buffers.get(sender)
+
+            # Créer le buffer: chaque partie n'est décodée qu'une fois par le parseur
+            if buffer is None:
+                buffer = self._new_text_buffer(sender)
+
+            buffer["parts"] += 1
+            buffer["last_time"] = time.monotonic()
+            error = self._feed_text(buffer["parser"], clean_hex)
+
+            # Une partie qui commence par 01000000/02000000 peut ouvrir une nouvelle TX (fin
+            # de la précédente perdue) ou continuer la TX en cours (outpoint, montant): les
+            # deux lectures sont suivies jusqu'à ce que l'une se termine ou que l'autre échoue
+            candidates = buffer["candidates"]
+            if buffer["parts"] > 1 and clean_hex.startswith(("01000000", "02000000")):
+                candidates.append({"parser": TxStreamParser(), "parts": 0})
+                del candidates[:-MAX_TEXT_CANDIDATES]
+            for candidate in candidates:
+                candidate["parts"] += 1
+            candidates[:] = [c for c in candidates if self._feed_text(c["parser"], clean_hex) is None]
+
+            if not buffer["parser"].complete:
+                restart = next((c for c in candidates if c["parser"].complete), None)
+                if restart is None and error is not None and candidates:
+                    restart = candidates[0]
+                if restart is not None:
+                    self.log(f"🔄 Nouvelle TX détectée pour {node_label(sender)}, réinitialisation du buffer", "warning")
+                    self.tracer.finish(buffer["corr"], "invalid")
+                    self._event("reassembly_failed", corr=buffer["corr"], sender=node_label(sender),
+                                reason="nouvelle TX" + (f" ({error})" if error is not None else ""))
+                    buffer = self._new_text_buffer(sender, restart["parser"])
+                    buffer["parts"] = restart["parts"]
+                    buffer["last_time"] = time.monotonic()
+                    buffer["candidates"] = candidates[candidates.index(restart) + 1:]
+                    error = None
+
+            parser = buffer["parser"]
+            if error is not None:
+                del self.text_buffers[sender]
+                self._expiry.cancel(("text", sender))
+                self.log(f"❌ TX texte invalide de {node_label(sender)}: {error}", "error")
+                self.stats.incr("reassembly_failures", "invalid")
+                self.tracer.finish(buffer["corr"], "invalid")
+                self._event("reassembly_failed", corr=buffer["corr"], sender=node_label(sender),
+                            reason=str(error))
+                return
+
+            complete = parser.complete
+            if complete:
+                # Vider le buffer
+                del self.text_buffers[sender]
+                self._expiry.cancel(("text", sender))
+            else:
+                self._expiry.schedule(("text", sender), self.config.text_buffer_timeout)
+
+        self.log(f"📦 Partie {buffer['parts']} reçue de {node_label(sender)} ({len(clean_hex)} chars)", "info")
+        self.stats.incr("chunks", "hex")
+        self.tracer.mark(buffer["corr"], "last_chunk")
+        self._event("chunk_stored", corr=buffer["corr"], sender=node_label(sender), chunk=buffer["parts"],
+                    bytes=len(clean_hex) // 2, received=parser.received)
+        self.log(f"   Total accumulé: {parser.received * 2} chars ({parser.received} octets)", "info")
+
+        if complete:
+            self.log(f"✅ TX Bitcoin complète détectée! ({buffer['parts']} parties, {parser.size} octets, "
+                     f"TXID {parser.txid[:16]}...)", "success")
+
+            self.stats.incr("reassemblies", "hex")
+            self.tracer.mark(buffer["corr"], "reassembled")
+            self._event("reassembly_complete", corr=buffer["corr"], sender=node_label(sender),
+                        chunks=buffer["parts"], size=parser.size, txid=parser.txid)
+
+            # Broadcaster
+            self.broadcast_text_transaction(parser.hex(), sender, PRIORITY_RAW_HEX, parser.txid, buffer["corr"],
+                                            parser.vsize)
+        else:
+            self.log(f"   ⏳ En attente de plus de données...", "warning")
+
+    def _new_text_buffer(self, sender, parser=None):
+        """Buffer hex d'un émetteur (appelé sous _buffers_lock)"""
+        buffer = {"parser": parser or TxStreamParser(), "parts": 0, "corr": self._new_corr(), "candidates": []}
+        self.text_buffers[sender] = buffer
+        self.tracer.begin(buffer["corr"], "hex", node_label(sender))
+        return buffer
+
+    @staticmethod
+    def _feed_text(parser, clean_hex):
+        """Donne une partie au parseur; retourne l'erreur (ValueError) ou None"""
+        try:
+            parser.feed(clean_hex)
+        except ValueError as e:
+            return e
+        return None
+
+    def handle_btx_chunk(self, text, sender):
+        """Traite un message au format BTX:n/total:data"""
+        try:
+            # Parser BTX:n/total:data
+            parts = text.split(":", 3)
+            if len(parts) < 3:
+                self.log(f"❌ Format BTX invalide: {text[:30]}...", "error")
+                return
+
+            chunk_info = parts[1].split("/")
+            if len(chunk_info) != 2:
+                self.log(f"❌ Format chunk invalide: {parts[1]}", "error")
+                return
+
+            chunk_num = int(chunk_info[0])
+            total_chunks = int(chunk_info[1])
+            chunk_data = parts[2] + (":" + parts[3] if len(parts) > 3 else "")
+
+            self.log(f"📦 BTX chunk {chunk_num}/{total_chunks} de {node_label(sender)} ({len(chunk_data)} chars)", "info")
+
+            # Buffer spécifique pour les chunks BTX
+            with self._buffers_lock:
+                if sender not in self.btx_buffers:
+                    self.btx_buffers[sender] = {
+                        "chunks": {},
+                        "total": total_chunks,
+                        "last_time": time.monotonic(),
+                        "corr": self._new_corr(),
+                    }
+                    self.tracer.begin(self.btx_buffers[sender]["corr"], "btx", node_label(sender))
+
+                buffer = self.btx_buffers[sender]
+
+                # Reset si nouveau total (nouvelle TX)
+                if buffer["total"] != total_chunks:
+                    self.log(f"🔄 Nouvelle TX BTX détectée, reset buffer", "warning")
+                    buffer = {"chunks": {}, "total": total_chunks, "last_time": time.monotonic(),
+                              "corr": self._new_corr()}
+                    self.tracer.begin(buffer["corr"], "btx", node_label(sender))
+                    self.btx_buffers[sender] = buffer
+
+                buffer["chunks"][chunk_num] = chunk_data
+                buffer["last_time"] = time.monotonic()
+                self._expiry.schedule(("btx", sender), self.config.text_buffer_timeout)
+
+                received = len(buffer["chunks"])
+                self.log(f"   📊 Reçu: {received}/{total_chunks} chunks", "info")
+                self.stats.incr("chunks", "btx")
+                self.tracer.mark(buffer["corr"], "last_chunk")
+                self._event("chunk_stored", corr=buffer["corr"], sender=node_label(sender), chunk=chunk_num,
+                            total=total_chunks, bytes=len(chunk_data) // 2)
+
+                # Vérifier si on a tous les chunks
+                if received != total_chunks:
+                    return
+
+                # Assembler dans l'ordre
+                full_hex = ""
+                for i in range(1, total_chunks + 1):
+                    if i in buffer["chunks"]:
+                        full_hex += buffer["chunks"][i]
+                    else:
+                        self.log(f"❌ Chunk {i} manquant!", "error")
+                        self.stats.incr("reassembly_failures", "missing_chunk")
+                        self.tracer.finish(buffer["corr"], "invalid")
+                        self._event("reassembly_failed", corr=buffer["corr"], sender=node_label(sender),
+                                    reason=f"chunk {i} manquant")
+                        return
+
+                # Nettoyer
+                del self.btx_buffers[sender]
+                self._expiry.cancel(("btx", sender))
+
+            self.log(f"✅ TX BTX complète! {len(full_hex)} chars ({len(full_hex)//2} bytes)", "success")
+            self.stats.incr("reassemblies", "btx")
+            self.tracer.mark(buffer["corr"], "reassembled")
+            self._event("reassembly_complete", corr=buffer["corr"], sender=node_label(sender),
+                        chunks=total_chunks, size=len(full_hex) // 2)
+
+            # Broadcaster
+            self.broadcast_text_transaction(full_hex, sender, PRIORITY_BTX_TEXT, corr=buffer["corr"])
+
+        except Exception as e:
+            self.log(f"❌ Erreur parsing BTX: {e}", "error")
+
+    def handle_tx_start(self, payload, sender):
+        """Reçoit TX_START"""
+        if len(payload) >= 4:
+            tx_id = payload[1]
+            tx_size = struct.unpack("<H", payload[2:4])[0]
+
+            self.log(f"📥 TX_START reçu: ID={tx_id}, taille={tx_size} octets, de {node_label(sender)}", "warning")
+
+            if tx_size > BTX_MAX_TX_SIZE:
+                self.stats.incr("reassembly_failures", "too_large")
+                self._event("reassembly_failed", sender=node_label(sender), tx_id=tx_id, size=tx_size,
+                            reason="trop grande")
+                self.send_error(tx_id, BTX_ERR_TOO_LARGE, sender)
+                return
+
+            pending = PendingTransaction(tx_id, tx_size, sender)
+            pending.corr = self._new_corr()
+            self.tracer.begin(pending.corr, "binary", node_label(sender), tx_id)
+            self._event("tx_start", corr=pending.corr, sender=node_label(sender), tx_id=tx_id, size=tx_size,
+                        chunks=pending.expected_chunks)
+            previous = self.pending_txs.start(pending)
+            self._expiry.schedule(("tx", sender, tx_id), self.config.tx_timeout)
+            if previous is not None:
+                self.log(f"🔄 TX #{tx_id} de {node_label(sender)} redémarrée, réception précédente abandonnée", "warning")
+            self._notify("on_stats_changed")
+
+    def handle_tx_chunk(self, payload, sender):
+        """Reçoit TX_CHUNK"""
+        if len(payload) >= 3:
+            tx_id = payload[1]
+            chunk_idx = payload[2]
+            chunk_data = memoryview(payload)[3:]
+
+            try:
+                status = self.pending_txs.add_chunk(sender, tx_id, chunk_idx, chunk_data)
+            except ValueError as e:
+                self.log(f"❌ Chunk {chunk_idx + 1} de TX #{tx_id} rejeté: {e}", "error")
+                self.stats.incr("chunks_rejected", "binary")
+                self._event("chunk_rejected", corr=self._pending_corr(sender, tx_id), sender=node_label(sender),
+                            tx_id=tx_id, chunk=chunk_idx, reason=str(e))
+                return
+            if status == CHUNK_DUPLICATE:
+                self.log(f"  ♻️ Chunk {chunk_idx + 1} dupliqué ignoré", "info")
+            elif status is not None:
+                self.log(f"  📦 Chunk {chunk_idx + 1}: {len(chunk_data)} octets", "info")
+                self.stats.incr("chunks", "binary")
+                corr = self._pending_corr(sender, tx_id)
+                self.tracer.mark(corr, "first_chunk", first=True)
+                self.tracer.mark(corr, "last_chunk")
+                self._event("chunk_stored", corr=corr, sender=node_label(sender),
+                            tx_id=tx_id, chunk=chunk_idx, bytes=len(chunk_data))
+
+    def _pending_corr(self, sender, tx_id):
+        pending = self.pending_txs.get(sender, tx_id)
+        return pending.corr if pending is not None else None
+
+    def handle_tx_end(self, payload, sender):
+        """Reçoit TX_END - transaction complète, la broadcaster"""
+        if len(payload) >= 2:
+            tx_id = payload[1]
+
+            pending = self.pending_txs.pop(sender, tx_id)
+            self._expiry.cancel(("tx", sender, tx_id))
+            if pending is None:
+                self.log(f"❌ TX_END pour TX inconnue #{tx_id} de {node_label(sender)}", "error")
+                return
+
+            if not pending.is_complete():
+                self.log(f"❌ TX #{tx_id} incomplète ({pending.received_count}/{pending.expected_chunks} chunks)", "error")
+                self.stats.incr("reassembly_failures", "incomplete")
+                self.tracer.finish(pending.corr, "invalid")
+                self._event("reassembly_failed", corr=pending.corr, sender=node_label(sender), tx_id=tx_id,
+                            reason=f"incomplète ({pending.received_count}/{pending.expected_chunks})")
+                self.send_error(tx_id, BTX_ERR_INVALID, sender, pending.corr)
+                self._notify("on_stats_changed")
+                return
+
+            # Récupérer la transaction
+            tx_bytes = pending.get_data()
+            tx_hex = tx_bytes.hex()
+
+            self.log(f"✅ TX #{tx_id} complète: {len(tx_bytes)} octets", "success")
+            self.stats.incr("reassemblies", "binary")
+            self.tracer.mark(pending.corr, "reassembled")
+            self._event("reassembly_complete", corr=pending.corr, sender=node_label(sender), tx_id=tx_id,
+                        chunks=pending.expected_chunks, size=len(tx_bytes),
+                        duration=round(time.monotonic() - pending.start_time, 3))
+
+            # Ajouter à l'historique
+            record = self._add_record(f"#{tx_id}", len(tx_bytes), sender, tx_id)
+            self._notify("on_stats_changed")
+
+            # Broadcaster sur Bitcoin (TXID et vsize calculés une fois, depuis les octets réassemblés)
+            txid, vsize = txid_and_vsize(tx_bytes)
+            self._enqueue(BroadcastJob(PRIORITY_BTX_BINARY, tx_hex, sender, tx_id, record, txid, pending.corr,
+                                       vsize))
+
+    # ------------------------------------------------------------------
+    # Broadcast
+    # ------------------------------------------------------------------
+
+    def _add_record(self, mesh_id, size, sender=None, tx_id=None):
+        self.tx_count += 1
+        record = TxRecord(self.tx_count, mesh_id, size, sender, tx_id)
+        self.stats.tx_added(record.status, size)
+        if self.history is not None:
+            self.history.add(record)
+        self._notify("on_tx_added", record)
+        return record
+
+    def _finish_record(self, record, status, btc_txid, result=None):
+        previous = record.status
+        record.status = status
+        record.btc_txid = btc_txid
+        if result is not None:
+            record.backend = result.backend
+            record.latency = result.latency
+            record.txid = result.txid
+        if self.history is not None:
+            self.history.update(record)
+        self.stats.tx_transition(previous, status, record.size,
+                                 result.backend if result is not None and status == TX_STATUS_BROADCAST else None)
+        self._notify("on_tx_updated", record)
+        self._notify("on_stats_changed")
+
+    def broadcast_text_transaction(self, tx_hex, sender, priority=PRIORITY_RAW_HEX, txid=None, corr=None, vsize=None):
+        """Broadcast une transaction reçue par message texte"""
+        # Ajouter à l'historique
+        record = self._add_record(f"TXT ({node_label(sender)})", len(tx_hex) // 2, sender)
+
+        # Broadcast en arrière-plan
+        self._enqueue(BroadcastJob(priority, tx_hex, sender, None, record, txid, corr, vsize))
+
+    def _enqueue(self, job):
+        """Met un job dans la file de broadcast, sauf doublon; délestage si elle est pleine"""
+        if job.record is not None:
+            job.record.txid = job.txid
+
+        seen = self.seen_txs.claim(job.txid, job)
+        if seen is not None:
+            outcome, detail = seen
+            self.tracer.finish(job.corr, "duplicate")
+            self._event("tx_duplicate", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id,
+                        txid=job.txid, outcome=outcome)
+            if outcome == SEEN_IN_FLIGHT:
+                self.log(f"♻️ {self._job_label(job)}: doublon d'une TX en cours de broadcast", "info")
+            else:
+                self._answer_duplicate(job, outcome == SEEN_BROADCAST, detail)
+            return
+
+        # Écriture anticipée: le worker attend ce commit (groupé) avant le broadcast
+        if self.journal is not None and job.journal_id is None:
+            job.journal_commit = self.journal.append(job)
+        if not self.online and self.config.store_forward:
+            self._hold(job)
+            return
+        try:
+            shed = self.broadcaster.enqueue(job)
+        except Exception:
+            self.seen_txs.resolve(job.txid)
+            self._journal_finish(job, TX_STATUS_FAILED, "moteur de broadcast arrêté")
+            raise
+        if shed is not None:
+            self._shed_job(shed)
+
+    def _journal_finish(self, job, status, detail):
+        if self.journal is not None and job.journal_id is not None:
+            self.journal.finish(job.journal_id, status, detail)
+
+    def _replay_journal(self):
+        """
+        Rejoue les entrées chargées au démarrage. Seulement avec le mesh connecté:
+        sans interface, l'ACK/ERROR dû à l'émetteur serait perdu alors que l'entrée
+        serait marquée terminée.
+        """
+        entries, self._unreplayed = self._unreplayed, []
+        if entries:
+            self._replay(entries)
+
+    def _replay(self, entries):
+        """Remet en file les TX journalisées dont le broadcast n'a pas abouti"""
+        self.log(f"🔁 {len(entries)} TX non terminée(s) rejouée(s) depuis le journal", "warning")
+        for entry in entries:
+            tx_id = entry["tx_id"]
+            mesh_id = f"#{tx_id}" if tx_id is not None else f"TXT ({node_label(entry['sender'])})"
+            record = self._add_record(mesh_id, len(entry["tx_hex"]) // 2, entry["sender"], tx_id)
+            job = BroadcastJob(entry["priority"], entry["tx_hex"], intern_node(entry["sender"]),
+                               tx_id, record, entry["txid"])
+            job.journal_id = entry["id"]
+            job.corr = self._new_corr()
+            self._event("tx_replayed", corr=job.corr, sender=node_label(job.sender), tx_id=tx_id,
+                        txid=job.txid, journal_id=job.journal_id)
+            self._enqueue(job)
+
+    @staticmethod
+    def _job_label(job):
+        return f"TX #{job.tx_id}" if job.tx_id is not None else f"TX texte de {node_label(job.sender)}"
+
+    def _answer_duplicate(self, job, ok, detail):
+        """Répond à un doublon avec le résultat déjà connu (bloquant: envoi radio)"""
+        if ok:
+            self.log(f"♻️ {self._job_label(job)} déjà broadcastée (doublon), TXID: {detail}", "info")
+            if job.tx_id is not None:
+                self.send_ack(job.tx_id, job.sender, job.corr)
+            self._finish_record(job.record, TX_STATUS_BROADCAST, detail)
+        else:
+            self.log(f"♻️ {self._job_label(job)} déjà en échec (doublon): {detail}", "warning")
+            if job.tx_id is not None:
+                self.send_error(job.tx_id, BTX_ERR_BROADCAST_FAIL, job.sender, job.corr)
+            self._finish_record(job.record, TX_STATUS_FAILED, str(detail)[:50])
+
+    def _shed_job(self, job, reason=None):
+        if reason is None:
+            reason = "File pleine (délestée)"
+            self.log(f"⚠️ File de broadcast pleine: {self._job_label(job)} délestée ({PRIORITY_NAMES[job.priority]})", "warning")
+        else:
+            self.log(f"⚠️ {self._job_label(job)} délestée: {reason}", "warning")
+        self.stats.incr("shed")
+        self.tracer.finish(job.corr, "shed")
+        self._event("tx_shed", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id, txid=job.txid,
+                    reason=reason)
+        if job.tx_id is not None:
+            self.send_error(job.tx_id, BTX_ERR_BROADCAST_FAIL, job.sender, job.corr)
+        self._finish_record(job.record, TX_STATUS_FAILED, reason)
+        self._journal_finish(job, TX_STATUS_FAILED, reason)
+        for duplicate in self.seen_txs.resolve(job.txid):
+            self._answer_duplicate(duplicate, False, reason)
+
+    def stats_snapshot(self):
+        """
+        Compteurs pour l'affichage (depuis n'importe quel thread).
+
+        Returns:
+            dict: received, broadcast, failed, queued (gardées hors ligne), in_progress
+            (complètes, broadcast en cours), reassembling (réception en cours),
+            bytes_received, bytes_broadcast, by_backend
+        """
+        snapshot = self.stats.snapshot()
+        by_status = snapshot.pop("by_status")
+        snapshot.update(
+            broadcast=by_status.get(TX_STATUS_BROADCAST, 0),
+            failed=by_status.get(TX_STATUS_FAILED, 0),
+            queued=by_status.get(TX_STATUS_QUEUED, 0),
+            in_progress=by_status.get(TX_STATUS_PENDING, 0),
+            reassembling=len(self.pending_txs),
+        )
+        return snapshot
+
+    def buffer_snapshot(self):
+        """Réceptions en cours: (sessions, octets déjà reçus), tous protocoles confondus"""
+        with self._buffers_lock:
+            sessions = len(self.text_buffers) + len(self.btx_buffers)
+            buffered = sum(buffer["parser"].received for buffer in self.text_buffers.values())
+            buffered += sum(len(chunk) // 2 for buffer in self.btx_buffers.values()
+                            for chunk in buffer["chunks"].values())
+        return sessions + len(self.pending_txs), buffered + self.pending_txs.buffered_bytes()
+
+    # ------------------------------------------------------------------
+    # Store-and-forward
+    # ------------------------------------------------------------------
+
+    @property
+    def held_count(self):
+        """TX gardées localement en attente de connectivité"""
+        return len(self._held)
+
+    def _hold(self, job):
+        """Garde un job pendant la coupure et prévient l'émetteur (TX_QUEUED, bloquant)"""
+        if len(self._held) >= self.config.store_forward_max:
+            self._shed_job(job, "Stockage local plein")
+            return
+        self._held.append(job)
+        self.log(f"📦 {self._job_label(job)} gardée localement ({len(self._held)} en attente de connectivité)", "warning")
+        self._event("tx_held", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id, txid=job.txid,
+                    held=len(self._held))
+        if job.tx_id is not None:
+            self.send_queued(job.tx_id, job.sender, job.corr)
+        self._finish_record(job.record, TX_STATUS_QUEUED, "En attente de connectivité")
+
+    def _set_online(self, online):
+        """Bascule en/hors store-and-forward (boucle de broadcast)"""
+        if online == self.online:
+            return
+        self.online = online
+        if online:
+            self.log(f"📶 Connectivité rétablie: {len(self._held)} TX en attente à renvoyer", "success")
+            self._notify("on_btc_status", "₿ Bitcoin: en ligne", True)
+        else:
+            self.log("📴 Aucun backend joignable: mode store-and-forward", "warning")
+            self._notify("on_btc_status", "₿ Bitcoin: hors ligne (TX gardées)", False)
+
+    async def _connectivity_loop(self):
+        """Suit l'état des backends (disjoncteurs, sondes) et déclenche le renvoi du stock"""
+        while True:
+            await asyncio.sleep(self.config.connectivity_check)
+            self._set_online(self.registry.online())
+            if self.online and self._held and (self._flush_task is None or self._flush_task.done()):
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_held())
+
+    async def _flush_held(self):
+        """Renvoie les TX gardées à débit contrôlé (flush_rate TX/s), dans l'ordre d'arrivée"""
+        count = 0
+        while self._held and self.online:
+            job = self._held.popleft()
+            job.attempt = 0
+            self._finish_record(job.record, TX_STATUS_PENDING, "")
+            self._requeue(job)
+            count += 1
+            await asyncio.sleep(1 / self.config.flush_rate)
+        if count:
+            self.log(f"📤 {count} TX gardée(s) renvoyée(s) en file de broadcast", "info")
+
+    async def _broadcast_job(self, job):
+        """Worker: broadcast un job retiré de la file"""
+        if job.journal_commit is not None:
+            try:
+                await asyncio.wrap_future(job.journal_commit)
+            except Exception as e:
+                self.log(f"⚠️ TX non journalisée, broadcast quand même: {e}", "warning")
+
+        outcome, detail = None, "broadcast interrompu"
+        retrying = False
+        self.stats.incr("broadcast_attempts")
+        self.tracer.mark(job.corr, "broadcast_start", first=True)
+        self._event("broadcast_attempt", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id,
+                    txid=job.txid, attempt=job.attempt + 1, mode=self.config.broadcast_mode,
+                    queued=round(time.monotonic() - job.enqueued_at, 3))
+        try:
+            handler = self._broadcast_tx if job.tx_id is not None else self._broadcast_text
+            answer = await handler(job)
+            if answer is None:
+                retrying = True
+                return
+            outcome, detail = answer
+            # Pas de marquage si le broadcast est interrompu (arrêt): il sera rejoué
+            self._journal_finish(job, TX_STATUS_BROADCAST if outcome == SEEN_BROADCAST else TX_STATUS_FAILED, detail)
+        finally:
+            # Échec transitoire (outcome None): non mémorisé, un renvoi sera retenté.
+            # Pendant les nouveaux essais, les doublons continuent d'attendre.
+            if not retrying:
+                for duplicate in self.seen_txs.resolve(job.txid, outcome, detail):
+                    await self.broadcaster.run_radio(self._answer_duplicate, duplicate,
+                                                     outcome == SEEN_BROADCAST, detail)
+
+    @staticmethod
+    def _failure_outcome(error):
+        # Seule une TX refusée est mémorisée: une erreur de backend (identifiants,
+        # URL...) ne dit rien de la TX, un renvoi après correction doit repartir
+        return SEEN_REJECTED if isinstance(error, TxRejected) else None
+
+    def _schedule_retry(self, job, error):
+        """
+        Replanifie un job après un échec transitoire, si des essais restent.
+        Le job retourne dans la file après le délai: aucun worker n'attend.
+        """
+        if not is_transient(error):
+            return False
+        if self.config.store_forward and not self.registry.online():
+            # Plus aucun backend: garder la TX sans consommer d'essai
+            self._set_online(False)
+            self.broadcaster.spawn(self.broadcaster.run_radio(self._hold, job))
+            return True
+        if job.attempt >= self.config.broadcast_retries:
+            return False
+        job.attempt += 1
+        delay = backoff_delay(job.attempt, self.config.retry_base_delay, self.config.retry_max_delay)
+        self.log(f"⏳ {self._job_label(job)}: échec transitoire ({error}), "
+                 f"essai {job.attempt + 1}/{self.config.broadcast_retries + 1} dans {delay:.1f}s", "warning")
+        self._event("broadcast_retry", corr=job.corr, txid=job.txid, attempt=job.attempt + 1,
+                    delay=round(delay, 3), error=str(error))
+        asyncio.get_running_loop().call_later(delay, self._requeue, job)
+        return True
+
+    def _requeue(self, job):
+        shed = self.broadcaster.queue.put(job)
+        if shed is not None:
+            # Envoi radio bloquant: hors de la boucle
+            self.broadcaster.spawn(self.broadcaster.run_radio(self._shed_job, shed))
+
+    async def _broadcast_text(self, job):
+        """
+        Returns:
+            (résultat pour le cache des doublons, TXID ou message d'erreur),
+            ou None si un nouvel essai est planifié
+        """
+        try:
+            result = await self._broadcast(job.tx_hex)
+            self.log(f"🚀 TX broadcastée! TXID: {result.txid} "
+                     f"({result.backend}, {result.latency:.2f}s)", "success")
+            self._broadcast_event(job, result)
+            self._finish_record(job.record, TX_STATUS_BROADCAST, result.txid, result)
+            self.tracer.finish(job.corr, TX_STATUS_BROADCAST, result)
+            return SEEN_BROADCAST, result.txid
+
+        except Exception as e:
+            self._broadcast_event(job, error=e)
+            if self._schedule_retry(job, e):
+                return None
+            self.log(f"❌ Échec broadcast: {e}", "error")
+            self._finish_record(job.record, TX_STATUS_FAILED, str(e)[:40])
+            self.tracer.finish(job.corr, TX_STATUS_FAILED)
+            return self._failure_outcome(e), str(e)
+
+    async def _broadcast_tx(self, job):
+        """Broadcast la transaction sur le réseau Bitcoin (même retour que _broadcast_text)"""
+        tx_id, sender = job.tx_id, job.sender
+        try:
+            result = await self._broadcast(job.tx_hex)
+
+            # Succès !
+            self.log(f"🎉 TX #{tx_id} broadcastée! TXID: {result.txid} "
+                     f"({result.backend}, {result.latency:.2f}s)", "btc")
+            self._broadcast_event(job, result)
+            await self.send_ack_async(tx_id, sender, job.corr)
+            self.tracer.mark(job.corr, "replied")
+            self._finish_record(job.record, TX_STATUS_BROADCAST, result.txid, result)
+            self.tracer.finish(job.corr, TX_STATUS_BROADCAST, result)
+            return SEEN_BROADCAST, result.txid
+
+        except Exception as e:
+            self._broadcast_event(job, error=e)
+            if self._schedule_retry(job, e):
+                return None
+            self.log(f"❌ Échec broadcast TX #{tx_id}: {e}", "error")
+            await self.send_error_async(tx_id, BTX_ERR_BROADCAST_FAIL, sender, job.corr)
+            self.tracer.mark(job.corr, "replied")
+            self._finish_record(job.record, TX_STATUS_FAILED, str(e)[:50])
+            self.tracer.finish(job.corr, TX_STATUS_FAILED)
+            return self._failure_outcome(e), str(e)
+
+    def _broadcast_event(self, job, result=None, error=None):
+        self.tracer.mark(job.corr, "broadcast_done")
+        if error is not None:
+            self.stats.incr("broadcast_failures", failure_kind(error))
+        if result is not None:
+            self._event("broadcast_result", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id,
+                        txid=result.txid, ok=True, backend=result.backend, latency=round(result.latency, 3),
+                        attempt=job.attempt + 1)
+        else:
+            self._event("broadcast_result", corr=job.corr, sender=node_label(job.sender), tx_id=job.tx_id,
+                        txid=job.txid, ok=False, transient=is_transient(error), error=str(error),
+                        attempt=job.attempt + 1)
+
+    async def _broadcast(self, tx_hex):
+        """Broadcast selon config.broadcast_mode, retourne un BroadcastResult"""
+        # Backends au disjoncteur fermé, du plus rapide au plus lent
+        backends = self.registry.ranked()
+        mode = self.config.broadcast_mode
+        if mode == "single":
+            return await broadcast_single(backends[0], tx_hex)
+        if mode == "race":
+            return await broadcast_race(backends, tx_hex)
+        return await broadcast_hedged(backends, tx_hex, self.config.hedge_delay)
+
+    # ------------------------------------------------------------------
+    # Réponses au mesh
+    # ------------------------------------------------------------------
+
+    def send_ack(self, tx_id, dest, corr=None):
+        """Envoie ACK au sender"""
+        if self.interface:
+            try:
+                self.interface.sendData(encode_ack(tx_id), portNum=PRIVATE_APP_PORT, destinationId=dest)
+                self.log(f"  → ACK envoyé pour TX #{tx_id}", "info")
+                self.stats.incr("replies", "ack")
+                self._event("reply_sent", corr=corr, sender=node_label(dest), tx_id=tx_id, reply="ack")
+            except Exception:
+                pass
+
+    async def send_ack_async(self, tx_id, dest, corr=None):
+        """ACK depuis la boucle de broadcast (écriture radio hors boucle)"""
+        await self.broadcaster.run_radio(self.send_ack, tx_id, dest, corr)
+
+    def send_queued(self, tx_id, dest, corr=None):
+        """Envoie TX_QUEUED au sender: TX reçue, broadcast différé"""
+        if self.interface:
+            try:
+                self.interface.sendData(encode_queued(tx_id), portNum=PRIVATE_APP_PORT, destinationId=dest)
+                self.log(f"  → QUEUED envoyé pour TX #{tx_id}", "info")
+                self.stats.incr("replies", "queued")
+                self._event("reply_sent", corr=corr, sender=node_label(dest), tx_id=tx_id, reply="queued")
+            except Exception:
+                pass
+
+    async def send_error_async(self, tx_id, error_code, dest, corr=None):
+        """ERROR depuis la boucle de broadcast (écriture radio hors boucle)"""
+        await self.broadcaster.run_radio(self.send_error, tx_id, error_code, dest, corr)
+
+    def send_error(self, tx_id, error_code, dest, corr=None):
+        """Envoie ERROR au sender"""
+        if self.interface:
+            try:
+                self.interface.sendData(encode_error(tx_id, error_code), portNum=PRIVATE_APP_PORT, destinationId=dest)
+                self.log(f"  → ERROR {error_code} envoyé pour TX #{tx_id}", "error")
+                self.stats.incr("replies", "error")
+                self.stats.incr("reply_errors", str(error_code))
+                self._event("reply_sent", corr=corr, sender=node_label(dest), tx_id=tx_id, reply="error",
+                            code=error_code)
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # Nettoyage
+    # ------------------------------------------------------------------
+
+    def cleanup_expired(self):
+        """Retire les réceptions dont l'échéance est passée (TX binaires et buffers texte)"""
+        expired_txs = 0
+        for key in self._expiry.pop_expired():
+            if key[0] == "tx":
+                pending = self.pending_txs.pop_expired(key[1], key[2], self.config.tx_timeout)
+                if pending is None:
+                    continue
+                expired_txs += 1
+                self.log(f"⏰ TX #{pending.tx_id} de {node_label(pending.sender)} expirée (timeout)", "warning")
+                self.stats.incr("reassembly_failures", "timeout")
+                self.tracer.finish(pending.corr, "timeout")
+                self._event("reassembly_failed", corr=pending.corr, sender=node_label(pending.sender),
+                            tx_id=pending.tx_id, reason="timeout",
+                            received=pending.received_count, chunks=pending.expected_chunks)
+                self.send_error(pending.tx_id, BTX_ERR_TIMEOUT, pending.sender, pending.corr)
+            else:
+                buffers = self.text_buffers if key[0] == "text" else self.btx_buffers
+                with self._buffers_lock:
+                    buffer = buffers.get(key[1])
+                    # Buffer complété ou alimenté entre-temps: rien à faire
+                    if buffer is None or time.monotonic() - buffer["last_time"] < self.config.text_buffer_timeout:
+                        continue
+                    del buffers[key[1]]
+                self.log(f"⏰ Buffer expiré pour {node_label(key[1])}, abandonné", "warning")
+                self.stats.incr("reassembly_failures", "timeout")
+                self.tracer.finish(buffer.get("corr"), "timeout")
+                self._event("reassembly_failed", corr=buffer.get("corr"), sender=node_label(key[1]), reason="timeout")
+
+        if expired_txs:
+            self._notify("on_stats_changed")
+
+    def _cleanup_loop(self):
+        while not self._stop_event.is_set():
+            # Dort jusqu'à la prochaine échéance (cleanup_interval au plus)
+            self._expiry.wait(self.config.cleanup_interval)
+            if self._stop_event.is_set():
+                break
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                self.log(f"Erreur nettoyage: {e}", "error")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Test de charge de bout en bout: radio simulée (mesh_sim) -> moteur -> faux backends
+locaux (mock_backend), sans T-Beam ni accès réseau.
+
+    cd src/gateway
+    python -m gateway_loadtest --tx 500 --senders 8 --protocols binary,btx,hex
+    python -m gateway_loadtest --loss 0.02 --dup 0.1 --reorder 0.05 --error-rate 0.1 --mode race
+
+Mesure le débit (TX acceptées par seconde) et les percentiles de latence du premier
+paquet émis jusqu'à l'acceptation par le backend, jusqu'au statut final dans le
+moteur et, en binaire, jusqu'à l'ACK/ERROR reçu par l'émetteur.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from bitcoin_tx import calculate_txid
+from gateway_config import GatewayConfig
+from gateway_engine import GatewayEngine, GatewayObserver, TX_STATUS_BROADCAST, TX_STATUS_FAILED
+from mesh_sim import MeshTraffic, PROTOCOLS, SimulatedMeshInterface, start_traffic
+from mock_backend import MOCK_CORE_RPC, MOCK_ESPLORA, MockBitcoinBackend
+from tracing import LatencyHistogram
+from tx_generator import TxGenerator
+
+_FINAL_STATUSES = (TX_STATUS_BROADCAST, TX_STATUS_FAILED)
+
+
+class TxCollector(GatewayObserver):
+    """Instants de départ (premier paquet), de fin (statut final) et de réponse mesh"""
+    def __init__(self, txids):
+        self.txids = txids          # index -> TXID
+        self.started = {}           # TXID -> instant du premier paquet
+        self.finished = {}          # TXID -> (statut, instant)
+        self.replied = {}           # TXID -> (type, instant)
+        self._sessions = {}         # (émetteur, tx_id) -> TXID (protocole binaire)
+        self._lock = threading.Lock()
+        self.done = threading.Condition(self._lock)
+
+    def on_session(self, index, sender, protocol, tx_id, instant):
+        txid = self.txids[index]
+        with self._lock:
+            self.started.setdefault(txid, instant)
+            if tx_id is not None:
+                self._sessions[(sender, tx_id)] = txid
+
+    def on_reply(self, kind, tx_id, dest, instant):
+        if kind == "queued":
+            return
+        with self._lock:
+            txid = self._sessions.get((dest, tx_id))
+            if txid is not None:
+                self.replied.setdefault(txid, (kind, instant))
+
+    def on_tx_updated(self, record):
+        if record.status in _FINAL_STATUSES and record.txid:
+            instant = time.monotonic()
+            with self._lock:
+                self.finished.setdefault(record.txid, (record.status, instant))
+                self.done.notify_all()
+
+    def wait(self, expected, idle):
+        """Attend expected statuts finaux, ou idle secondes sans nouveau statut"""
+        with self._lock:
+            while len(self.finished) < expected:
+                count = len(self.finished)
+                self.done.wait(idle)
+                if len(self.finished) == count:
+                    return False
+        return True
+
+
+@contextmanager
+def simulated_gateway(latency=0.05, jitter=0.0, error_rate=0.0, reject_rate=0.0, mode="single",
+                      api=MOCK_ESPLORA, idle=10.0, seed=0, queue_size=64, observer=None, on_reply=None):
+    """
+    Moteur démarré sur la radio simulée, avec les faux backends (journaux, historique
+    et file d'attente hors ligne désactivés: seul le chemin critique est mesuré).
+
+    Yields:
+        (engine, interface simulée, faux backend)
+    """
+    mock = MockBitcoinBackend(latency, jitter, error_rate, reject_rate, seed)
+    mock.start()
+    mock.register()
+    try:
+        config = GatewayConfig(
+            api=api, broadcast_mode=mode, backends=f"{MOCK_ESPLORA},{MOCK_CORE_RPC}",
+            journal_path="", history_path="", event_log_path="", log_level="warning",
+            broadcast_timeout=max(5.0, latency * 10), retry_base_delay=0.1, retry_max_delay=1.0,
+            tx_timeout=idle, text_buffer_timeout=idle, cleanup_interval=min(1.0, idle),
+            broadcast_queue_size=queue_size, store_forward=False,
+        )
+        config.validate()
+        engine = GatewayEngine(config)
+        if observer is not None:
+            engine.add_observer(observer)
+        interface = SimulatedMeshInterface(on_reply=on_reply)
+        engine.start()
+        try:
+            engine.connect_mesh(interface=interface)
+            yield engine, interface, mock
+        finally:
+            engine.stop()
+    finally:
+        mock.stop()
+        mock.unregister()
+
+
+def run_loadtest(count=200, senders=4, protocols=("binary",), loss=0.0, duplicate=0.0, reorder=0.0,
+                 interval=0.0, latency=0.05, jitter=0.0, error_rate=0.0, reject_rate=0.0,
+                 mode="single", api=MOCK_ESPLORA, idle=10.0, seed=0, transactions=None):
+    """
+    Returns:
+        dict: compteurs, débit et percentiles de latence (secondes)
+    """
+    if transactions is None:
+        generated = list(TxGenerator(seed).stream(count))
+        txs, txids = [tx.data for tx in generated], [tx.txid for tx in generated]
+    else:
+        txs, txids = transactions, [calculate_txid(tx.hex()) for tx in transactions]
+
+    collector = TxCollector(txids)
+    traffic = MeshTraffic(senders, tuple(protocols), loss, duplicate, reorder, interval, seed)
+    with simulated_gateway(latency, jitter, error_rate, reject_rate, mode, api, idle, seed,
+                           max(64, len(txs)), collector, collector.on_reply) as (engine, interface, mock):
+        begin = time.monotonic()
+        radio, _ = start_traffic(interface, traffic, txs, collector.on_session)
+        radio.join()
+        sent_at = time.monotonic()
+        complete = collector.wait(len(txs), idle)
+
+    to_backend, to_status, to_reply = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    last = begin
+    broadcast = failed = 0
+    for txid, (status, instant) in collector.finished.items():
+        start = collector.started.get(txid)
+        if start is None:
+            continue
+        last = max(last, instant)
+        if status == TX_STATUS_BROADCAST:
+            broadcast += 1
+            to_status.record(instant - start)
+            if txid in mock.accepted:
+                to_backend.record(mock.accepted[txid] - start)
+        else:
+            failed += 1
+    for txid, (kind, instant) in collector.replied.items():
+        if kind == "ack" and txid in collector.started:
+            to_reply.record(instant - collector.started[txid])
+
+    elapsed = last - begin
+    return {
+        "transactions": len(txs),
+        "broadcast": broadcast,
+        "failed": failed,
+        "unfinished": len(txs) - broadcast - failed,
+        "drained": complete,
+        "packets_sent": traffic.sent,
+        "packets_lost": traffic.lost,
+        "send_seconds": sent_at - begin,
+        "elapsed_seconds": elapsed,
+        "throughput_tx_s": broadcast / elapsed if elapsed > 0 else 0.0,
+        "latency": {
+            "backend_accept": to_backend.snapshot(),
+            "final_status": to_status.snapshot(),
+            "ack": to_reply.snapshot(),
+        },
+        "backend": mock.snapshot(),
+        "stages": engine.tracer.summary()["stages"],
+    }
+
+
+def _format_ms(snapshot):
+    if not snapshot["count"]:
+        return "—"
+    return "  ".join(f"{key} {snapshot[key] * 1000:8.1f} ms" for key in ("p50", "p95", "p99", "max"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gateway_loadtest", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--tx", type=int, default=200, help="Nombre de transactions")
+    parser.add_argument("--senders", type=int, default=4, help="Émetteurs simultanés")
+    parser.add_argument("--protocols", default="binary",
+                        help=f"Protocoles utilisés à tour de rôle, séparés par des virgules ({', '.join(PROTOCOLS)})")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probabilité de perte d'un paquet")
+    parser.add_argument("--dup", type=float, default=0.0, help="Probabilité de copie relayée d'un paquet")
+    parser.add_argument("--reorder", type=float, default=0.0, help="Probabilité d'inversion de deux paquets")
+    parser.add_argument("--interval", type=float, default=0.0, help="Délai moyen entre deux paquets (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence des faux backends (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation de latence des faux backends (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'erreur transitoire du backend")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Probabilité de refus de la TX")
+    parser.add_argument("--mode", choices=("single", "race", "hedged"), default="single")
+    parser.add_argument("--rpc", action="store_true", help="Mode single: faux Bitcoin Core (JSON-RPC) au lieu d'Esplora")
+    parser.add_argument("--idle", type=float, default=10.0,
+                        help="Attente sans nouveau résultat avant d'abandonner (et expiration des TX incomplètes) (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Résultat en JSON")
+    args = parser.parse_args(argv)
+
+    protocols = [p.strip() for p in args.protocols.split(",") if p.strip()]
+    try:
+        result = run_loadtest(
+            args.tx, args.senders, protocols, args.loss, args.dup, args.reorder, args.interval,
+            args.latency, args.jitter, args.error_rate, args.reject_rate, args.mode,
+            MOCK_CORE_RPC if args.rpc else MOCK_ESPLORA, args.idle, args.seed)
+    except ValueError as e:
+        print(f"Paramètres invalides: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"Transactions      {result['transactions']}  (broadcast {result['broadcast']}, "
+          f"échec {result['failed']}, non terminées {result['unfinished']})")
+    print(f"Paquets           {result['packets_sent']} émis, {result['packets_lost']} perdus")
+    print(f"Durée             {result['elapsed_seconds']:.2f} s (émission {result['send_seconds']:.2f} s)")
+    print(f"Débit             {result['throughput_tx_s']:,.1f} tx/s")
+    backend = result["backend"]
+    print(f"Faux backends     {backend['requests']} requêtes, {backend['errors']} erreurs, "
+          f"{backend['rejects']} refus")
+    print("Latence (depuis le premier paquet)")
+    for name, label in (("backend_accept", "acceptation"), ("final_status", "statut final"), ("ack", "ACK")):
+        print(f"  {label:<14} {_format_ms(result['latency'][name])}")
+    print("Étapes du moteur")
+    for stage, snapshot in result["stages"].items():
+        print(f"  {stage:<14} {_format_ms(snapshot)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Relecture d'une capture de paquets (capture_path) dans le moteur, sur la radio
+simulée et les faux backends locaux: reproduire un incident, ou mesurer le débit
+sur du trafic réel.
+
+    cd src/gateway
+    python -m gateway_replay capture.btxcap --info
+    python -m gateway_replay capture.btxcap              # temps réel
+    python -m gateway_replay capture.btxcap --speed 20   # 20x
+    python -m gateway_replay capture.btxcap --speed 0    # aussi vite que possible
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from gateway_loadtest import TxCollector, simulated_gateway
+from gateway_engine import TX_STATUS_BROADCAST
+from mock_backend import MOCK_CORE_RPC, MOCK_ESPLORA
+from packet_capture import replay, summarize
+
+
+def run_replay(path, speed=1.0, max_gap=None, latency=0.05, error_rate=0.0, mode="single",
+               api=MOCK_ESPLORA, idle=10.0):
+    """
+    Returns:
+        dict: paquets relus, TX terminées, débit, compteurs du moteur et durées par étape
+    """
+    collector = TxCollector([])
+    with simulated_gateway(latency, error_rate=error_rate, mode=mode, api=api, idle=idle,
+                           observer=collector) as (engine, interface, mock):
+        begin = time.monotonic()
+        packets = replay(path, interface.deliver, speed, max_gap)
+        replayed_at = time.monotonic()
+        # Nombre de TX inconnu d'avance: attendre que plus rien ne se termine
+        collector.wait(float("inf"), idle)
+        stats = engine.stats_snapshot()
+
+    finished = collector.finished.values()
+    last = max((instant for _, instant in finished), default=replayed_at)
+    elapsed = max(last, replayed_at) - begin
+    broadcast = sum(1 for status, _ in finished if status == TX_STATUS_BROADCAST)
+    return {
+        "packets": packets,
+        "replay_seconds": replayed_at - begin,
+        "elapsed_seconds": elapsed,
+        "packets_per_s": packets / (replayed_at - begin) if replayed_at > begin else 0.0,
+        "transactions": stats["received"],
+        "broadcast": broadcast,
+        "failed": len(collector.finished) - broadcast,
+        "throughput_tx_s": broadcast / elapsed if elapsed > 0 else 0.0,
+        "counters": {f"{name}:{label}" if label else name: value
+                     for (name, label), value in sorted(stats["counters"].items())},
+        "backend": mock.snapshot(),
+        "stages": engine.tracer.summary()["stages"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gateway_replay", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture", help="Fichier de capture (capture_path)")
+    parser.add_argument("--info", action="store_true", help="Décrit la capture sans la relire")
+    parser.add_argument("-s", "--speed", type=float, default=1.0,
+                        help="Facteur d'accélération (1 = temps réel, 0 = aussi vite que possible)")
+    parser.add_argument("--max-gap", type=float, help="Silence maximal reproduit entre deux paquets (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence des faux backends (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'erreur transitoire du backend")
+    parser.add_argument("--mode", choices=("single", "race", "hedged"), default="single")
+    parser.add_argument("--rpc", action="store_true", help="Mode single: faux Bitcoin Core (JSON-RPC) au lieu d'Esplora")
+    parser.add_argument("--idle", type=float, default=10.0,
+                        help="Attente sans nouveau résultat avant de conclure (et expiration des TX incomplètes) (s)")
+    parser.add_argument("--json", action="store_true", help="Résultat en JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.info:
+            result = summarize(args.capture)
+        else:
+            result = run_replay(args.capture, args.speed, args.max_gap, args.latency, args.error_rate,
+                                args.mode, MOCK_CORE_RPC if args.rpc else MOCK_ESPLORA, args.idle)
+    except (OSError, ValueError) as e:
+        print(f"Capture illisible: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.info:
+        start = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["start"])) if result["start"] else "—"
+        print(f"Paquets      {result['packets']} de {result['senders']} émetteurs")
+        print(f"Début        {start}")
+        print(f"Durée        {result['duration']:.1f} s")
+        for portnum, count in sorted(result["ports"].items(), key=lambda item: -item[1]):
+            print(f"  {portnum or '?':<20} {count}")
+    else:
+        print(f"Paquets      {result['packets']} relus en {result['replay_seconds']:.2f} s "
+              f"({result['packets_per_s']:,.0f}/s)")
+        print(f"TX           {result['transactions']} complètes, {result['broadcast']} broadcast, "
+              f"{result['failed']} en échec")
+        print(f"Débit        {result['throughput_tx_s']:,.1f} tx/s sur {result['elapsed_seconds']:.2f} s")
+        for name, value in result["counters"].items():
+            print(f"  {name:<32} {value}")
+        print("Étapes du moteur (p50 / p95)")
+        for stage, snapshot in result["stages"].items():
+            if snapshot["count"]:
+                print(f"  {stage:<14} {snapshot['p50'] * 1000:8.1f} ms  {snapshot['p95'] * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Historique persistant des transactions (SQLite, indexé).
+
+Chaque entrée de l'historique (TxRecord) y est écrite à sa création puis à chaque
+changement de statut. La GUI n'affiche qu'une page à la fois, lue ici: les
+anciennes entrées restent sur disque au lieu de s'accumuler dans le Treeview.
+Les écritures passent par un thread unique, par lots, comme le journal des
+broadcasts; les lectures utilisent leur propre connexion (WAL: pas de blocage).
+"""
+
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+
+from batch_writer import drain_batches, stop_writer
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    mesh_id TEXT NOT NULL,
+    tx_id INTEGER,
+    sender INTEGER,
+    size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    txid TEXT,
+    detail TEXT,
+    backend TEXT,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS history_time ON history (time);
+CREATE INDEX IF NOT EXISTS history_txid ON history (txid);
+CREATE INDEX IF NOT EXISTS history_sender ON history (sender);
+"""
+
+_COLUMNS = "id, time, mesh_id, tx_id, sender, size, status, txid, detail, backend, latency"
+
+
+def _search_clause(search):
+    """
+    Filtre d'une recherche: "!abcd1234" = nœud émetteur, "#12" = ID mesh; sinon préfixe de TXID
+    (et nœud si le texte tient sur 8 chiffres hexadécimaux).
+
+    Returns:
+        (clause WHERE, paramètres)
+    """
+    search = search.strip().lower()
+    if not search:
+        return "", ()
+    if search.startswith("#"):
+        try:
+            return "WHERE tx_id = ?", (int(search[1:]),)
+        except ValueError:
+            return "WHERE 0", ()
+    if search.startswith("!"):
+        try:
+            return "WHERE sender = ?", (int(search[1:], 16),)
+        except ValueError:
+            return "WHERE 0", ()
+    try:
+        node = int(search, 16) if len(search) <= 8 else None
+    except ValueError:
+        return "WHERE 0", ()
+    # Intervalle plutôt que LIKE: l'index history_txid reste utilisable
+    clause, params = "WHERE (txid >= ? AND txid < ?)", (search, search + "~")
+    if node is not None:
+        clause, params = clause[:-1] + " OR sender = ?)", params + (node,)
+    return clause, params
+
+
+class HistoryStore:
+    """
+    Args:
+        path: Fichier SQLite
+        retention_days: Les entrées plus anciennes sont purgées à l'ouverture (0 = jamais)
+        log: Callback (message, tag) pour les erreurs d'écriture
+    """
+    def __init__(self, path, retention_days=30.0, log=None):
+        self.path = path
+        self.retention_days = retention_days
+        self.log = log or (lambda message, tag="info": None)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._ids = None
+        self._reader = None
+        self._reader_lock = threading.Lock()
+
+    def open(self):
+        """Crée le schéma, purge les entrées trop anciennes et démarre le thread d'écriture"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executescript(_SCHEMA)
+                if self.retention_days > 0:
+                    conn.execute("DELETE FROM history WHERE time < ?",
+                                 (time.time() - self.retention_days * 86400,))
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+        finally:
+            conn.close()
+
+        self._ids = itertools.count(last_id + 1)
+        self._reader = self._connect(check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+        self._thread = threading.Thread(target=self._run, name="btx-history", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=5):
+        """Écrit ce qui reste en file puis arrête le thread"""
+        if self._thread is not None:
+            stop_writer(self._queue, self._thread, timeout)
+            self._thread = None
+        if self._reader is not None:
+            with self._reader_lock:
+                self._reader.close()
+                self._reader = None
+
+    def add(self, record):
+        """Enregistre un nouveau TxRecord (record.history_id est attribué ici)"""
+        record.history_id = next(self._ids)
+        self._queue.put((
+            f"INSERT INTO history ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record.history_id, record.time, record.mesh_id, record.tx_id, record.sender, record.size,
+             record.status, record.txid, record.btc_txid, record.backend or None, record.latency)))
+
+    def update(self, record):
+        """Nouveau statut d'un TxRecord déjà enregistré"""
+        if record.history_id is None:
+            return
+        self._queue.put((
+            "UPDATE history SET status = ?, txid = ?, detail = ?, backend = ?, latency = ? WHERE id = ?",
+            (record.status, record.txid, record.btc_txid, record.backend or None, record.latency,
+             record.history_id)))
+
+    def page(self, offset=0, limit=100, search=""):
+        """
+        Une page de l'historique, du plus récent au plus ancien.
+
+        Returns:
+            Liste de dicts (colonnes de la table)
+        """
+        clause, params = _search_clause(search)
+        with self._reader_lock:
+            if self._reader is None:
+                return []
+            rows = self._reader.execute(
+                f"SELECT {_COLUMNS} FROM history {clause} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, search=""):
+        clause, params = _search_clause(search)
+        with self._reader_lock:
+            if self._reader is None:
+                return 0
+            return self._reader.execute(f"SELECT COUNT(*) FROM history {clause}", params).fetchone()[0]
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # L'historique n'est pas critique (le journal des broadcasts l'est): pas de fsync par commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            drain_batches(self._queue, lambda batch: self._commit(conn, batch))
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        try:
+            conn.execute("BEGIN")
+            for sql, params in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.log(f"❌ Historique: écriture impossible ({e})", "error")
@@ -0,0 +1,142 @@
+"""
+Journal durable des broadcasts (SQLite en mode WAL).
+
+Chaque transaction complète y est écrite avant son broadcast, puis marquée avec son
+résultat. Les entrées encore "pending" au démarrage (arrêt ou plantage pendant le
+broadcast) sont rejouées. Les écritures passent par un thread unique qui regroupe
+tout ce qui est en attente dans une seule transaction SQLite: un fsync par lot,
+pas par TX, et le thread lecteur meshtastic n'attend jamais le disque.
+"""
+
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from batch_writer import drain_batches, stop_writer
+
+JOURNAL_PENDING = "pending"
+
+# Les entrées terminées sont conservées un jour, pour diagnostic
+FINISHED_RETENTION = 86400.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    priority INTEGER NOT NULL,
+    tx_hex TEXT NOT NULL,
+    sender INTEGER NOT NULL,
+    tx_id INTEGER,
+    txid TEXT,
+    status TEXT NOT NULL,
+    detail TEXT,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS journal_status ON journal (status);
+"""
+
+
+class BroadcastJournal:
+    """
+    Args:
+        path: Fichier SQLite
+        log: Callback (message, tag) pour les erreurs d'écriture
+    """
+    def __init__(self, path, log=None):
+        self.path = path
+        self.log = log or (lambda message, tag="info": None)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._ids = None
+
+    def open(self):
+        """
+        Crée le schéma, purge les vieilles entrées terminées et démarre le thread d'écriture.
+
+        Returns:
+            Les entrées non terminées (dicts), à rejouer, dans l'ordre d'arrivée
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executescript(_SCHEMA)
+                conn.execute("DELETE FROM journal WHERE status != ? AND finished < ?",
+                             (JOURNAL_PENDING, time.time() - FINISHED_RETENTION))
+            conn.row_factory = sqlite3.Row
+            pending = [dict(row) for row in conn.execute(
+                "SELECT * FROM journal WHERE status = ? ORDER BY id", (JOURNAL_PENDING,))]
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM journal").fetchone()[0]
+        finally:
+            conn.close()
+
+        self._ids = itertools.count(last_id + 1)
+        self._thread = threading.Thread(target=self._run, name="btx-journal", daemon=True)
+        self._thread.start()
+        return pending
+
+    def close(self, timeout=5):
+        """Écrit ce qui reste en file puis arrête le thread"""
+        if self._thread is not None:
+            stop_writer(self._queue, self._thread, timeout)
+            self._thread = None
+
+    def append(self, job):
+        """
+        Journalise un BroadcastJob (job.journal_id est attribué ici).
+
+        Returns:
+            Future résolu quand le lot contenant l'entrée est commité
+        """
+        job.journal_id = next(self._ids)
+        future = Future()
+        self._queue.put((
+            "INSERT INTO journal (id, created, priority, tx_hex, sender, tx_id, txid, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.journal_id, time.time(), job.priority, job.tx_hex, job.sender, job.tx_id,
+             job.txid, JOURNAL_PENDING),
+            future))
+        return future
+
+    def finish(self, journal_id, status, detail=""):
+        """Marque le résultat d'une entrée (sans attendre le commit)"""
+        self._queue.put((
+            "UPDATE journal SET status = ?, detail = ?, finished = ? WHERE id = ?",
+            (status, str(detail)[:200], time.time(), journal_id),
+            None))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            drain_batches(self._queue, lambda batch: self._commit(conn, batch))
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        """Un seul commit (et un seul fsync) pour tout le lot"""
+        error = None
+        try:
+            conn.execute("BEGIN")
+            for sql, params, _ in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            error = e
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.log(f"❌ Journal: écriture impossible ({e})", "error")
+
+        for _, _, future in batch:
+            if future is not None:
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
@@ -0,0 +1,72 @@
+"""
+Niveaux des messages du moteur et tampon circulaire pour l'affichage.
+
+Les tags des messages (info, success, btc, warning, error, debug) servent à la
+fois de couleur dans la GUI et de niveau: les messages sous log_level sont écartés
+dès GatewayEngine.log(), avant d'atteindre les observateurs.
+"""
+
+import time
+from collections import deque
+
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+
+LOG_LEVELS = {
+    "debug": LOG_DEBUG,
+    "info": LOG_INFO,
+    "warning": LOG_WARNING,
+    "error": LOG_ERROR,
+}
+
+# Tag d'un message -> niveau (tag inconnu: info)
+TAG_LEVELS = {
+    "debug": LOG_DEBUG,
+    "info": LOG_INFO,
+    "success": LOG_INFO,
+    "btc": LOG_INFO,
+    "warning": LOG_WARNING,
+    "error": LOG_ERROR,
+}
+
+
+def tag_level(tag):
+    return TAG_LEVELS.get(tag, LOG_INFO)
+
+
+class LogRing:
+    """
+    Tampon circulaire des derniers messages, rempli par n'importe quel thread et
+    vidé par lots par le thread d'affichage.
+
+    deque.append et deque.popleft sont atomiques: ni verrou ni attente côté
+    producteurs. Si l'affichage prend du retard, les plus anciens messages sont
+    écrasés (et comptés dans dropped).
+    """
+    def __init__(self, capacity=1000):
+        self._entries = deque(maxlen=capacity)
+        self._appended = 0
+        self._drained = 0
+
+    def append(self, message, tag="info"):
+        self._entries.append((time.time(), message, tag))
+        self._appended += 1
+
+    def drain(self):
+        """Retire et retourne tous les messages en attente, du plus ancien au plus récent"""
+        batch = []
+        entries = self._entries
+        while True:
+            try:
+                batch.append(entries.popleft())
+            except IndexError:
+                break
+        self._drained += len(batch)
+        return batch
+
+    @property
+    def dropped(self):
+        """Messages écrasés avant d'avoir été affichés (approximatif entre deux drain)"""
+        return max(0, self._appended - self._drained - len(self._entries))
@@ -0,0 +1,228 @@
+"""
+Radio simulée: interface meshtastic factice et trafic synthétique.
+
+SimulatedMeshInterface remplace meshtastic.serial_interface.SerialInterface
+(GatewayEngine.connect_mesh(interface=...)) et publie les paquets sur
+"meshtastic.receive", comme la bibliothèque: le moteur les reçoit par le même
+chemin qu'en production. MeshTraffic découpe des transactions en paquets des
+trois protocoles (BTX binaire, "BTX:n/total:data", hex brut) et y ajoute perte,
+duplication, désordre et délais d'arrivée.
+"""
+
+import random
+import struct
+import threading
+import time
+
+from pubsub import pub
+
+from btx_protocol import (
+    BTX_MSG_TX_START, BTX_MSG_TX_CHUNK, BTX_MSG_TX_END, BTX_MSG_TX_ACK, BTX_MSG_TX_ERROR,
+    BTX_MSG_TX_QUEUED, BTX_CHUNK_SIZE,
+)
+
+PROTOCOL_BINARY = "binary"
+PROTOCOL_BTX_TEXT = "btx"
+PROTOCOL_RAW_HEX = "hex"
+PROTOCOLS = (PROTOCOL_BINARY, PROTOCOL_BTX_TEXT, PROTOCOL_RAW_HEX)
+
+# Caractères de hex par message texte (limite pratique d'un message meshtastic)
+TEXT_CHUNK_CHARS = 180
+
+# Premier numéro de nœud des émetteurs simulés
+FIRST_SENDER = 0x5100_0000
+
+_REPLY_NAMES = {BTX_MSG_TX_ACK: "ack", BTX_MSG_TX_ERROR: "error", BTX_MSG_TX_QUEUED: "queued"}
+
+
+def binary_payloads(tx, tx_id):
+    """Payloads PRIVATE_APP d'une TX: TX_START, TX_CHUNK..., TX_END"""
+    payloads = [struct.pack("<BBH", BTX_MSG_TX_START, tx_id, len(tx))]
+    for index, start in enumerate(range(0, len(tx), BTX_CHUNK_SIZE)):
+        payloads.append(struct.pack("<BBB", BTX_MSG_TX_CHUNK, tx_id, index) + tx[start:start + BTX_CHUNK_SIZE])
+    payloads.append(struct.pack("<BB", BTX_MSG_TX_END, tx_id))
+    return payloads
+
+
+def btx_text_messages(tx, chunk_chars=TEXT_CHUNK_CHARS):
+    """Messages "BTX:n/total:data" (app Android)"""
+    tx_hex = tx.hex()
+    parts = [tx_hex[i:i + chunk_chars] for i in range(0, len(tx_hex), chunk_chars)]
+    return [f"BTX:{n}/{len(parts)}:{part}" for n, part in enumerate(parts, 1)]
+
+
+def raw_hex_messages(tx, chunk_chars=TEXT_CHUNK_CHARS):
+    """Hex brut découpé en messages texte (legacy)"""
+    tx_hex = tx.hex()
+    return [tx_hex[i:i + chunk_chars] for i in range(0, len(tx_hex), chunk_chars)]
+
+
+class SimulatedMeshInterface:
+    """
+    Interface meshtastic factice: deliver() publie un paquet reçu, sendData()
+    enregistre les réponses de la gateway (ACK, ERROR, QUEUED) avec leur instant.
+
+    Args:
+        on_reply: Callback (kind, tx_id, dest, instant monotone), depuis le thread d'envoi radio
+    """
+    def __init__(self, on_reply=None, short_name="SIM"):
+        self.on_reply = on_reply
+        self.short_name = short_name
+        self.replies = []
+        self.closed = False
+
+    def getMyNodeInfo(self):
+        return {"user": {"shortName": self.short_name}}
+
+    def sendData(self, data, portNum=None, destinationId=None, **kwargs):
+        instant = time.monotonic()
+        kind = _REPLY_NAMES.get(data[0], "unknown") if data else "unknown"
+        tx_id = data[1] if len(data) > 1 else None
+        self.replies.append((kind, tx_id, destinationId, instant))
+        if self.on_reply is not None:
+            self.on_reply(kind, tx_id, destinationId, instant)
+
+    def close(self):
+        self.closed = True
+
+    def deliver(self, packet):
+        """Un paquet "reçu par la radio": même chemin que meshtastic (pubsub)"""
+        pub.sendMessage("meshtastic.receive", packet=packet, interface=self)
+
+
+class MeshTraffic:
+    """
+    Trafic synthétique à partir de transactions (bytes).
+
+    Les TX sont réparties entre `senders` émetteurs qui transmettent en même temps
+    (paquets entrelacés), une TX à la fois par émetteur, comme un client réel.
+
+    Args:
+        senders: Nombre d'émetteurs simultanés
+        protocols: Protocoles utilisés à tour de rôle (PROTOCOLS)
+        loss: Probabilité de perte d'un paquet
+        duplicate: Probabilité qu'un paquet arrive deux fois (copie relayée, même id)
+        reorder: Probabilité qu'un paquet soit échangé avec le suivant
+        interval: Délai moyen entre deux paquets (s, loi exponentielle; 0 = sans délai)
+        seed: Graine (trafic reproductible)
+    """
+    def __init__(self, senders=4, protocols=(PROTOCOL_BINARY,), loss=0.0, duplicate=0.0,
+                 reorder=0.0, interval=0.0, seed=0):
+        for protocol in protocols:
+            if protocol not in PROTOCOLS:
+                raise ValueError(f"Protocole inconnu: {protocol} (choix: {', '.join(PROTOCOLS)})")
+        self.senders = senders
+        self.protocols = protocols
+        self.loss = loss
+        self.duplicate = duplicate
+        self.reorder = reorder
+        self.interval = interval
+        self.rnd = random.Random(seed)
+        self._packet_ids = iter(range(1, 1 << 32))
+        self._tx_ids = {}
+        self.sent = 0
+        self.lost = 0
+
+    def _packet(self, sender, protocol, content):
+        decoded = ({"portnum": "PRIVATE_APP", "payload": content} if protocol == PROTOCOL_BINARY
+                   else {"portnum": "TEXT_MESSAGE_APP", "text": content})
+        return {"from": sender, "id": next(self._packet_ids), "decoded": decoded}
+
+    def _session(self, sender, protocol, tx):
+        """Paquets d'une TX, avant perturbations; retourne (tx_id ou None, paquets)"""
+        if protocol == PROTOCOL_BINARY:
+            tx_id = self._tx_ids.get(sender, 0)
+            self._tx_ids[sender] = (tx_id + 1) % 256
+            return tx_id, [self._packet(sender, protocol, p) for p in binary_payloads(tx, tx_id)]
+        messages = btx_text_messages(tx) if protocol == PROTOCOL_BTX_TEXT else raw_hex_messages(tx)
+        return None, [self._packet(sender, protocol, m) for m in messages]
+
+    def waves(self, transactions):
+        """
+        Yields:
+            Listes de `senders` sessions transmises en même temps; session =
+            (index de la TX, émetteur, protocole, tx_id ou None, paquets)
+        """
+        wave = []
+        for index, tx in enumerate(transactions):
+            sender = FIRST_SENDER + index % self.senders
+            protocol = self.protocols[index % len(self.protocols)]
+            tx_id, packets = self._session(sender, protocol, tx)
+            wave.append((index, sender, protocol, tx_id, packets))
+            if len(wave) == self.senders:
+                yield wave
+                wave = []
+        if wave:
+            yield wave
+
+    def packets(self, waves):
+        """
+        Entrelace les paquets d'une vague et applique perte, duplication et désordre.
+
+        Args:
+            waves: Vagues de sessions (voir waves())
+        Yields:
+            (délai avant le paquet, paquet)
+        """
+        rnd = self.rnd
+        for wave in waves:
+            streams = [list(session[4]) for session in wave]
+            merged = []
+            while streams:
+                stream = streams[rnd.randrange(len(streams))]
+                merged.append(stream.pop(0))
+                if not stream:
+                    streams.remove(stream)
+            for i in range(len(merged) - 1):
+                if self.reorder and rnd.random() < self.reorder:
+                    merged[i], merged[i + 1] = merged[i + 1], merged[i]
+            for packet in merged:
+                if self.loss and rnd.random() < self.loss:
+                    self.lost += 1
+                    continue
+                copies = 2 if self.duplicate and rnd.random() < self.duplicate else 1
+                for _ in range(copies):
+                    self.sent += 1
+                    yield (rnd.expovariate(1 / self.interval) if self.interval else 0.0), packet
+
+
+def run_traffic(interface, traffic, transactions, on_session=None, stop=None):
+    """
+    Transmet les transactions sur l'interface simulée (bloquant: à lancer dans un thread
+    pour un débit réaliste, comme le thread lecteur de meshtastic).
+
+    Args:
+        on_session: Callback (index, émetteur, protocole, tx_id, instant monotone) au
+            premier paquet émis de chaque TX
+        stop: threading.Event optionnel pour interrompre
+    """
+    sessions = {}   # id de paquet -> session
+    started = set() # TX dont un paquet est déjà parti
+
+    def announced(waves):
+        for wave in waves:
+            for index, sender, protocol, tx_id, packets in wave:
+                for packet in packets:
+                    sessions[packet["id"]] = (index, sender, protocol, tx_id)
+            yield wave
+
+    for delay, packet in traffic.packets(announced(traffic.waves(transactions))):
+        if stop is not None and stop.is_set():
+            break
+        if delay:
+            time.sleep(delay)
+        session = sessions.pop(packet["id"], None)
+        if session is not None and session[0] not in started:
+            started.add(session[0])
+            if on_session is not None:
+                on_session(*session, time.monotonic())
+        interface.deliver(packet)
+
+
+def start_traffic(interface, traffic, transactions, on_session=None):
+    """run_traffic dans un thread "btx-sim-radio"; retourne (thread, stop Event)"""
+    stop = threading.Event()
+    thread = threading.Thread(target=run_traffic, args=(interface, traffic, transactions, on_session, stop),
+                              name="btx-sim-radio", daemon=True)
+    thread.start()
+    return thread, stop
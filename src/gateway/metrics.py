@@ -0,0 +1,187 @@
+"""
+Point de collecte des métriques au format texte Prometheus (GET /metrics), et
+des dernières traces de latence en JSON (GET /traces).
+
+Serveur http.server de la bibliothèque standard dans son propre thread. Les
+compteurs viennent de GatewayStats (tenus à jour par le moteur); les jauges
+(réceptions en cours, file, disjoncteurs...) sont lues au moment de la collecte.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backends import CIRCUIT_OPEN
+from broadcast_queue import PRIORITY_NAMES
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Compteurs de GatewayStats.counters: nom -> (métrique, étiquette, aide)
+_COUNTERS = {
+    "packets": ("btx_packets_received_total", "port", "Paquets mesh reçus (hors copies relayées), par port"),
+    "chunks": ("btx_chunks_stored_total", "protocol", "Chunks stockés, par protocole"),
+    "chunks_rejected": ("btx_chunks_rejected_total", "protocol", "Chunks refusés (index, longueur, contenu)"),
+    "reassemblies": ("btx_reassemblies_total", "protocol", "Transactions réassemblées, par protocole"),
+    "reassembly_failures": ("btx_reassembly_failures_total", "reason", "Réceptions abandonnées, par cause"),
+    "broadcast_attempts": ("btx_broadcast_attempts_total", None, "Essais de broadcast (nouveaux essais compris)"),
+    "broadcast_failures": ("btx_broadcast_failures_total", "kind", "Essais de broadcast échoués (transient, rejected, refused)"),
+    "shed": ("btx_shed_total", None, "Transactions délestées (file ou stockage local plein)"),
+    "replies": ("btx_replies_sent_total", "type", "Réponses envoyées au mesh (ack, queued, error)"),
+    "reply_errors": ("btx_reply_errors_total", "code", "Réponses ERROR envoyées, par code d'erreur BTX"),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, kind, help_text, samples):
+        """samples: liste de (étiquettes dict ou None, valeur)"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                self.lines.append(f"{name}{{{rendered}}} {value:g}")
+            else:
+                self.lines.append(f"{name} {value:g}")
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(engine):
+    """Toutes les métriques du moteur, au format texte"""
+    out = _Writer()
+    stats = engine.stats_snapshot()
+
+    by_name = {}
+    for (name, label), value in stats["counters"].items():
+        by_name.setdefault(name, []).append((label, value))
+    for name, (metric, label_name, help_text) in _COUNTERS.items():
+        samples = [({label_name: label} if label_name else None, value)
+                   for label, value in sorted(by_name.get(name, []))]
+        if not samples and not label_name:
+            samples = [(None, 0)]
+        out.metric(metric, "counter", help_text, samples)
+
+    out.metric("btx_transactions_total", "counter", "Transactions complètes reçues",
+               [(None, stats["received"])])
+    out.metric("btx_transactions", "gauge", "Entrées de l'historique de la session, par statut", [
+        ({"status": status}, stats[status]) for status in ("in_progress", "queued", "broadcast", "failed")])
+    out.metric("btx_bytes_received_total", "counter", "Octets de transactions complètes reçues",
+               [(None, stats["bytes_received"])])
+    out.metric("btx_bytes_broadcast_total", "counter", "Octets de transactions acceptées par un backend",
+               [(None, stats["bytes_broadcast"])])
+    out.metric("btx_broadcasts_total", "counter", "Transactions acceptées, par backend",
+               [({"backend": name}, count) for name, count in sorted(stats["by_backend"].items())])
+    out.metric("btx_duplicate_packets_total", "counter", "Copies relayées écartées avant décodage",
+               [(None, engine.seen_packets.total_duplicates)])
+
+    seen = engine.seen_txs.snapshot()
+    out.metric("btx_seen_cache_hits_total", "counter", "Doublons de TXID servis par le cache",
+               [(None, seen["hits"])])
+    out.metric("btx_seen_cache_size", "gauge", "TXID mémorisés", [(None, seen["size"])])
+
+    sessions, buffered = engine.buffer_snapshot()
+    out.metric("btx_reassembly_sessions", "gauge", "Réceptions en cours (binaire, texte, BTX)",
+               [(None, sessions)])
+    out.metric("btx_reassembly_buffered_bytes", "gauge", "Octets reçus des réceptions en cours",
+               [(None, buffered)])
+
+    depth = engine.broadcaster.queue.depth_by_priority()
+    out.metric("btx_queue_depth", "gauge", "Transactions en file de broadcast, par classe",
+               [({"class": PRIORITY_NAMES[priority]}, count) for priority, count in sorted(depth.items())])
+    out.metric("btx_broadcasts_in_flight", "gauge", "Broadcasts en cours", [(None, engine.broadcaster.in_flight)])
+    out.metric("btx_held_transactions", "gauge", "Transactions gardées hors ligne (store-and-forward)",
+               [(None, engine.held_count)])
+    out.metric("btx_online", "gauge", "1 si au moins un backend est joignable", [(None, int(engine.online))])
+    out.metric("btx_mesh_connected", "gauge", "1 si la radio est connectée", [(None, int(engine.connected))])
+
+    backends = engine.registry.in_use()
+    out.metric("btx_backend_circuit_open", "gauge", "1 si le disjoncteur du backend est ouvert",
+               [({"backend": b.name}, int(b.health.state == CIRCUIT_OPEN)) for b in backends])
+    out.metric("btx_backend_error_rate", "gauge", "Taux d'échec récent du backend",
+               [({"backend": b.name}, b.health.error_rate) for b in backends])
+    latency = []
+    for backend in backends:
+        for quantile in (50, 95, 99):
+            value = backend.latency.percentile(quantile)
+            if value is not None:
+                latency.append(({"backend": backend.name, "quantile": quantile / 100}, value))
+    out.metric("btx_backend_latency_seconds", "gauge", "Latence des broadcasts réussis (fenêtre glissante)",
+               latency)
+
+    # Traces: histogrammes depuis le démarrage
+    traces = engine.tracer.summary()
+    stages = []
+    for stage, snapshot in traces["stages"].items():
+        for quantile in ("p50", "p95", "p99"):
+            if snapshot["count"]:
+                stages.append(({"stage": stage, "quantile": int(quantile[1:]) / 100}, snapshot[quantile]))
+    out.metric("btx_stage_latency_seconds", "gauge", "Durée de chaque étape des TX broadcastées", stages)
+    backend_stages = []
+    for name, histograms in sorted(traces["backends"].items()):
+        for kind, snapshot in histograms.items():
+            for quantile in ("p50", "p95", "p99"):
+                if snapshot["count"]:
+                    backend_stages.append(({"backend": name, "stage": kind, "quantile": int(quantile[1:]) / 100},
+                                           snapshot[quantile]))
+    out.metric("btx_backend_stage_latency_seconds", "gauge",
+               "Broadcast (essais compris) et appel HTTP/RPC du backend gagnant", backend_stages)
+    return out.text()
+
+
+class MetricsServer:
+    """
+    Args:
+        engine: GatewayEngine à exposer
+        host: Adresse d'écoute (127.0.0.1 par défaut: pas d'exposition réseau)
+        port: Port TCP
+    """
+    def __init__(self, engine, host="127.0.0.1", port=9464):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Ouvre le port (OSError si occupé) et sert dans un thread dédié"""
+        engine = self.engine
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body, content_type = render_metrics(engine).encode("utf-8"), CONTENT_TYPE
+                elif path == "/traces":
+                    body, content_type = json.dumps(engine.tracer.export()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name="btx-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
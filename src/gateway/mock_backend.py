@@ -0,0 +1,194 @@
+"""
+Faux backends Bitcoin locaux pour les tests de charge: API Esplora (POST /api/tx,
+GET /api/blocks/tip/height) et JSON-RPC Bitcoin Core (sendrawtransaction,
+getblockchaininfo) sur un même port, avec latence et taux d'erreur réglables.
+
+register() ajoute les entrées "Mock Esplora" et "Mock Core RPC" à BITCOIN_APIS:
+à appeler avant de créer le GatewayEngine (les backends sont créés avec lui).
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bitcoin_tx import calculate_txid
+from btx_protocol import BITCOIN_APIS
+
+MOCK_ESPLORA = "Mock Esplora"
+MOCK_CORE_RPC = "Mock Core RPC"
+
+# Hauteur annoncée par les sondes
+TIP_HEIGHT = 850000
+
+
+class MockBitcoinBackend:
+    """
+    Args:
+        latency: Délai moyen de chaque réponse (s)
+        jitter: Variation aléatoire ajoutée au délai, uniforme sur [0, jitter] (s)
+        error_rate: Probabilité d'une erreur transitoire (HTTP 503, erreur RPC -28)
+        reject_rate: Probabilité d'un refus définitif (HTTP 400, erreur RPC -26)
+        seed: Graine du tirage des erreurs et délais
+    """
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, reject_rate=0.0, seed=0,
+                 host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.host = host
+        self.port = port
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.accepted = {}  # TXID -> instant monotone de la première acceptation
+        self.requests = 0
+        self.errors = 0
+        self.rejects = 0
+
+    @property
+    def esplora_url(self):
+        return f"http://{self.host}:{self.port}/api/tx"
+
+    @property
+    def rpc_url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def register(self):
+        """Ajoute les deux faux backends à BITCOIN_APIS; retourne leurs noms"""
+        BITCOIN_APIS[MOCK_ESPLORA] = {"clearnet": self.esplora_url}
+        BITCOIN_APIS[MOCK_CORE_RPC] = {"clearnet": self.rpc_url, "rpc": True}
+        return MOCK_ESPLORA, MOCK_CORE_RPC
+
+    def unregister(self):
+        BITCOIN_APIS.pop(MOCK_ESPLORA, None)
+        BITCOIN_APIS.pop(MOCK_CORE_RPC, None)
+
+    def _draw(self):
+        """Tirage d'une requête: (délai, issue) avec issue "ok", "error" ou "reject" """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._rnd.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                return delay, "error"
+            if roll < self.error_rate + self.reject_rate:
+                self.rejects += 1
+                return delay, "reject"
+            return delay, "ok"
+
+    def _accept(self, tx_hex):
+        """(TXID de tx_hex, False si déjà acceptée: réponse "already in block chain")"""
+        txid = calculate_txid(tx_hex)
+        with self._lock:
+            if txid in self.accepted:
+                return txid, False
+            self.accepted[txid] = time.monotonic()
+            return txid, True
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "accepted": len(self.accepted),
+                    "errors": self.errors, "rejects": self.rejects}
+
+    def start(self):
+        """Ouvre le port (0: choisi par le système) et sert dans un thread dédié"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status, body, content_type="text/plain"):
+                data = body.encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Requête annulée par le client (perdant d'une course race/hedged)
+
+            def do_GET(self):
+                if self.path.split("?")[0] == "/api/blocks/tip/height":
+                    self._reply(200, str(TIP_HEIGHT))
+                else:
+                    self._reply(404, "Not found")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8", "replace")
+                delay, outcome = mock._draw()
+                if delay > 0:
+                    time.sleep(delay)
+                if self.path.split("?")[0] == "/api/tx":
+                    self._esplora(body.strip(), outcome)
+                else:
+                    self._rpc(body, outcome)
+
+            def _esplora(self, tx_hex, outcome):
+                if outcome == "error":
+                    self._reply(503, "Service Unavailable")
+                elif outcome == "reject":
+                    self._reply(400, "sendrawtransaction RPC error: {\"code\":-26,\"message\":\"mandatory-script-verify-flag-failed\"}")
+                else:
+                    try:
+                        txid, new = mock._accept(tx_hex)
+                    except ValueError:
+                        self._reply(400, "TX decode failed")
+                        return
+                    if new:
+                        self._reply(200, txid)
+                    else:
+                        self._reply(400, "Transaction already in block chain")
+
+            def _rpc(self, body, outcome):
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    self._reply(400, "Invalid JSON")
+                    return
+                method = request.get("method")
+                result, error = None, None
+                if method == "getblockchaininfo":
+                    result = {"chain": "main", "blocks": TIP_HEIGHT}
+                elif method != "sendrawtransaction":
+                    error = {"code": -32601, "message": "Method not found"}
+                elif outcome == "error":
+                    error = {"code": -28, "message": "Loading block index..."}
+                elif outcome == "reject":
+                    error = {"code": -26, "message": "mandatory-script-verify-flag-failed"}
+                else:
+                    try:
+                        txid, new = mock._accept((request.get("params") or [""])[0])
+                    except ValueError:
+                        error = {"code": -22, "message": "TX decode failed"}
+                    else:
+                        result = txid
+                        if not new:
+                            error = {"code": -27, "message": "Transaction already in block chain"}
+                            result = None
+                self._reply(200, json.dumps({"result": result, "error": error, "id": request.get("id")}),
+                            "application/json")
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128  # Défaut 5: connexions refusées puis réessayées après 1 s
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name="btx-mock-backend", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
@@ -0,0 +1,230 @@
+"""
+Capture binaire des paquets mesh reçus, et relecture à vitesse réelle, accélérée
+ou maximale (diagnostic d'une gateway en production, tests de non-régression et
+de débit sur du trafic réel).
+
+Format (petit-boutiste):
+    en-tête   MAGIC (8 octets) + instant de début (double, secondes epoch)
+    paquet    décalage depuis le début (uint64, µs), émetteur (uint32),
+              id du paquet (uint32, 0 si absent), port (uint8), longueur (uint16),
+              puis le contenu: payload PRIVATE_APP brut, texte UTF-8, ou pour
+              les autres ports leur nom (le contenu n'intéresse pas la gateway)
+
+Comme pour le journal d'événements, le thread lecteur meshtastic ne fait que
+déposer le paquet dans une file bornée: l'écriture se fait par lots dans un
+thread dédié. Un fichier existant est complété (les décalages restent relatifs
+à son en-tête); un dernier paquet tronqué (arrêt brutal) est ignoré à la lecture
+et écrasé à la reprise de l'enregistrement.
+"""
+
+import queue
+import struct
+import threading
+import time
+
+from batch_writer import drain_batches, stop_writer
+from btx_protocol import sender_node
+
+MAGIC = b"BTXCAP\x01\x00"
+_HEADER = struct.Struct("<8sd")
+_RECORD = struct.Struct("<QIIBH")
+
+PORT_OTHER = 0
+PORT_PRIVATE_APP = 1
+PORT_TEXT_MESSAGE_APP = 2
+_PORT_CODES = {"PRIVATE_APP": PORT_PRIVATE_APP, "TEXT_MESSAGE_APP": PORT_TEXT_MESSAGE_APP}
+
+# Contenu conservé au maximum par paquet (un paquet LoRa fait moins de 256 octets)
+MAX_CONTENT = 0xFFFF
+
+
+def encode_packet(packet):
+    """(émetteur, id, code de port, contenu bytes) d'un paquet meshtastic"""
+    decoded = packet.get("decoded") or {}
+    portnum = decoded.get("portnum") or ""
+    code = _PORT_CODES.get(portnum, PORT_OTHER)
+    if code == PORT_PRIVATE_APP:
+        content = bytes(decoded.get("payload") or b"")
+    elif code == PORT_TEXT_MESSAGE_APP:
+        content = (decoded.get("text") or "").encode("utf-8")
+    else:
+        content = portnum.encode("utf-8")
+    packet_id = packet.get("id")
+    return sender_node(packet), packet_id if isinstance(packet_id, int) else 0, code, content[:MAX_CONTENT]
+
+
+def decode_packet(sender, packet_id, code, content):
+    """Paquet meshtastic (dict) tel que le reçoit on_mesh_receive"""
+    if code == PORT_PRIVATE_APP:
+        decoded = {"portnum": "PRIVATE_APP", "payload": content}
+    elif code == PORT_TEXT_MESSAGE_APP:
+        decoded = {"portnum": "TEXT_MESSAGE_APP", "text": content.decode("utf-8", "replace")}
+    else:
+        decoded = {"portnum": content.decode("utf-8", "replace")} if content else {}
+    packet = {"from": sender, "decoded": decoded}
+    if packet_id:
+        packet["id"] = packet_id
+    return packet
+
+
+def read_capture(path):
+    """
+    Yields:
+        (instant epoch de réception, paquet)
+    Raises:
+        ValueError: le fichier n'est pas une capture
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: pas une capture de paquets BTX")
+        _, start = _HEADER.unpack(header)
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return
+            offset, sender, packet_id, code, length = _RECORD.unpack(head)
+            content = f.read(length)
+            if len(content) < length:
+                return
+            yield start + offset / 1e6, decode_packet(sender, packet_id, code, content)
+
+
+def _valid_end(stream):
+    """Position de fin du dernier paquet complet (flux placé après l'en-tête)"""
+    end = stream.tell()
+    while True:
+        head = stream.read(_RECORD.size)
+        if len(head) < _RECORD.size:
+            return end
+        length = _RECORD.unpack(head)[4]
+        if len(stream.read(length)) < length:
+            return end
+        end = stream.tell()
+
+
+class PacketRecorder:
+    """
+    Args:
+        path: Fichier de capture (complété s'il existe déjà)
+        queue_size: Paquets en attente au maximum (au-delà, écartés et comptés)
+        log: Callback (message, tag) pour les erreurs d'écriture
+    """
+    def __init__(self, path, queue_size=10000, log=None):
+        self.path = path
+        self.log = log or (lambda message, tag="info": None)
+        self.recorded = 0
+        self.dropped = 0
+        self._start = None
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+
+    def start(self):
+        """Ouvre le fichier (ValueError si ce n'est pas une capture, OSError) et lance l'écriture"""
+        if self._thread is not None:
+            return
+        stream = open(self.path, "a+b")
+        try:
+            stream.seek(0)
+            header = stream.read(_HEADER.size)
+            if header:
+                if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"{self.path}: pas une capture de paquets BTX")
+                self._start = _HEADER.unpack(header)[1]
+                # Dernier paquet tronqué (arrêt brutal): écrasé par la suite
+                stream.truncate(_valid_end(stream))
+            else:
+                self._start = time.time()
+                stream.write(_HEADER.pack(MAGIC, self._start))
+                stream.flush()
+        except Exception:
+            stream.close()
+            raise
+        self._thread = threading.Thread(target=self._run, args=(stream,), name="btx-capture", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=5):
+        """Écrit ce qui reste en file puis arrête le thread"""
+        if self._thread is not None:
+            stop_writer(self._queue, self._thread, timeout)
+            self._thread = None
+
+    def record(self, packet):
+        """Dépose un paquet (jamais bloquant: file pleine = paquet écarté)"""
+        try:
+            self._queue.put_nowait((time.time(), packet))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self, stream):
+        def write(batch):
+            stream.write(b"".join(self._pack(instant, packet) for instant, packet in batch))
+            stream.flush()
+            self.recorded += len(batch)
+
+        try:
+            drain_batches(self._queue, write)
+        except OSError as e:
+            self.log(f"❌ Capture des paquets: écriture impossible ({e})", "error")
+        finally:
+            stream.close()
+
+    def _pack(self, instant, packet):
+        sender, packet_id, code, content = encode_packet(packet)
+        offset = max(0, int((instant - self._start) * 1e6))
+        return _RECORD.pack(offset, sender & 0xFFFFFFFF, packet_id & 0xFFFFFFFF, code, len(content)) + content
+
+
+def replay(path, deliver, speed=1.0, max_gap=None, stop=None):
+    """
+    Relit une capture en respectant l'espacement des paquets.
+
+    Args:
+        deliver: Callback (paquet), par exemple SimulatedMeshInterface.deliver
+        speed: Facteur d'accélération (1 = temps réel); 0 = aussi vite que possible
+        max_gap: Silence maximal reproduit entre deux paquets (s, avant accélération)
+        stop: threading.Event optionnel pour interrompre
+    Returns:
+        Nombre de paquets relus
+    """
+    count = 0
+    previous = None
+    due = time.monotonic()
+    for instant, packet in read_capture(path):
+        if stop is not None and stop.is_set():
+            break
+        if speed and previous is not None:
+            gap = max(0.0, instant - previous)
+            if max_gap is not None:
+                gap = min(gap, max_gap)
+            # Échéances cumulées: pas de dérive due au temps de traitement
+            due += gap / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        previous = instant
+        deliver(packet)
+        count += 1
+    return count
+
+
+def summarize(path):
+    """Paquets, durée, ports et émetteurs d'une capture"""
+    count = 0
+    first = last = None
+    ports = {}
+    senders = set()
+    for instant, packet in read_capture(path):
+        count += 1
+        first = instant if first is None else first
+        last = instant
+        portnum = packet["decoded"].get("portnum", "")
+        ports[portnum] = ports.get(portnum, 0) + 1
+        senders.add(packet["from"])
+    return {
+        "packets": count,
+        "start": first,
+        "duration": (last - first) if count else 0.0,
+        "ports": ports,
+        "senders": len(senders),
+    }
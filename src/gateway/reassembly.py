@@ -0,0 +1,153 @@
+"""
+Réassemblage des transactions reçues en chunks binaires (protocole PRIVATE_APP)
+"""
+
+import threading
+import time
+
+from btx_protocol import BTX_CHUNK_SIZE
+
+# Résultat de PendingTransaction.add_chunk
+CHUNK_NEW = "new"
+CHUNK_DUPLICATE = "duplicate"
+
+
+class PendingTransaction:
+    """
+    Transaction en cours de réception.
+
+    Les chunks sont copiés directement à leur place dans un bytearray préalloué de
+    total_size octets; un bitmap (int) mémorise les indices reçus. La complétion est
+    un simple compteur et get_data() ne recopie rien.
+    """
+    __slots__ = ("tx_id", "total_size", "sender", "start_time", "expected_chunks",
+                 "buffer", "_view", "received_mask", "received_count", "corr")
+
+    def __init__(self, tx_id, total_size, sender):
+        self.tx_id = tx_id
+        self.total_size = total_size
+        self.sender = sender
+        self.start_time = time.monotonic()
+        self.expected_chunks = (total_size + BTX_CHUNK_SIZE - 1) // BTX_CHUNK_SIZE
+        self.buffer = bytearray(total_size)
+        self._view = memoryview(self.buffer)
+        self.received_mask = 0
+        self.received_count = 0
+        self.corr = None            # Identifiant de corrélation (journal d'événements)
+
+    def add_chunk(self, index, data):
+        """
+        Copie un chunk à sa place.
+
+        Returns:
+            CHUNK_NEW, ou CHUNK_DUPLICATE si le même chunk a déjà été reçu à l'identique
+        Raises:
+            ValueError: index hors limites, longueur qui déborde sur un autre chunk
+                ou laisse un trou, ou chunk déjà reçu avec un contenu différent
+        """
+        if not 0 <= index < self.expected_chunks:
+            raise ValueError(f"index {index} hors limites (0-{self.expected_chunks - 1})")
+
+        start = index * BTX_CHUNK_SIZE
+        end = min(start + BTX_CHUNK_SIZE, self.total_size)
+        length = len(data)
+        if index == self.expected_chunks - 1:
+            # Dernier chunk: octets au-delà de total_size ignorés (comme avant)
+            if length < end - start:
+                raise ValueError(f"dernier chunk trop court ({length}/{end - start} octets)")
+            data = data[:end - start]
+        elif length != BTX_CHUNK_SIZE:
+            raise ValueError(f"longueur {length} != {BTX_CHUNK_SIZE} octets (chevauchement ou trou)")
+
+        bit = 1 << index
+        if self.received_mask & bit:
+            if self._view[start:end] == data:
+                return CHUNK_DUPLICATE
+            raise ValueError(f"chunk {index} déjà reçu avec un contenu différent")
+
+        self._view[start:end] = data
+        self.received_mask |= bit
+        self.received_count += 1
+        return CHUNK_NEW
+
+    def is_complete(self):
+        return self.received_count == self.expected_chunks
+
+    def get_data(self):
+        """Le buffer réassemblé lui-même (sans copie)"""
+        return self.buffer
+
+    def is_expired(self, timeout=30):
+        return time.monotonic() - self.start_time >= timeout
+
+
+class ReassemblyTable:
+    """
+    Transactions en cours de réception, indexées par (nœud émetteur, tx_id).
+
+    Deux clients peuvent utiliser le même tx_id 8 bits sans s'écraser. La table est
+    découpée en shards protégés chacun par leur verrou: le thread lecteur meshtastic
+    et le thread de nettoyage ne se bloquent que s'ils touchent le même shard.
+    """
+    def __init__(self, shards=16):
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _index(self, node, tx_id):
+        return hash((node, tx_id)) % len(self._shards)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def buffered_bytes(self):
+        """Octets déjà reçus par l'ensemble des TX en cours"""
+        total = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                for pending in shard.values():
+                    total += min(pending.received_count * BTX_CHUNK_SIZE, pending.total_size)
+        return total
+
+    def start(self, pending):
+        """Enregistre une nouvelle TX; retourne celle qu'elle remplace (même nœud et tx_id) ou None"""
+        key = (pending.sender, pending.tx_id)
+        i = self._index(*key)
+        with self._locks[i]:
+            previous = self._shards[i].get(key)
+            self._shards[i][key] = pending
+        return previous
+
+    def add_chunk(self, node, tx_id, index, data):
+        """
+        Ajoute un chunk sous le verrou du shard.
+
+        Returns:
+            Le statut de PendingTransaction.add_chunk, ou None si la TX est inconnue
+        """
+        i = self._index(node, tx_id)
+        with self._locks[i]:
+            pending = self._shards[i].get((node, tx_id))
+            if pending is None:
+                return None
+            return pending.add_chunk(index, data)
+
+    def get(self, node, tx_id):
+        """La TX en cours (None si inconnue)"""
+        i = self._index(node, tx_id)
+        with self._locks[i]:
+            return self._shards[i].get((node, tx_id))
+
+    def pop(self, node, tx_id):
+        """Retire et retourne la TX (None si inconnue)"""
+        i = self._index(node, tx_id)
+        with self._locks[i]:
+            return self._shards[i].pop((node, tx_id), None)
+
+    def pop_expired(self, node, tx_id, timeout):
+        """Retire et retourne la TX si elle est expirée (None si inconnue ou redémarrée depuis)"""
+        i = self._index(node, tx_id)
+        with self._locks[i]:
+            pending = self._shards[i].get((node, tx_id))
+            if pending is None or not pending.is_expired(timeout):
+                return None
+            return self._shards[i].pop((node, tx_id))
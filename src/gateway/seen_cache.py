@@ -0,0 +1,123 @@
+"""
+Suppression des doublons du mesh, à deux niveaux:
+
+- SeenPacketFilter: copies d'un même paquet (from, id) reçues par plusieurs
+  chemins de relais, écartées avant tout décodage.
+- SeenTxCache: TXID déjà traités (LRU borné + TTL). Les clients mesh réémettent et
+  plusieurs relais livrent la même transaction: un doublon reçoit tout de suite
+  l'ACK (ou l'erreur) mémorisé, sans aller-retour HTTP. Un doublon qui arrive
+  pendant le broadcast de l'original attend son résultat.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+
+SEEN_BROADCAST = "broadcast"    # Acceptée par un backend
+SEEN_REJECTED = "rejected"      # Refusée définitivement (TxRejected)
+SEEN_IN_FLIGHT = "in_flight"    # Broadcast de l'original en cours
+
+
+class SeenPacketFilter:
+    """
+    LRU des paquets (nœud, id) récents. Appelé uniquement depuis le thread lecteur
+    meshtastic, donc sans verrou; les autres threads (métriques) ne lisent que
+    total_duplicates, un entier, jamais le Counter en cours de modification.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._seen = OrderedDict()
+        self.duplicates = Counter()  # nœud -> copies écartées
+        self.total_duplicates = 0
+
+    def is_duplicate(self, node, packet_id):
+        """True si (node, packet_id) a déjà été vu; un id absent ou nul n'est jamais filtré"""
+        if not packet_id:
+            return False
+        key = (node, packet_id)
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            self.duplicates[node] += 1
+            self.total_duplicates += 1
+            return True
+        self._seen[key] = None
+        if len(self._seen) > self.maxsize:
+            self._seen.popitem(last=False)
+        return False
+
+
+class SeenTxCache:
+    """
+    Args:
+        maxsize: Nombre maximal de TXID mémorisés (les moins récents sortent)
+        ttl: Durée de vie d'une entrée (s)
+    """
+    def __init__(self, maxsize=4096, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # txid -> (résultat, détail, échéance monotone)
+        self._in_flight = {}           # txid -> [waiters]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def claim(self, txid, waiter):
+        """
+        Consulte le cache avant un broadcast.
+
+        Returns:
+            None si la TX est nouvelle (elle est alors marquée en cours),
+            (SEEN_IN_FLIGHT, None) si l'original est en vol (waiter sera rendu par resolve),
+            sinon (SEEN_BROADCAST, txid) ou (SEEN_REJECTED, message d'erreur)
+        """
+        if txid is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(txid)
+            if entry is not None:
+                if entry[2] > time.monotonic():
+                    self._entries.move_to_end(txid)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                del self._entries[txid]
+            waiters = self._in_flight.get(txid)
+            if waiters is not None:
+                waiters.append(waiter)
+                self.hits += 1
+                return SEEN_IN_FLIGHT, None
+            self._in_flight[txid] = []
+            self.misses += 1
+            return None
+
+    def resolve(self, txid, outcome=None, detail=None):
+        """
+        Termine le broadcast de txid. outcome None (échec transitoire, délestage)
+        n'est pas mémorisé: un renvoi sera retenté.
+
+        Returns:
+            Les waiters des doublons arrivés pendant le broadcast
+        """
+        if txid is None:
+            return []
+        with self._lock:
+            waiters = self._in_flight.pop(txid, [])
+            if outcome is not None:
+                self._entries[txid] = (outcome, detail, time.monotonic() + self.ttl)
+                self._entries.move_to_end(txid)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return waiters
+
+    def snapshot(self):
+        """Compteurs pour l'affichage"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
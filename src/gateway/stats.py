@@ -0,0 +1,54 @@
+"""
+Compteurs de la gateway, tenus à jour par le moteur à chaque transition d'une
+entrée de l'historique. L'affichage ne lit qu'un instantané: plus de parcours de
+l'historique, dont le coût croissait avec le nombre de TX.
+"""
+
+import threading
+from collections import Counter
+
+
+class GatewayStats:
+    """
+    Compteurs protégés par un verrou (mis à jour depuis le thread lecteur
+    meshtastic et la boucle de broadcast).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0           # TX complètes reçues (entrées de l'historique)
+        self.bytes_received = 0
+        self.bytes_broadcast = 0
+        self.by_status = Counter()  # Statut courant -> nombre d'entrées
+        self.by_backend = Counter() # Backend -> TX acceptées
+        self.counters = Counter()   # (nom, étiquette) -> valeur: paquets, chunks, réponses...
+
+    def tx_added(self, status, size):
+        with self._lock:
+            self.received += 1
+            self.bytes_received += size
+            self.by_status[status] += 1
+
+    def incr(self, name, label="", value=1):
+        with self._lock:
+            self.counters[(name, label)] += value
+
+    def tx_transition(self, old_status, new_status, size, backend=None):
+        """Une entrée passe de old_status à new_status (backend: celui qui l'a acceptée)"""
+        with self._lock:
+            self.by_status[old_status] -= 1
+            self.by_status[new_status] += 1
+            if backend:
+                self.by_backend[backend] += 1
+                self.bytes_broadcast += size
+
+    def snapshot(self):
+        """Copie cohérente des compteurs"""
+        with self._lock:
+            return {
+                "received": self.received,
+                "bytes_received": self.bytes_received,
+                "bytes_broadcast": self.bytes_broadcast,
+                "by_status": dict(self.by_status),
+                "by_backend": dict(self.by_backend),
+                "counters": dict(self.counters),
+            }
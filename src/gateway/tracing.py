@@ -0,0 +1,215 @@
+"""
+Traces de latence par étape, du TX_START (ou de la première partie texte) à l'ACK.
+
+Chaque TX active est suivie par son identifiant de corrélation: le moteur y pose
+des marques (instants monotones) à chaque étape, et la durée entre deux marques
+successives alimente un histogramme par étape, et par backend pour le broadcast.
+Les dernières traces terminées sont gardées pour l'export JSON.
+
+Étapes (durée jusqu'à la marque du même nom):
+    first_chunk  TX_START -> premier chunk stocké (temps d'antenne LoRa)
+    chunks       premier -> dernier chunk
+    reassembly   dernier chunk -> TX complète (attente du TX_END, vérifications)
+    queue        TX complète -> début du broadcast (file, commit du journal)
+    broadcast    début -> résultat du broadcast (nouveaux essais compris)
+    reply        résultat -> ACK/ERROR envoyé (écriture radio)
+    total        première -> dernière marque
+"""
+
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+STAGES = ("first_chunk", "chunks", "reassembly", "queue", "broadcast", "reply")
+
+# Marques, dans l'ordre; la durée de STAGES[i] va de la marque précédente à MARKS[i + 1]
+MARKS = ("start", "first_chunk", "last_chunk", "reassembled", "broadcast_start", "broadcast_done", "replied")
+_STAGE_OF_MARK = dict(zip(MARKS[1:], STAGES))
+
+
+class LatencyHistogram:
+    """
+    Histogramme à précision relative constante (à la HDR Histogram): les valeurs,
+    en microsecondes, tombent dans 2^sub_bits sous-intervalles par puissance de 2.
+    Erreur relative <= 1/2^sub_bits (3 % par défaut), mémoire bornée quelle que
+    soit la plage, enregistrement en O(1).
+    """
+    def __init__(self, sub_bits=5):
+        self.sub_bits = sub_bits
+        self._sub = 1 << sub_bits
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, micros):
+        if micros < 2 * self._sub:
+            return micros
+        shift = micros.bit_length() - self.sub_bits - 1
+        return shift * self._sub + (micros >> shift)
+
+    def _value(self, index):
+        """Milieu de l'intervalle de index, en secondes"""
+        if index < 2 * self._sub:
+            return index / 1e6
+        shift = index // self._sub - 1
+        low = (index - shift * self._sub) << shift
+        return (low + (1 << shift) / 2) / 1e6
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1e6))
+        index = self._index(micros)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p):
+        """Percentile p (0-100) en secondes, None si vide"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(p / 100 * self.count))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._value(index), self.max)
+        return self.max
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class Trace:
+    __slots__ = ("corr", "protocol", "sender", "tx_id", "wall_start", "marks", "backend",
+                 "backend_latency", "attempts", "outcome")
+
+    def __init__(self, corr, protocol, sender, tx_id):
+        self.corr = corr
+        self.protocol = protocol
+        self.sender = sender
+        self.tx_id = tx_id
+        self.wall_start = time.time()
+        self.marks = {"start": time.monotonic()}
+        self.backend = None
+        self.backend_latency = None  # Appel HTTP/RPC du backend gagnant (s)
+        self.attempts = 0
+        self.outcome = None
+
+    def spans(self):
+        """Durée de chaque étape franchie, en secondes"""
+        spans = {}
+        previous = self.marks["start"]
+        for mark in MARKS[1:]:
+            instant = self.marks.get(mark)
+            if instant is None:
+                continue
+            spans[_STAGE_OF_MARK[mark]] = instant - previous
+            previous = instant
+        spans["total"] = previous - self.marks["start"]
+        return spans
+
+    def to_dict(self):
+        return {
+            "corr": self.corr,
+            "protocol": self.protocol,
+            "sender": self.sender,
+            "tx_id": self.tx_id,
+            "start": self.wall_start,
+            "outcome": self.outcome,
+            "backend": self.backend,
+            "backend_latency": self.backend_latency,
+            "attempts": self.attempts,
+            "spans": self.spans(),
+        }
+
+
+class Tracer:
+    """
+    Args:
+        recent: Traces terminées gardées pour l'export
+        max_active: TX suivies simultanément (au-delà, les plus anciennes sont
+            abandonnées: réceptions jamais terminées)
+    """
+    def __init__(self, recent=200, max_active=1024):
+        self.max_active = max_active
+        self._active = OrderedDict()
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self.stages = {stage: LatencyHistogram() for stage in STAGES + ("total",)}
+        self.backends = {}  # backend -> {"broadcast": histogramme, "http": histogramme}
+
+    def begin(self, corr, protocol, sender=None, tx_id=None):
+        if corr is None:
+            return
+        with self._lock:
+            self._active[corr] = Trace(corr, protocol, sender, tx_id)
+            if len(self._active) > self.max_active:
+                self._active.popitem(last=False)
+
+    def mark(self, corr, mark, first=False):
+        """Pose la marque mark (first: garde la première si elle existe déjà)"""
+        with self._lock:
+            trace = self._active.get(corr)
+            if trace is None:
+                return
+            if mark == "broadcast_start":
+                trace.attempts += 1
+            if first and mark in trace.marks:
+                return
+            trace.marks[mark] = time.monotonic()
+
+    def finish(self, corr, outcome, result=None):
+        """Termine la trace; les durées n'alimentent les histogrammes que pour un broadcast abouti"""
+        with self._lock:
+            trace = self._active.pop(corr, None)
+        if trace is None:
+            return
+        trace.outcome = outcome
+        if result is not None:
+            trace.backend = result.backend
+            trace.backend_latency = result.backend_latency
+        self._recent.append(trace)
+        if outcome != "broadcast":
+            return
+        spans = trace.spans()
+        for stage, seconds in spans.items():
+            self.stages[stage].record(seconds)
+        if trace.backend is not None:
+            with self._lock:
+                per_backend = self.backends.setdefault(trace.backend, {
+                    "broadcast": LatencyHistogram(), "http": LatencyHistogram()})
+            if "broadcast" in spans:
+                per_backend["broadcast"].record(spans["broadcast"])
+            per_backend["http"].record(trace.backend_latency)
+
+    def summary(self):
+        """p50/p95/p99 par étape et par backend"""
+        return {
+            "stages": {stage: histogram.snapshot() for stage, histogram in self.stages.items()},
+            "backends": {name: {kind: histogram.snapshot() for kind, histogram in histograms.items()}
+                         for name, histograms in list(self.backends.items())},
+        }
+
+    def export(self):
+        """Résumé et dernières traces, prêts pour json.dumps"""
+        return {"summary": self.summary(), "traces": [trace.to_dict() for trace in list(self._recent)]}
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.export(), f, indent=2)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Générateur déterministe de transactions Bitcoin synthétiques, pour les benchmarks
+et les tests de charge: legacy (P2PKH) et SegWit (P2WPKH), nombres d'entrées et de
+sorties variés, tailles jusqu'à BTX_MAX_TX_SIZE.
+
+La sérialisation est exacte (signatures DER et clés factices, non vérifiables) et
+le TXID est calculé pendant la construction, indépendamment de bitcoin_tx: il sert
+aussi de référence pour les parseurs. La TX n°i ne dépend que de (seed, i): un
+corpus de plusieurs millions de TX se produit en flux, se découpe entre processus
+et chaque TX se reproduit seule.
+
+    cd src/gateway
+    python -m tx_generator -n 1000000 --seed 7 > corpus.txt   # "txid hex" par ligne
+    python -m tx_generator -n 1000 --format raw -o corpus.bin  # TX brutes concaténées
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+from collections import namedtuple
+
+from bitcoin_tx import encode_varint
+from btx_protocol import BTX_MAX_TX_SIZE
+
+# data: bytes sérialisés; txid/wtxid: hex, ordre d'affichage (wtxid == txid en legacy)
+GeneratedTx = namedtuple("GeneratedTx", "index data txid wtxid segwit")
+
+_SEQUENCE = b"\xfd\xff\xff\xff"  # RBF signalé, comme les portefeuilles courants
+_SIGHASH_ALL = b"\x01"
+
+
+def _sha256d_hex(data):
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()[::-1].hex()
+
+
+def dummy_signature(rnd):
+    """Signature DER factice + SIGHASH_ALL (71 à 73 octets, comme une vraie)"""
+    parts = b""
+    for _ in range(2):
+        value = rnd.randbytes(32)
+        if value[0] & 0x80:
+            value = b"\x00" + value  # Entier DER positif
+        parts += b"\x02" + bytes([len(value)]) + value
+    return b"\x30" + bytes([len(parts)]) + parts + _SIGHASH_ALL
+
+
+def dummy_pubkey(rnd):
+    """Clé publique compressée factice (33 octets)"""
+    return bytes([2 + rnd.getrandbits(1)]) + rnd.randbytes(32)
+
+
+def _push(data):
+    return bytes([len(data)]) + data
+
+
+def _output_script(rnd, segwit):
+    if segwit:
+        return b"\x00\x14" + rnd.randbytes(20)                       # P2WPKH
+    return b"\x76\xa9\x14" + rnd.randbytes(20) + b"\x88\xac"         # P2PKH
+
+
+def build_transaction(rnd, segwit, input_count, output_count, size=None):
+    """
+    Construit une TX de structure valide.
+
+    Args:
+        rnd: random.Random (toutes les valeurs en sont tirées)
+        size: Taille exacte visée, atteinte par une sortie OP_RETURN supplémentaire
+    Returns:
+        (bytes, txid, wtxid)
+    Raises:
+        ValueError: size inatteignable avec ces entrées et sorties
+    """
+    version = (2).to_bytes(4, "little")
+    inputs = bytearray(encode_varint(input_count))
+    witness = bytearray()
+    for _ in range(input_count):
+        outpoint = rnd.randbytes(32) + rnd.randrange(4).to_bytes(4, "little")
+        if segwit:
+            script = b""
+            witness += b"\x02" + _push(dummy_signature(rnd)) + _push(dummy_pubkey(rnd))
+        else:
+            script = _push(dummy_signature(rnd)) + _push(dummy_pubkey(rnd))
+        inputs += outpoint + encode_varint(len(script)) + script + _SEQUENCE
+    outputs = bytearray()
+    for _ in range(output_count):
+        script = _output_script(rnd, segwit)
+        outputs += rnd.randrange(546, 10 ** 8).to_bytes(8, "little") + encode_varint(len(script)) + script
+    locktime = bytes(4)
+
+    if size is not None:
+        # Sortie OP_RETURN: montant (8) + longueur (1) + OP_RETURN + données
+        current = len(version) + len(inputs) + len(outputs) + len(locktime) + (2 + len(witness) if segwit else 0)
+        padding = size - current - len(encode_varint(output_count + 1)) - 9
+        if not 1 <= padding < 0xfd:
+            raise ValueError(f"taille {size} inatteignable avec {input_count} entrées et {output_count} sorties")
+        outputs += bytes(8) + encode_varint(padding) + b"\x6a" + rnd.randbytes(padding - 1)
+        output_count += 1
+
+    body = version + bytes(inputs) + encode_varint(output_count) + bytes(outputs) + locktime
+    txid = _sha256d_hex(body)
+    if not segwit:
+        return body, txid, txid
+    data = (version + b"\x00\x01" + bytes(inputs) + encode_varint(output_count) + bytes(outputs)
+            + bytes(witness) + locktime)
+    return data, txid, _sha256d_hex(data)
+
+
+def estimate_size(segwit, input_count, output_count):
+    """Taille maximale d'une TX de build_transaction (signatures de 73 octets)"""
+    size = 4 + len(encode_varint(input_count)) + len(encode_varint(output_count)) + 4
+    size += output_count * (31 if segwit else 34)
+    if segwit:
+        size += 2 + input_count * (41 + 1 + 1 + 73 + 1 + 33)
+    else:
+        size += input_count * (41 + 1 + 73 + 1 + 33)
+    return size
+
+
+class TxGenerator:
+    """
+    Args:
+        seed: Graine du corpus
+        segwit_ratio: Part de TX SegWit (0 = toutes legacy, 1 = toutes SegWit)
+        inputs: (min, max) entrées, tirées uniformément
+        outputs: (min, max) sorties, tirées uniformément
+        max_size: Taille maximale; les entrées sont réduites jusqu'à tenir
+    """
+    def __init__(self, seed=0, segwit_ratio=0.5, inputs=(1, 4), outputs=(1, 3), max_size=BTX_MAX_TX_SIZE):
+        if not 0 <= segwit_ratio <= 1:
+            raise ValueError("segwit_ratio doit être entre 0 et 1")
+        if not 1 <= inputs[0] <= inputs[1] or not 1 <= outputs[0] <= outputs[1]:
+            raise ValueError("intervalles d'entrées/sorties invalides")
+        if estimate_size(False, 1, outputs[0]) > max_size:
+            raise ValueError(f"max_size {max_size} trop petit pour une TX à 1 entrée")
+        self.seed = seed
+        self.segwit_ratio = segwit_ratio
+        self.inputs = inputs
+        self.outputs = outputs
+        self.max_size = max_size
+
+    def transaction(self, index):
+        """TX n°index du corpus (ne dépend que de seed et index)"""
+        rnd = random.Random(f"{self.seed}:{index}")
+        segwit = rnd.random() < self.segwit_ratio
+        input_count = rnd.randint(*self.inputs)
+        output_count = rnd.randint(*self.outputs)
+        while input_count > 1 and estimate_size(segwit, input_count, output_count) > self.max_size:
+            input_count -= 1
+        while output_count > 1 and estimate_size(segwit, input_count, output_count) > self.max_size:
+            output_count -= 1
+        data, txid, wtxid = build_transaction(rnd, segwit, input_count, output_count)
+        return GeneratedTx(index, data, txid, wtxid, segwit)
+
+    def stream(self, count=None, start=0):
+        """TX start, start + 1... (sans fin si count est None), produites une à une"""
+        index = start
+        while count is None or index < start + count:
+            yield self.transaction(index)
+            index += 1
+
+    def stream_bytes(self, count=None, start=0):
+        return (tx.data for tx in self.stream(count, start))
+
+    def stream_hex(self, count=None, start=0):
+        """(txid, hex) de chaque TX"""
+        return ((tx.txid, tx.data.hex()) for tx in self.stream(count, start))
+
+
+def _range(text):
+    """ "2-5" -> (2, 5), "3" -> (3, 3) """
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tx_generator", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=1000, help="Nombre de transactions")
+    parser.add_argument("--start", type=int, default=0, help="Index de la première TX (découpage d'un corpus)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--segwit", type=float, default=0.5, help="Part de TX SegWit (0-1)")
+    parser.add_argument("--inputs", default="1-4", help="Entrées min-max")
+    parser.add_argument("--outputs", default="1-3", help="Sorties min-max")
+    parser.add_argument("--max-size", type=int, default=BTX_MAX_TX_SIZE, help="Taille maximale (octets)")
+    parser.add_argument("--format", choices=("hex", "raw"), default="hex",
+                        help="hex: \"txid hex\" par ligne; raw: TX sérialisées concaténées")
+    parser.add_argument("-o", "--output", help="Fichier de sortie (par défaut la sortie standard)")
+    args = parser.parse_args(argv)
+
+    try:
+        generator = TxGenerator(args.seed, args.segwit, _range(args.inputs), _range(args.outputs), args.max_size)
+    except ValueError as e:
+        print(f"Paramètres invalides: {e}", file=sys.stderr)
+        return 2
+
+    binary = args.format == "raw"
+    if args.output:
+        out = open(args.output, "wb" if binary else "w", encoding=None if binary else "ascii")
+    else:
+        out = sys.stdout.buffer if binary else sys.stdout
+    try:
+        if binary:
+            for data in generator.stream_bytes(args.count, args.start):
+                out.write(data)
+        else:
+            for txid, tx_hex in generator.stream_hex(args.count, args.start):
+                out.write(f"{txid} {tx_hex}\n")
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Désérialiseur incrémental de transactions Bitcoin pour le mode texte.
+
+Les parties hex arrivent une par une; chacune n'est décodée qu'une fois et le
+parseur reprend là où il s'était arrêté (version, entrées, sorties, witness,
+locktime). La complétion est exacte: elle tombe sur le dernier octet du locktime,
+et la taille et le TXID sont alors connus.
+"""
+
+from bitcoin_tx import txid_from_layout, vsize_from_layout
+
+# Taille max. d'une TX standard (400 000 unités de poids)
+MAX_STANDARD_TX_SIZE = 100000
+
+
+class TxStreamParser:
+    """
+    Reçoit une transaction par morceaux (feed) et détecte sa fin exacte.
+
+    Raises (feed):
+        ValueError: hex invalide, structure impossible, TX trop grande ou octets
+            en trop après la fin de la transaction
+    """
+
+    def __init__(self, max_size=MAX_STANDARD_TX_SIZE):
+        self.max_size = max_size
+        self.buffer = bytearray()
+        self.segwit = False
+        self.size = None        # Taille exacte, connue à la complétion
+        self._nibble = ""       # Demi-octet hex en attente (partie de longueur impaire)
+        self._body_end = None   # Fin des sorties (début du witness)
+        self._txid = None
+        self._steps = self._parse()
+        next(self._steps)
+
+    @property
+    def complete(self):
+        return self.size is not None
+
+    @property
+    def received(self):
+        """Octets reçus jusqu'ici"""
+        return len(self.buffer)
+
+    def feed(self, data):
+        """
+        Ajoute des octets (bytes-like) ou du hex (str).
+
+        Returns:
+            True si la transaction est complète
+        """
+        if isinstance(data, str):
+            data = self._nibble + data
+            cut = len(data) & ~1
+            self._nibble = data[cut:]
+            data = bytes.fromhex(data[:cut])
+        if self.complete:
+            if data or self._nibble:
+                raise ValueError("octets en trop après la fin de la TX")
+            return True
+
+        self.buffer += data
+        try:
+            self._steps.send(None)
+        except StopIteration:
+            pass
+        if self.complete and (len(self.buffer) > self.size or self._nibble):
+            raise ValueError(f"{len(self.buffer) - self.size} octets en trop après la fin de la TX")
+        return self.complete
+
+    def hex(self):
+        return self.buffer.hex()
+
+    @property
+    def txid(self):
+        """TXID (hex, ordre d'affichage) une fois la TX complète, sinon None"""
+        if self._txid is None and self.complete:
+            with memoryview(self.buffer) as view:
+                self._txid = txid_from_layout(view, self.segwit, self._body_end)
+        return self._txid
+
+    @property
+    def vsize(self):
+        """Taille virtuelle (vbytes) une fois la TX complète, sinon None"""
+        if not self.complete:
+            return None
+        return vsize_from_layout(self.size, self.segwit, self._body_end)
+
+    # ------------------------------------------------------------------
+    # Parseur (générateur repris à chaque feed)
+    # ------------------------------------------------------------------
+
+    def _wait(self, end):
+        """Suspend le parseur jusqu'à ce que end octets soient disponibles"""
+        if end > self.max_size:
+            raise ValueError(f"TX trop grande (> {self.max_size} octets)")
+        while len(self.buffer) < end:
+            yield
+
+    def _varint(self, pos):
+        yield from self._wait(pos + 1)
+        first = self.buffer[pos]
+        if first < 0xfd:
+            return first, pos + 1
+        width = 2 if first == 0xfd else 4 if first == 0xfe else 8
+        yield from self._wait(pos + 1 + width)
+        return int.from_bytes(self.buffer[pos + 1:pos + 1 + width], "little"), pos + 1 + width
+
+    def _count(self, pos, min_item_size):
+        """Compteur (entrées, sorties, éléments witness) borné par la taille max."""
+        count, pos = yield from self._varint(pos)
+        if count * min_item_size > self.max_size:
+            raise ValueError(f"compteur {count} impossible")
+        return count, pos
+
+    def _parse(self):
+        buf = self.buffer
+        yield from self._wait(5)
+        pos = 4
+        if buf[4] == 0x00:
+            # Marker SegWit, suivi du flag 0x01
+            yield from self._wait(6)
+            if buf[5] != 0x01:
+                raise ValueError(f"flag SegWit invalide ({buf[5]:#04x})")
+            self.segwit = True
+            pos = 6
+
+        input_count, pos = yield from self._count(pos, 41)
+        if input_count == 0:
+            raise ValueError("TX sans entrée")
+        for _ in range(input_count):
+            pos += 36  # txid + vout
+            script_len, pos = yield from self._varint(pos)
+            pos += script_len + 4  # script + sequence
+
+        output_count, pos = yield from self._count(pos, 9)
+        for _ in range(output_count):
+            pos += 8  # montant
+            script_len, pos = yield from self._varint(pos)
+            pos += script_len
+        self._body_end = pos
+
+        if self.segwit:
+            for _ in range(input_count):
+                item_count, pos = yield from self._count(pos, 1)
+                for _ in range(item_count):
+                    item_len, pos = yield from self._varint(pos)
+                    pos += item_len
+
+        pos += 4  # locktime
+        yield from self._wait(pos)
+        self.size = pos